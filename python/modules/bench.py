@@ -1,45 +1,256 @@
-import time
+import gc
+import json
+import math
+import platform
 import random
+import statistics
+import sys
+import time
+import tracemalloc
 
 function = type(lambda x: None)
 
+# The clock used for all measurements
+timer = time.perf_counter_ns
+
 def clock(func, *args, reps=5, **kwargs):
-	start = time.time()
+	'''Time `reps` calls of a function and return the total in seconds'''
+	start = timer()
 	for x in range(0, reps):
 		func(*args, **kwargs)
-	total = time.time() - start
+	total = (timer() - start) / 1e9
 	print("Function '%s' with %i repetitions: %f" % (func.__code__.co_name, reps, total))
 	return total
 
-def compare(*args, reps=5):
+def calibrate(func, args=(), kwargs={}, min_time=0.05):
+	'''Find the number of loops per round needed for a round to take at least
+	`min_time` seconds, so that short functions aren't swamped by timer overhead.
+	Like timeit's autorange, tries 1, 2, 5, 10, 20, 50, ... loops.'''
+	loops = 1
+	while True:
+		for multiplier in (1, 2, 5):
+			n = loops * multiplier
+			start = timer()
+			for x in range(n):
+				func(*args, **kwargs)
+			if timer() - start >= min_time * 1e9:
+				return n
+		loops *= 10
+
+def summarize(samples):
+	'''Summary statistics for a list of per-call times in nanoseconds. Outliers are
+	the samples more than 1.5 IQRs outside the quartiles.'''
+	ordered = sorted(samples)
+	if len(ordered) > 1:
+		q1, median, q3 = statistics.quantiles(ordered, n=4, method="inclusive")
+	else:
+		q1 = median = q3 = ordered[0]
+	iqr = q3 - q1
+	low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+	return {
+		"min": ordered[0],
+		"max": ordered[-1],
+		"mean": statistics.fmean(ordered),
+		"median": median,
+		"stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+		"q1": q1,
+		"q3": q3,
+		"iqr": iqr,
+		"outliers": sum(1 for s in ordered if s < low or s > high),
+	}
+
+def measure(func, *args, rounds=10, warmup=1, loops=None, min_time=0.05, disable_gc=True, memory=True, name=None, **kwargs):
+	'''Benchmark a function. After `warmup` untimed rounds, times `rounds` rounds of
+	`loops` calls each (calibrated with `calibrate` if not given), with the garbage
+	collector disabled so that collections don't land in random rounds. If `memory`
+	is set, one more call is made under tracemalloc to find its peak allocation.
+
+	Returns a dict with the benchmark's name, the loops per round, the per-call time
+	of each round in nanoseconds, summary statistics of those times (see
+	`summarize`), and the peak memory in bytes.'''
+	if loops is None:
+		loops = calibrate(func, args, kwargs, min_time)
+	for x in range(warmup):
+		for y in range(loops):
+			func(*args, **kwargs)
+
+	samples = []
+	gc_enabled = gc.isenabled()
+	gc.collect()
+	if disable_gc:
+		gc.disable()
+	try:
+		for x in range(rounds):
+			start = timer()
+			for y in range(loops):
+				func(*args, **kwargs)
+			samples.append((timer() - start) / loops)
+	finally:
+		if gc_enabled:
+			gc.enable()
+
+	peak = None
+	if memory:
+		gc.collect()
+		tracemalloc.start()
+		try:
+			func(*args, **kwargs)
+			peak = tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+
+	return {
+		"name": name or func.__code__.co_name,
+		"loops": loops,
+		"rounds": rounds,
+		"samples": samples,
+		"stats": summarize(samples),
+		"peak_memory": peak,
+	}
+
+def suite(benchmarks, **options):
+	'''Run several benchmarks. `benchmarks` maps names to functions, or to
+	(function, args) or (function, args, kwargs) tuples. Options are passed to
+	`measure`.'''
+	results = []
+	for name, benchmark in benchmarks.items():
+		func, args, kwargs = benchmark, (), {}
+		if not isinstance(benchmark, function):
+			func, args = benchmark[:2]
+			if len(benchmark) > 2:
+				kwargs = benchmark[2]
+		result = measure(func, *args, name=name, **options, **kwargs)
+		print(report(result), file=sys.stderr)
+		results.append(result)
+	return results
+
+def format_time(ns):
+	'''Format a time in nanoseconds with an appropriate unit'''
+	for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+		if abs(ns) >= scale:
+			return "%.3f %s" % (ns / scale, unit)
+	return "%.1f ns" % ns
+
+def report(result):
+	'''A one line summary of a result from `measure`'''
+	stats = result["stats"]
+	line = "%-30s %12s  iqr %10s  sd %10s  (%i x %i loops, %i outliers)" % (
+		result["name"],
+		format_time(stats["median"]),
+		format_time(stats["iqr"]),
+		format_time(stats["stddev"]),
+		result["rounds"],
+		result["loops"],
+		stats["outliers"],
+	)
+	if result.get("peak_memory") is not None:
+		line += "  peak %.1f KiB" % (result["peak_memory"] / 1024)
+	return line
+
+def save(results, path):
+	'''Save results from `measure` or `suite` to a JSON file, along with the
+	environment they were measured in'''
+	with open(path, "w") as f:
+		json.dump({
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"results": results,
+		}, f, indent=2)
+
+def load(path):
+	'''Load results saved with `save`'''
+	with open(path) as f:
+		return json.load(f)["results"]
+
+def mann_whitney(a, b):
+	'''Two-sided Mann-Whitney U test of whether samples `a` and `b` come from the same
+	distribution, using the normal approximation with a tie correction. Returns the
+	p-value. Unlike a t-test, this doesn't assume the times are normally
+	distributed, which they rarely are.'''
+	n1, n2 = len(a), len(b)
+	if not n1 or not n2:
+		return 1.0
+	combined = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+	ranks = [0.0] * len(combined)
+	ties = 0.0
+	i = 0
+	while i < len(combined):
+		j = i
+		while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+			j += 1
+		for k in range(i, j + 1):
+			ranks[k] = (i + j) / 2 + 1
+		t = j - i + 1
+		ties += t ** 3 - t
+		i = j + 1
+	r1 = sum(rank for rank, (x, group) in zip(ranks, combined) if group == 0)
+	u = r1 - n1 * (n1 + 1) / 2
+	n = n1 + n2
+	variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+	if variance <= 0:
+		return 1.0
+	z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+	return min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+def compare_runs(baseline, current, threshold=0.05, alpha=0.05):
+	'''Compare two sets of results (e.g. from `load`), matched by name. A benchmark
+	has regressed if its median is more than `threshold` slower and the difference is
+	significant according to a Mann-Whitney U test at level `alpha`. Returns a list
+	of comparisons, each with the change in the median and a status of "regressed",
+	"improved", or "same".'''
+	baseline = {result["name"]: result for result in baseline}
+	comparisons = []
+	for result in current:
+		old = baseline.get(result["name"])
+		if old is None:
+			continue
+		old_median, new_median = old["stats"]["median"], result["stats"]["median"]
+		change = (new_median - old_median) / old_median if old_median else 0.0
+		p = mann_whitney(old["samples"], result["samples"])
+		status = "same"
+		if p < alpha and change > threshold:
+			status = "regressed"
+		elif p < alpha and change < -threshold:
+			status = "improved"
+		comparisons.append({
+			"name": result["name"],
+			"baseline": old_median,
+			"current": new_median,
+			"change": change,
+			"p": p,
+			"status": status,
+		})
+	return comparisons
+
+def compare(*args, reps=None, **options):
 	'''Compare functions. The format for functions is:
-	
-	compare((function1, args, kwargs), (function2, args, kwargs), ...)'''
-	times = []
-	funcs = []
-	for arg in args:
+
+	compare((function1, args, kwargs), (function2, args, kwargs), ...)
+
+	Each function is benchmarked with `measure` (`reps`, if given, fixes the loops
+	per round) and ranked by its median time. Returns the results.'''
+	results = []
+	for i, arg in enumerate(args):
 		if isinstance(arg, function):
 			func = arg
-			args = []
+			fargs = []
 			kwargs = {}
 		elif len(arg) > 2:
-			func, args, kwargs = arg[:3]
+			func, fargs, kwargs = arg[:3]
 		elif len(arg) == 2:
-			func, args = arg
+			func, fargs = arg
 			kwargs = {}
-		t = clock(func, *args, reps=reps, **kwargs)
-		times.append(t)
-		funcs.append(func)
-	f = 0
-	f2 = 0
-	for x in range(0, len(times)):
-		if f2 == f and x != f:
-			f2 = x
-		if times[x] < times[f]:
-			f2 = f
-			f = x
-	func = funcs[f]
-	print("Function %i ('%s') is fastest by %f seconds" % (f + 1, func.__code__.co_name, times[f2] - times[f]))
+		name = "%i: %s" % (i + 1, func.__code__.co_name)
+		results.append(measure(func, *fargs, loops=reps, name=name, **options, **kwargs))
+	ranked = sorted(results, key=lambda result: result["stats"]["median"])
+	fastest = ranked[0]["stats"]["median"]
+	for result in ranked:
+		print("%s  %6.2fx" % (report(result), result["stats"]["median"] / fastest))
+	if len(ranked) > 1:
+		p = mann_whitney(ranked[0]["samples"], ranked[1]["samples"])
+		print("Function %s is fastest by %s (p=%.3f)" % (ranked[0]["name"], format_time(ranked[1]["stats"]["median"] - fastest), p))
+	return results
 
 def randdata(length=100):
 	data = ""
@@ -47,3 +258,20 @@ def randdata(length=100):
 		data += str(random.randrange(1000000000, 10000000000))
 	data = data[:length]
 	return data
+
+if __name__ == "__main__":
+	from argparse import ArgumentParser
+
+	parser = ArgumentParser(description="Compare two saved benchmark runs")
+	parser.add_argument("baseline", help="results saved with bench.save")
+	parser.add_argument("current", help="results saved with bench.save")
+	parser.add_argument("-t", "--threshold", type=float, default=0.05, help="relative slowdown to flag (default: 0.05)")
+	parser.add_argument("-a", "--alpha", type=float, default=0.05, help="significance level (default: 0.05)")
+	args = parser.parse_args()
+
+	comparisons = compare_runs(load(args.baseline), load(args.current), args.threshold, args.alpha)
+	for c in comparisons:
+		print("%-30s %12s -> %12s  %+7.1f%%  p=%.3f  %s" % (
+			c["name"], format_time(c["baseline"]), format_time(c["current"]), c["change"] * 100, c["p"], c["status"]
+		))
+	sys.exit(1 if any(c["status"] == "regressed" for c in comparisons) else 0)
@@ -3,18 +3,79 @@
 """
 This module allows for manipulation of tabular data via pandas
 """
+import ast as _ast
+import contextlib as _contextlib
+import datetime as _datetime
+import functools as _functools
+import glob as _glob
+import hashlib as _hashlib
+import io as _io
 import os as _os
 import pandas as _pd
+import pickle as _pickle
 import re as _re
 import sqlite3 as _sqlite3
-
+import time as _time
+import tokenize as _tokenize
+
+from collections import OrderedDict as _OrderedDict, deque as _deque
+from concurrent.futures import (
+    Future as _Future,
+    ProcessPoolExecutor as _ProcessPoolExecutor,
+)
 from enum import Enum as _Enum
-from numpy import ndarray as _ndarray, dtype as _dtype
+from numpy import (
+    nan as _nan,
+    ndarray as _ndarray,
+    dtype as _dtype,
+    concatenate as _concatenate,
+    flatnonzero as _flatnonzero,
+    intersect1d as _intersect1d,
+    unique as _unique,
+)
 from pandas import DataFrame as _DataFrame
 from pandas.core.series import Series as _Series
 from pathlib import Path as _Path
 from sqlite3 import Connection as _Connection, Cursor as _Cursor
-from typing import Callable as _Callable
+from typing import (
+    Callable as _Callable,
+    Iterable as _Iterable,
+    Iterator as _Iterator,
+)
+
+# The default number of rows to read at a time when streaming a file in chunks
+DEFAULT_CHUNKSIZE: int = 50_000
+# File suffixes which indicate that a JSON file contains one record per line
+_JSON_LINES_SUFFIXES: list[str] = [".jsonl", ".ndjson"]
+_PARQUET_SUFFIXES: list[str] = [".parquet", ".pq"]
+_FEATHER_SUFFIXES: list[str] = [".feather", ".arrow", ".ipc"]
+# String values which are interpreted as booleans when detecting column types
+_BOOL_VALUES: dict[str, bool] = {
+    "true": True,
+    "false": False,
+    "yes": True,
+    "no": False,
+    "1": True,
+    "0": False,
+}
+# Patterns used to detect column types, in order of precedence. Each pattern must
+# match the entire (lowercased) value.
+_TYPE_PATTERNS: list[tuple[type, str]] = [
+    (bool, "|".join(_BOOL_VALUES)),
+    (_datetime.date, r"\d{4}-\d{2}-\d{2}"),
+    (_datetime.datetime, r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}(:\d{2})?"),
+    (_datetime.timedelta, r"\d{2}:\d{2}:\d{2}"),
+    (int, r"\d+"),
+    (float, r"\d+(\.\d+)?"),
+]
+# The column used to identify rows in sqlite tables written by `DataFrame.to_sql`
+_SQL_INDEX_COLUMN: str = "index"
+# The number of pushed down queries referencing a column before it is indexed
+_SQL_AUTO_INDEX_AFTER: int = 3
+# Matches single or double quoted string literals in a pandas query
+_QUERY_STRING_PATTERN: _re.Pattern = _re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\""
+)
 
 
 class TabularFormat(_Enum):
@@ -29,6 +90,430 @@ class TabularFormat(_Enum):
     XLSX = 5
     HTML = 6
     JSON = 7
+    PARQUET = 8
+    FEATHER = 9  # Arrow IPC
+
+
+# Columnar formats which are read via pyarrow
+_ARROW_FORMATS: list[TabularFormat] = [TabularFormat.PARQUET, TabularFormat.FEATHER]
+# Formats which can be queried without loading the whole table
+_LAZY_FORMATS: list[TabularFormat] = [TabularFormat.SQLITE, *_ARROW_FORMATS]
+
+
+class TableCache:
+    """
+    A cache of parsed tables (and their detected column types) keyed by the source
+    file's path, size, and modification time along with the options used to load
+    it. Entries are kept in memory with LRU eviction and, optionally, pickled to a
+    directory on disk so that they survive between runs. Entries for an earlier
+    version of a file are evicted when the file is next looked up, and the least
+    recently used entries on disk are evicted beyond `max_disk_bytes`.
+
+    The cache also keeps the column types detected for each file in memory, so that
+    they can be reused without caching the table itself.
+    """
+
+    directory: _Path
+    max_entries: int
+    max_disk_bytes: int
+    _entries: "_OrderedDict[str, tuple[_DataFrame, dict[str, type]]]"
+    _types: "_OrderedDict[str, dict[str, type]]"
+
+    # The maximum number of files whose column types are kept
+    MAX_TYPES: int = 256
+
+    def __init__(
+        self,
+        directory: _Path | str = None,
+        max_entries: int = 8,
+        max_disk_bytes: int = 1 << 30,
+    ) -> None:
+        """
+        Initialize the TableCache object
+
+        Args:
+            directory (_Path | str, optional): Where to store cached tables on disk.
+                Defaults to None (in memory only).
+            max_entries (int, optional): The maximum number of tables to keep in
+                memory. Defaults to 8.
+            max_disk_bytes (int, optional): The maximum total size of the tables
+                stored on disk. Defaults to 1 GiB.
+        """
+        self.directory = _Path(directory).expanduser() if directory else None
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = _OrderedDict()
+        self._types = _OrderedDict()
+
+    @staticmethod
+    def key(path: _Path, **options: object) -> str:
+        """
+        Build a cache key for a file and the options used to load it. Keys for the
+        same file and options share a prefix, so that entries for earlier versions
+        of the file can be found.
+
+        Args:
+            path (_Path): The source file
+            **options: The load options which affect the parsed table
+
+        Returns:
+            str: The cache key, or None if the file does not exist
+        """
+        if path is None or not path.exists():
+            return None
+        stat: _os.stat_result = path.stat()
+        source: tuple = (str(path.resolve()), sorted(options.items()))
+        return (
+            f"{_hashlib.sha1(repr(source).encode()).hexdigest()}"
+            f"-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+        )
+
+    @staticmethod
+    def _source(key: str) -> str:
+        """
+        Returns:
+            str: The part of a cache key identifying the file and options
+        """
+        return key.split("-", 1)[0]
+
+    def _path(self, key: str) -> _Path:
+        """
+        Returns:
+            _Path: The on-disk location of a cache entry
+        """
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> tuple[_DataFrame, dict[str, type]]:
+        """
+        Retrieve a copy of a cached table.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            tuple[_DataFrame, dict[str, type]]: The table and its column types, or
+                None if the key is not cached
+        """
+        if key is None:
+            return None
+        entry: tuple[_DataFrame, dict[str, type]] = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.directory is not None and self._path(key).exists():
+            try:
+                with open(self._path(key), "rb") as f:
+                    entry = _pickle.load(f)
+                # Mark the entry as recently used for eviction from disk
+                _os.utime(self._path(key))
+            except (OSError, _pickle.UnpicklingError, EOFError):
+                return None
+            self._remember(key, entry)
+        else:
+            # The file may have changed since it was cached
+            self._evict_stale(key)
+            return None
+        data, column_types = entry
+        return data.copy(), dict(column_types)
+
+    def put(self, key: str, data: _DataFrame, column_types: dict[str, type]) -> None:
+        """
+        Cache a copy of a table.
+
+        Args:
+            key (str): The cache key
+            data (_DataFrame): The parsed table
+            column_types (dict[str, type]): The table's detected column types
+        """
+        if key is None:
+            return
+        self._evict_stale(key)
+        entry: tuple[_DataFrame, dict[str, type]] = (data.copy(), dict(column_types))
+        self._remember(key, entry)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_path: _Path = self._path(key).with_suffix(f".{_os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                _pickle.dump(entry, f, protocol=_pickle.HIGHEST_PROTOCOL)
+            _os.replace(tmp_path, self._path(key))
+            self._prune_disk()
+
+    def get_types(self, key: str) -> dict[str, type]:
+        """
+        Retrieve the column types detected for a file.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            dict[str, type]: The column types, or None if the key is not cached
+        """
+        types: dict[str, type] = self._types.get(key)
+        if types is None:
+            return None
+        self._types.move_to_end(key)
+        return dict(types)
+
+    def put_types(self, key: str, types: dict[str, type]) -> None:
+        """
+        Cache the column types detected for a file, in memory only.
+
+        Args:
+            key (str): The cache key
+            types (dict[str, type]): The detected column types
+        """
+        if key is None:
+            return
+        self._evict_stale(key, tables=False)
+        self._types[key] = dict(types)
+        self._types.move_to_end(key)
+        while len(self._types) > self.MAX_TYPES:
+            self._types.popitem(last=False)
+
+    def _evict_stale(self, key: str, tables: bool = True) -> None:
+        """
+        Remove the entries for other versions of the file and options a key
+        identifies, from memory and disk.
+
+        Args:
+            key (str): The current key
+            tables (bool, optional): Evict cached tables as well as column types.
+                Defaults to True.
+        """
+        source: str = self._source(key)
+        for entries in (self._entries, self._types) if tables else (self._types,):
+            for stale in [k for k in entries if k != key and self._source(k) == source]:
+                del entries[stale]
+        if tables and self.directory is not None and self.directory.exists():
+            for path in self.directory.glob(f"{source}-*.pkl"):
+                if path.stem != key:
+                    path.unlink(missing_ok=True)
+
+    def _prune_disk(self) -> None:
+        """
+        Remove the least recently used tables from disk until they fit in
+        `max_disk_bytes`.
+        """
+        entries: list[tuple[float, int, _Path]] = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat: _os.stat_result = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _remember(self, key: str, entry: tuple[_DataFrame, dict[str, type]]) -> None:
+        """
+        Add an entry to the in-memory cache, evicting the least recently used
+        entries beyond `max_entries`.
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove all entries from memory and disk.
+        """
+        self._entries.clear()
+        self._types.clear()
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+
+class _QueryTransformer(_ast.NodeTransformer):
+    """
+    Rewrites a parsed pandas query into a plain Python expression which operates on
+    whole columns: `and`/`or`/`not` become `&`/`|`/`~`, `in` and comparisons against
+    lists become `isin`, and chained comparisons are split. Raises ValueError for
+    any syntax pandas would treat specially, so those queries are left to pandas.
+    """
+
+    _ALLOWED: tuple[type, ...] = (
+        _ast.Expression,
+        _ast.Name,
+        _ast.Load,
+        _ast.Constant,
+        _ast.List,
+        _ast.Tuple,
+        _ast.BinOp,
+        _ast.operator,
+        _ast.UnaryOp,
+        _ast.USub,
+        _ast.UAdd,
+        _ast.Invert,
+    )
+
+    def generic_visit(self, node: _ast.AST) -> _ast.AST:
+        if not isinstance(node, self._ALLOWED):
+            raise ValueError(f"Unsupported query syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_BoolOp(self, node: _ast.BoolOp) -> _ast.AST:
+        op: _ast.operator = (
+            _ast.BitAnd() if isinstance(node.op, _ast.And) else _ast.BitOr()
+        )
+        values: list[_ast.AST] = [self.visit(value) for value in node.values]
+        result: _ast.AST = values[0]
+        for value in values[1:]:
+            result = _ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node: _ast.UnaryOp) -> _ast.AST:
+        if isinstance(node.op, _ast.Not):
+            return _ast.UnaryOp(op=_ast.Invert(), operand=self.visit(node.operand))
+        return self.generic_visit(node)
+
+    def visit_Compare(self, node: _ast.Compare) -> _ast.AST:
+        comparisons: list[_ast.AST] = []
+        left: _ast.AST = self.visit(node.left)
+        for op, right in zip(node.ops, node.comparators):
+            right = self.visit(right)
+            if isinstance(op, (_ast.In, _ast.NotIn)) or (
+                isinstance(op, (_ast.Eq, _ast.NotEq))
+                and isinstance(right, (_ast.List, _ast.Tuple))
+            ):
+                if not isinstance(left, _ast.Name):
+                    raise ValueError("Unsupported membership test")
+                comparison: _ast.AST = _ast.Call(
+                    func=_ast.Attribute(value=left, attr="isin", ctx=_ast.Load()),
+                    args=[right],
+                    keywords=[],
+                )
+                if isinstance(op, (_ast.NotIn, _ast.NotEq)):
+                    comparison = _ast.UnaryOp(op=_ast.Invert(), operand=comparison)
+            elif isinstance(op, (_ast.Is, _ast.IsNot)):
+                raise ValueError("Unsupported comparison")
+            else:
+                comparison = _ast.Compare(left=left, ops=[op], comparators=[right])
+            comparisons.append(comparison)
+            left = right
+        result: _ast.AST = comparisons[0]
+        for comparison in comparisons[1:]:
+            result = _ast.BinOp(left=result, op=_ast.BitAnd(), right=comparison)
+        return result
+
+
+def _boolean_precedence(query: str) -> str:
+    """
+    Replace `&` and `|` in a pandas query with `and` and `or`, as pandas does before
+    parsing it, so that they bind more loosely than comparisons. Python would parse
+    `a == 1 | a == 2` as the chained comparison `a == (1 | a) == 2`.
+
+    Args:
+        query (str): The pandas query
+
+    Returns:
+        str: The query with boolean operators, or unchanged if it can't be tokenized
+    """
+    if "&" not in query and "|" not in query:
+        return query
+    replacements: dict[str, str] = {"&": "and", "|": "or"}
+    try:
+        tokens: list[tuple[int, str]] = []
+        for token in _tokenize.generate_tokens(_io.StringIO(query).readline):
+            if token.type == _tokenize.OP and token.string in replacements:
+                tokens.append((_tokenize.NAME, replacements[token.string]))
+            else:
+                tokens.append((token.type, token.string))
+    except (_tokenize.TokenError, SyntaxError):
+        return query
+    return _tokenize.untokenize(tokens)
+
+
+@_functools.lru_cache(maxsize=256)
+def _compile_query(query: str) -> object:
+    """
+    Compile a pandas query into a code object which can be evaluated against a
+    DataFrame's columns. Compiled queries are cached, so repeated `where` strings are
+    only parsed once.
+
+    Args:
+        query (str): The pandas query
+
+    Returns:
+        code: The compiled query, or None if it must be evaluated by pandas
+    """
+    if "`" in query or "@" in query:
+        return None
+    try:
+        tree: _ast.Expression = _QueryTransformer().visit(
+            _ast.parse(_boolean_precedence(query).strip(), mode="eval")
+        )
+    except (SyntaxError, ValueError):
+        return None
+    return compile(_ast.fix_missing_locations(tree), "<query>", "eval")
+
+
+@_functools.lru_cache(maxsize=256)
+def _equality_query(query: str) -> tuple[str, object]:
+    """
+    Recognize queries of the form `column == value` or `column in [values]`, which
+    can be answered from an index on `column`.
+
+    Args:
+        query (str): The pandas query
+
+    Returns:
+        tuple[str, object]: The column and the value it must equal, or a tuple of
+            values it must be one of, or None if the query is not a simple equality
+            test
+    """
+    try:
+        node: _ast.AST = _ast.parse(
+            _boolean_precedence(query).strip(), mode="eval"
+        ).body
+    except SyntaxError:
+        return None
+    if not isinstance(node, _ast.Compare) or len(node.ops) != 1:
+        return None
+    left: _ast.AST = node.left
+    right: _ast.AST = node.comparators[0]
+    if isinstance(node.ops[0], _ast.Eq) and isinstance(right, _ast.Name):
+        left, right = right, left
+    elif not isinstance(node.ops[0], (_ast.Eq, _ast.In)):
+        return None
+    if not isinstance(left, _ast.Name):
+        return None
+    try:
+        value: object = _ast.literal_eval(right)
+    except (ValueError, TypeError, SyntaxError):
+        return None
+    if isinstance(value, (list, tuple)):
+        return left.id, tuple(value)
+    if isinstance(node.ops[0], _ast.In):
+        return None
+    return left.id, value
+
+
+class _QueryNamespace(dict):
+    """
+    The namespace a compiled query is evaluated in, which resolves names to the
+    DataFrame's columns on demand.
+    """
+
+    def __init__(self, df: _DataFrame) -> None:
+        super().__init__()
+        self._df = df
+
+    def __missing__(self, name: str) -> _Series:
+        if name in self._df.columns:
+            return self._df[name]
+        raise KeyError(name)
+
+
+# The cache used by `TableFile(cache=True)`
+DEFAULT_CACHE: TableCache = TableCache(
+    _os.environ.get("TABULAR_CACHE_DIR", "~/.cache/tabular")
+)
 
 
 class TableFile:
@@ -39,8 +524,26 @@ class TableFile:
     _infile: _Path
     _outfile: _Path
     _format: TabularFormat
-    data: _DataFrame
+    _data: _DataFrame
+    # Rows added since the last time `data` was accessed
+    _pending: list[dict[str, object]]
     na_values: list[str]
+    column_types: dict[str, type]
+    # For sqlite tables, a hash of each row as of the last load or save, used to
+    # determine which rows need to be written
+    _row_hashes: _Series
+    # The number of pushed down sqlite queries which referenced each column
+    _query_counts: dict[str, int]
+    # The kind of index ("hash" or "sorted") declared for each indexed column
+    _index_kinds: dict[str, str]
+    # For each hash indexed column, the labels of the rows holding each value. Built
+    # on first use and maintained by add/update/pop.
+    _hash_indexes: dict[str, dict[object, set]]
+    # For each sorted indexed column, its non-null values in sorted order, labelled
+    # with their rows. Built on first use and discarded when the column changes.
+    _sorted_indexes: dict[str, _Series]
+    # Holds the column types detected for the infile, and its parsed table if cached
+    _cache: TableCache
     # TODO: potentially move default columns to separate timesheet program
     _default_columns: list[str] = [
         "name",
@@ -62,6 +565,10 @@ class TableFile:
         detect_types: bool = True,
         na_values: list[str] = ["", "nan", "nat", "NaN", "NaT"],
         con: _Connection = None,
+        sample_size: int = None,
+        lazy: bool = False,
+        cache: bool | TableCache = False,
+        indexes: list[str] | dict[str, str] = None,
     ) -> None:
         """
         Initialize the TableFile object
@@ -84,6 +591,18 @@ class TableFile:
             na_values (list[str], optional): Values to treat as NaN. When writing to a
                 csv, the first item will be used for NaN values. Defaults to ["nan", ""]
             con (_Connection, optional): A database connector. Defaults to None.
+            sample_size (int, optional): The number of evenly spaced values per
+                column to inspect when detecting types. Defaults to None (all values).
+            lazy (bool, optional): For sqlite, parquet, and feather files, defer
+                loading the table until `data` is first accessed. Until then, `get`
+                reads only the rows and columns it needs from the file. Defaults to
+                False.
+            cache (bool | TableCache, optional): Reuse the parsed table and column
+                types from a previous load of the same, unchanged file. If True, uses
+                DEFAULT_CACHE. Defaults to False.
+            indexes (list[str] | dict[str, str], optional): Columns to index for
+                fast lookups, either as a list of hash indexed columns or a mapping of
+                columns to index kinds. See `add_index`. Defaults to None.
         """
         if infile is not None:
             self._infile = _Path(infile)
@@ -95,12 +614,60 @@ class TableFile:
         self.name = name
         self._default_columns = column_names
         self.na_values = na_values
+        self.column_types = {}
+        self._pending = []
+        self._row_hashes = None
+        self._query_counts = {}
+        self._index_kinds = {}
+        self._hash_indexes = {}
+        self._sorted_indexes = {}
+        if isinstance(indexes, dict):
+            for column, kind in indexes.items():
+                self.add_index(column, kind)
+        else:
+            for column in indexes or []:
+                self.add_index(column)
+        self._detect_types = detect_types
+        self._sample_size = sample_size
+        self._cache = cache if isinstance(cache, TableCache) else DEFAULT_CACHE
+        if (
+            lazy
+            and data is None
+            and self.infile is not None
+            and self.format in _LAZY_FORMATS
+        ):
+            # Defer loading until the data is first accessed
+            self._data = None
+            return
+
+        if cache is True:
+            cache = DEFAULT_CACHE
+        cache_key: str = None
+        if cache and data is None:
+            cache_key = cache.key(
+                self.infile,
+                format=self.format.name,
+                name=name,
+                column_names=tuple(column_names),
+                na_values=tuple(na_values),
+                detect_types=detect_types,
+                sample_size=sample_size,
+            )
+            cached: tuple[_DataFrame, dict[str, type]] = cache.get(cache_key)
+            if cached is not None:
+                self.data, self.column_types = cached
+                self._snapshot()
+                return
+
         self.load(name=name)
         if data is not None:
             self.data = self._to_df(data)
             self.add(data)
         if detect_types:
-            self.set_column_types()
+            self.set_column_types(sample_size=sample_size, use_cache=data is None)
+            self._snapshot()
+        if cache_key is not None:
+            cache.put(cache_key, self.data, self.column_types)
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.path}, type={self.format.name})"
@@ -171,20 +738,40 @@ class TableFile:
         """
         if self._format:
             return self._format
-        if self.path.suffix == ".csv":
+        return self._detect_format(self.path)
+
+    @staticmethod
+    def _detect_format(path: _Path) -> TabularFormat:
+        """
+        Detect the format of a file from its suffix
+
+        Args:
+            path (_Path): The path to the file
+
+        Raises:
+            ValueError: If the suffix is not a supported format
+
+        Returns:
+            TabularFormat: The file format
+        """
+        if path.suffix == ".csv":
             return TabularFormat.CSV
-        elif self.path.suffix == ".tsv":
+        elif path.suffix == ".tsv":
             return TabularFormat.TSV
-        elif self.path.suffix in [".sql", ".sqlite", ".sqlite3", "db"]:
+        elif path.suffix in [".sql", ".sqlite", ".sqlite3", ".db"]:
             return TabularFormat.SQLITE
-        elif self.path.suffix == ".xml":
+        elif path.suffix == ".xml":
             return TabularFormat.XML
-        elif self.path.suffix == ".xlsx":
+        elif path.suffix == ".xlsx":
             return TabularFormat.XLSX
-        elif self.path.suffix == ".html":
+        elif path.suffix == ".html":
             return TabularFormat.HTML
-        elif self.path.suffix == ".json":
+        elif path.suffix in [".json", *_JSON_LINES_SUFFIXES]:
             return TabularFormat.JSON
+        elif path.suffix in _PARQUET_SUFFIXES:
+            return TabularFormat.PARQUET
+        elif path.suffix in _FEATHER_SUFFIXES:
+            return TabularFormat.FEATHER
         else:
             raise ValueError("Unsupported format")
 
@@ -210,6 +797,54 @@ class TableFile:
         """
         return self.na_values[0]
 
+    @property
+    def data(self) -> _DataFrame:
+        """
+        The table's data. Any rows buffered by `add` are concatenated onto the table
+        in a single operation the first time it is accessed afterwards.
+
+        Returns:
+            _DataFrame: The table's data
+        """
+        if self._data is None:
+            # A lazily loaded table is being accessed for the first time
+            self._load_deferred()
+        if self._pending:
+            start: int = self._next_label()
+            self._data = _pd.concat(
+                [
+                    self._data,
+                    _pd.DataFrame(
+                        self._pending,
+                        index=_pd.RangeIndex(start, start + len(self._pending)),
+                    ),
+                ]
+            )
+            self._pending = []
+        return self._data
+
+    def _load_deferred(self) -> None:
+        """
+        Load a lazily loaded table, detecting its column types as `__init__` would
+        have.
+        """
+        self.load()
+        if self._detect_types:
+            self.set_column_types(sample_size=self._sample_size, use_cache=True)
+            self._snapshot()
+
+    @data.setter
+    def data(self, data: _DataFrame) -> None:
+        """
+        Replace the table's data, discarding any buffered rows.
+
+        Args:
+            data (_DataFrame): The new data
+        """
+        self._data = data
+        self._pending = []
+        self._invalidate_indexes()
+
     @property
     def columns(self) -> list[str]:
         """
@@ -261,67 +896,69 @@ class TableFile:
         else:
             return _pd.DataFrame(kwargs, index=[0])
 
-    def _detect_type(
-        self, values: [object], default: type = str, match_all: bool = True
+    def _detect_column_type(
+        self, column: _Series, sample_size: int = None, default: type = str
     ) -> type:
         """
-        Detect the type of the value of the objects using regex for strings:
+        Detect the type of a column by matching its string values against patterns
+        across the whole column (or an evenly spaced sample) at once:
 
+        - `bool`: `true`, `false`, `yes`, `no`, `1`, `0`
         - `date`: `YYYY-MM-DD`
-        - `datetime`: `YYYY-MM-DD HH:MM:SS`
+        - `datetime`: `YYYY-MM-DD HH:MM[:SS]`
         - `timedelta`: `HH:MM:SS`
         - `int`: `123`
-        - `float`: `123.45`
-        - `bool`: `true`, `false`, `yes`, `no`, `1`, `0`
+        - `float`: `123.45` or `123`
         - `str`: any other value
 
+        The first type whose pattern matches every non-null value wins. Columns which
+        pandas has already parsed into a non-object dtype are left as is.
+
         Args:
-            values (list[object]): The values to detect
-            default (type): The default type to return if no match is found. Defaults to
-                str.
-            match_all (bool, optional): If True, all values must match the same type.
-                Defaults to True.
+            column (_Series): The column to inspect
+            sample_size (int, optional): The number of evenly spaced values to
+                inspect. Defaults to None (all values).
+            default (type): The type to return if no pattern matches every value.
+                Defaults to str.
 
         Returns:
-            type: The detected type
-        """
-        import datetime as _datetime
-
-        detected_type: type = None
-        for value in values:
-            value_type: type = type(value)
-            if value_type is str:
-                # The value is a string, so try to detect the type
-                if value.lower() in ["true", "false", "yes", "no", "1", "0"]:
-                    value_type = bool
-                elif _re.match(r"^\d{4}-\d{2}-\d{2}$", value):
-                    value_type = _datetime.date
-                elif _re.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}(:\d{2})?$", value):
-                    value_type = _datetime.datetime
-                elif _re.match(r"^\d{2}:\d{2}:\d{2}$", value):
-                    value_type = _datetime.timedelta
-                elif _re.match(r"^\d+$", value):
-                    value_type = int
-                elif _re.match(r"^\d+\.\d+$", value):
-                    value_type = float
-                else:
-                    value_type = str
-            # Compare the detected type to the previous detected type
-            if detected_type is not None:
-                if detected_type != value_type and match_all:
-                    # If all values must match the same type, then we can stop
-                    # checking and return the default type
-                    return default
-
-            # Update the detected type
-            detected_type = value_type
-
-        return detected_type
-
-    def set_column_types(self, types: dict[str, object] = {}, **kwargs) -> None:
+            type: The detected type, or None if the column is already typed or empty
         """
-        Convert columns to appropriate types. If `types` is not specified, will attempt
-        to convert columns based on regex patterns:
+        if not (
+            _pd.api.types.is_object_dtype(column)
+            or _pd.api.types.is_string_dtype(column)
+        ):
+            return None
+        values: _Series = column.dropna()
+        if sample_size is not None and len(values) > sample_size:
+            values = values.iloc[:: len(values) // sample_size]
+        # Only the distinct values need to be matched
+        values = _pd.Series(values.unique()).astype(str).str.lower()
+        values = values[~values.isin([na.lower() for na in self.na_values])]
+        if values.empty:
+            return None
+
+        # Rule out candidates cheaply on the first few values so that, for most
+        # columns, only a single full-column match is needed
+        head: _Series = values.iloc[:100]
+        for dtype, pattern in _TYPE_PATTERNS:
+            if (
+                head.str.fullmatch(pattern).all()
+                and values.str.fullmatch(pattern).all()
+            ):
+                return dtype
+        return default
+
+    def set_column_types(
+        self,
+        types: dict[str, object] = {},
+        sample_size: int = None,
+        use_cache: bool = False,
+        **kwargs,
+    ) -> dict[str, type]:
+        """
+        Convert columns to appropriate types. If `types` is not specified, will detect
+        the type of each column based on regex patterns:
 
         - `date`: `YYYY-MM-DD`
         - `datetime`: `YYYY-MM-DD HH:MM:SS`
@@ -332,45 +969,111 @@ class TableFile:
 
         Args:
             types (dict[str, object]): A dictionary of column names and types
+            sample_size (int, optional): The number of evenly spaced values per column
+                to inspect when detecting types. Defaults to None (all values).
+            use_cache (bool, optional): Reuse the types previously detected for this
+                file if it has not changed since. Defaults to False.
             **kwargs: Each key/value pair will be added to the `types` dictionary
+
+        Returns:
+            dict[str, type]: The type applied to each converted column
         """
-        import datetime as _datetime
+        types = {**types, **kwargs}
+        detected: bool = not types
+        if detected:
+            cache_key: str = self._schema_cache_key() if use_cache else None
+            types = self._cache.get_types(cache_key) if cache_key else None
+            if types is None:
+                types = self._detect_column_types(self.data, sample_size)
+                self._cache.put_types(cache_key, types)
+
+        applied: dict[str, type] = self._apply_column_types(
+            self.data, types, strict=not detected
+        )
+        self.column_types.update(applied)
+        self._invalidate_indexes(applied)
+        return applied
 
-        types.update(kwargs)
-        if types:
-            # Use the specified types to update the column types
-            for column, dtype in types.items():
-                if column in self.data.columns:
-                    self.data[column] = self.data[column].astype(dtype)
-        else:
-            # Use regex patterns to update the column types
-            for column in self.data.columns:
-                # Retrieve 5 (or all if fewer) random non-null values from the column
-                sample_size: int = min(5, self.data[column].count())
-                values = self.data[column].dropna().sample(sample_size).tolist()
-                # Determine the type of the values
-                dtype = self._detect_type(values)
-                # Handle dates, times, and timedeltas using pandas methods
-                if dtype in [_datetime.date, _datetime.datetime, _datetime.timedelta]:
-                    update_func: Callable
-                    if dtype is _datetime.date:
-                        update_func = _pd.to_datetime
-                    elif dtype is _datetime.datetime:
-                        update_func = _pd.to_datetime
-                    elif dtype is _datetime.timedelta:
-                        update_func = _pd.to_timedelta
-                    try:
-                        self.data[column] = update_func(self.data[column])
-                    except Exception as e:
-                        # The column could not be updated
-                        pass
-                else:
-                    # Try to update the column type to the detected type
-                    try:
-                        self.data[column] = self.data[column].astype(dtype)
-                    except ValueError:
-                        # The column type could not be updated
-                        pass
+    def _detect_column_types(
+        self, df: _DataFrame, sample_size: int = None
+    ) -> dict[str, type]:
+        """
+        Detect the type of each column of a DataFrame. See `_detect_column_type`.
+
+        Args:
+            df (_DataFrame): The DataFrame to inspect
+            sample_size (int, optional): The number of evenly spaced values per column
+                to inspect. Defaults to None (all values).
+
+        Returns:
+            dict[str, type]: The detected type of each column which isn't a string
+        """
+        types: dict[str, type] = {}
+        for column in df.columns:
+            dtype: type = self._detect_column_type(df[column], sample_size)
+            if dtype is not None and dtype is not str:
+                types[column] = dtype
+        return types
+
+    def _apply_column_types(
+        self, df: _DataFrame, types: dict[str, object], strict: bool = True
+    ) -> dict[str, type]:
+        """
+        Convert the columns of a DataFrame in place.
+
+        Args:
+            df (_DataFrame): The DataFrame to convert
+            types (dict[str, object]): The type of each column to convert
+            strict (bool, optional): Raise if a column can't be converted, rather than
+                leaving it as is. Defaults to True.
+
+        Returns:
+            dict[str, type]: The type applied to each converted column
+        """
+        applied: dict[str, type] = {}
+        for column, dtype in types.items():
+            if column not in df.columns:
+                continue
+            try:
+                df[column] = self._convert_column(df[column], dtype)
+            except (ValueError, TypeError):
+                if strict:
+                    raise
+                # The detected column type could not be applied
+                continue
+            applied[column] = dtype
+        return applied
+
+    def _convert_column(self, column: _Series, dtype: object) -> _Series:
+        """
+        Convert a column to the given type, using pandas methods for dates, times,
+        timedeltas, and boolean strings.
+
+        Args:
+            column (_Series): The column to convert
+            dtype (object): The type to convert to
+
+        Returns:
+            _Series: The converted column
+        """
+        if dtype in [_datetime.date, _datetime.datetime]:
+            # Detected dates always match an ISO 8601 pattern
+            return _pd.to_datetime(column, format="ISO8601")
+        elif dtype is _datetime.timedelta:
+            return _pd.to_timedelta(column)
+        elif dtype is bool and not _pd.api.types.is_bool_dtype(column):
+            return column.astype(str).str.lower().map(_BOOL_VALUES)
+        return column.astype(dtype)
+
+    def _schema_cache_key(self) -> str:
+        """
+        Build a key identifying the current contents of the infile, under which its
+        detected column types are cached.
+
+        Returns:
+            str: The cache key, or None if the infile does not exist
+        """
+        return TableCache.key(self.infile, name=self.name)
 
     def exists(self) -> bool:
         """
@@ -415,15 +1118,55 @@ class TableFile:
         if name is None:
             name = self.name
 
+        self.data = self._read(filepath, format, name)
+        self._snapshot()
+
+    @staticmethod
+    def _hash_rows(df: _DataFrame) -> _Series:
+        """
+        Hash the values of each row.
+
+        Args:
+            df (_DataFrame): The DataFrame to hash
+
+        Returns:
+            _Series: A hash of each row, indexed by the row's index
+        """
+        return _pd.util.hash_pandas_object(df, index=False)
+
+    def _snapshot(self) -> None:
+        """
+        For sqlite tables, record the current state of each row so that `save` only
+        needs to write the rows which change from here on.
+        """
+        if self.format == TabularFormat.SQLITE and self._data is not None:
+            self._row_hashes = self._hash_rows(self.data)
+        else:
+            self._row_hashes = None
+
+    def _read(
+        self, filepath: str | _Path, format: TabularFormat, name: str
+    ) -> _DataFrame:
+        """
+        Read the entire file into a new DataFrame based on its format
+
+        Args:
+            filepath (str | _Path): The path to the file to read
+            format (TabularFormat): The format of the file
+            name (str): For databases and Excel workbooks, the table or sheet name
+
+        Returns:
+            _DataFrame: The file's data
+        """
         # If the file doesn't exist, create it
-        if not self.path or not self.path.exists():
-            self.data = _pd.DataFrame(columns=self._default_columns)
-            return
+        if not filepath or not _Path(filepath).exists():
+            return _pd.DataFrame(columns=self._default_columns)
 
+        data: _DataFrame
         if format == TabularFormat.CSV:
-            self.data = _pd.read_csv(filepath, na_values=[], keep_default_na=False)
+            data = _pd.read_csv(filepath, na_values=[], keep_default_na=False)
         elif format == TabularFormat.TSV:
-            self.data = _pd.read_csv(filepath, sep="\t", na_values=self.na_values)
+            data = _pd.read_csv(filepath, sep="\t", na_values=self.na_values)
         elif format == TabularFormat.SQLITE:
             with _sqlite3.connect(filepath) as conn:
                 # A name is required to load a table from a sqlite database
@@ -436,54 +1179,517 @@ class TableFile:
                         f"Must specify a table name: {tables.name.tolist()}"
                     )
                 try:
-                    self.data = _pd.read_sql(f"SELECT * FROM '{name}'", conn)
+                    data = _pd.read_sql(f"SELECT * FROM '{name}'", conn)
                 except _pd.io.sql.DatabaseError:
-                    self.data = _pd.DataFrame(columns=self._default_columns)
-            # If the first column is an index, use it
-            if self.data.columns[0] == "index":
-                self.data.set_index("index", inplace=True)
-                self.data.index.name = None
+                    data = _pd.DataFrame(columns=self._default_columns)
         elif format == TabularFormat.XML:
-            self.data = _pd.read_xml(filepath)
+            data = _pd.read_xml(filepath)
         elif format == TabularFormat.XLSX:
-            self.data = _pd.read_excel(filepath)
+            data = _pd.read_excel(filepath)
         elif format == TabularFormat.HTML:
-            self.data = _pd.read_html(filepath)
+            data = _pd.read_html(filepath)
         elif format == TabularFormat.JSON:
-            self.data = _pd.read_json(filepath)
+            data = _pd.read_json(
+                filepath, lines=_Path(filepath).suffix in _JSON_LINES_SUFFIXES
+            )
+        elif format in _ARROW_FORMATS:
+            data = self._read_arrow(filepath, format).to_pandas()
+
+        return self._set_unnamed_index(data, format)
+
+    @staticmethod
+    def _read_arrow(
+        filepath: str | _Path,
+        format: TabularFormat,
+        columns: list[str] = None,
+        filter: object = None,
+    ):
+        """
+        Read a parquet or feather file into a pyarrow Table. Feather files are memory
+        mapped so that unused columns and rows are never read from disk.
 
-        # If the first column is an unnamed index, use it as the index
-        if self.data.columns[0] == "Unnamed: 0":
-            self.data.set_index("Unnamed: 0", inplace=True)
-            self.data.index.name = None
+        Args:
+            filepath (str | _Path): The path to the file to read
+            format (TabularFormat): TabularFormat.PARQUET or TabularFormat.FEATHER
+            columns (list[str], optional): Only read these columns. Defaults to None.
+            filter (pyarrow.compute.Expression, optional): Only read rows matching
+                this expression. Defaults to None.
 
-    def save(
+        Returns:
+            pyarrow.Table: The table
+        """
+        if format == TabularFormat.PARQUET:
+            import pyarrow.parquet as pq
+
+            return pq.read_table(filepath, columns=columns, filters=filter)
+
+        import pyarrow.feather as feather
+
+        table = feather.read_table(filepath, columns=columns, memory_map=True)
+        if filter is not None:
+            table = table.filter(filter)
+        return table
+
+    @staticmethod
+    def _query_to_arrow(query: str) -> object:
+        """
+        Translate a simple pandas query (comparisons of columns against literals
+        combined with `and`/`or`/`not`/`&`/`|`/`~`) into a pyarrow filter expression.
+        pandas treats a comparison with a null as False, except `!=` and `not in`,
+        which are True, whereas pyarrow treats it as null, so those operators and
+        negations are made null-aware.
+
+        Args:
+            query (str): The pandas query
+
+        Returns:
+            pyarrow.compute.Expression: The equivalent expression, or None if the
+                query can't be translated
+        """
+        import operator
+        import pyarrow.compute as pc
+
+        def _not_equal(field: object, value: object) -> object:
+            return (field != value) | field.is_null(nan_is_null=True)
+
+        def _not_in(field: object, values: object) -> object:
+            return ~field.isin(values) | field.is_null(nan_is_null=True)
+
+        comparisons: dict[type, _Callable] = {
+            _ast.Eq: operator.eq,
+            _ast.NotEq: _not_equal,
+            _ast.Lt: operator.lt,
+            _ast.LtE: operator.le,
+            _ast.Gt: operator.gt,
+            _ast.GtE: operator.ge,
+            _ast.In: lambda field, values: field.isin(values),
+            _ast.NotIn: _not_in,
+        }
+
+        def _literal(node: _ast.AST) -> object:
+            value: object = _ast.literal_eval(node)
+            if value is None:
+                # Comparisons with None don't translate to pyarrow's nulls
+                raise ValueError("Cannot translate None")
+            return value
+
+        def _convert(node: _ast.AST) -> object:
+            if isinstance(node, _ast.BoolOp):
+                combine = (
+                    operator.and_ if isinstance(node.op, _ast.And) else operator.or_
+                )
+                values: list = [_convert(value) for value in node.values]
+                result = values[0]
+                for value in values[1:]:
+                    result = combine(result, value)
+                return result
+            elif isinstance(node, _ast.BinOp) and isinstance(
+                node.op, (_ast.BitAnd, _ast.BitOr)
+            ):
+                combine = (
+                    operator.and_ if isinstance(node.op, _ast.BitAnd) else operator.or_
+                )
+                return combine(_convert(node.left), _convert(node.right))
+            elif isinstance(node, _ast.UnaryOp) and isinstance(
+                node.op, (_ast.Not, _ast.Invert)
+            ):
+                # A null (False to pandas) must become True when negated
+                return ~pc.coalesce(_convert(node.operand), pc.scalar(False))
+            elif (
+                isinstance(node, _ast.Compare)
+                and len(node.ops) == 1
+                and isinstance(node.left, _ast.Name)
+                and type(node.ops[0]) in comparisons
+            ):
+                return comparisons[type(node.ops[0])](
+                    pc.field(node.left.id), _literal(node.comparators[0])
+                )
+            raise ValueError(f"Cannot translate '{_ast.dump(node)}'")
+
+        try:
+            return _convert(_ast.parse(_boolean_precedence(query), mode="eval").body)
+        except (SyntaxError, ValueError):
+            return None
+
+    def _query_arrow(self, column: list[str | int] = None, where: str = None):
+        """
+        Read only the needed columns and rows from a parquet or feather file.
+
+        Args:
+            column (list[str | int], optional): The columns which will be selected
+            where (str, optional): The pandas query to match rows
+
+        Returns:
+            _DataFrame: The matching rows, with `where` already applied
+        """
+        columns: list[str] = None
+        if column is not None and all(isinstance(c, str) for c in column):
+            # Also read the columns the query needs, plus the pandas index
+            referenced: list[str] = []
+            if where is not None:
+                try:
+                    referenced = [
+                        node.id
+                        for node in _ast.walk(_ast.parse(where, mode="eval"))
+                        if isinstance(node, _ast.Name)
+                    ]
+                except SyntaxError:
+                    referenced = None
+            if referenced is not None:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                schema_names: list[str]
+                if self.format == TabularFormat.PARQUET:
+                    schema_names = pq.read_schema(self.infile).names
+                else:
+                    with pa.memory_map(str(self.infile)) as source:
+                        schema_names = pa.ipc.open_file(source).schema.names
+                extra: list[str] = [
+                    name
+                    for name in schema_names
+                    if name in referenced or name.startswith("__index_level_")
+                ]
+                columns = list(dict.fromkeys([*column, *extra]))
+
+        filter = self._query_to_arrow(where) if where is not None else None
+        try:
+            table = self._read_arrow(self.infile, self.format, columns, filter)
+        except Exception:
+            # The filter couldn't be applied (e.g. mismatched types), so filter in
+            # pandas instead
+            filter = None
+            table = self._read_arrow(self.infile, self.format, columns)
+
+        df: _DataFrame = self._set_unnamed_index(table.to_pandas(), self.format)
+        if where is not None and filter is None:
+            df = df.query(where)
+        return df
+
+    @staticmethod
+    def _set_unnamed_index(df: _DataFrame, format: TabularFormat) -> _DataFrame:
+        """
+        If the first column is an unnamed index (as written by `DataFrame.to_csv`), or
+        for sqlite an "index" column (as written by `DataFrame.to_sql`), use it as the
+        index. Any other format may have a real "index" column, and parquet and
+        feather files restore their index from the pandas metadata instead.
+
+        Args:
+            df (_DataFrame): The DataFrame to update
+            format (TabularFormat): The format the DataFrame was read from
+
+        Returns:
+            _DataFrame: The DataFrame with its index set
+        """
+        index_names: list[str] = ["Unnamed: 0"]
+        if format == TabularFormat.SQLITE:
+            index_names.append("index")
+        if len(df.columns) and df.columns[0] in index_names:
+            df = df.set_index(df.columns[0])
+            df.index.name = None
+        return df
+
+    def _read_chunks(
+        self,
+        filepath: _Path,
+        format: TabularFormat,
+        name: str,
+        chunksize: int,
+    ) -> _Iterator[_DataFrame]:
+        """
+        Read a file in chunks of at most `chunksize` rows. CSV, TSV, SQLite, JSON
+        lines, parquet and feather files are read incrementally; all other formats
+        have no streaming reader, so they are loaded whole and then sliced.
+
+        Args:
+            filepath (_Path): The path to the file to read
+            format (TabularFormat): The format of the file
+            name (str): For databases, the name of the table to read
+            chunksize (int): The maximum number of rows per chunk
+
+        Yields:
+            _DataFrame: The next chunk of rows
+        """
+        if format == TabularFormat.CSV:
+            with _pd.read_csv(
+                filepath, na_values=[], keep_default_na=False, chunksize=chunksize
+            ) as reader:
+                yield from reader
+        elif format == TabularFormat.TSV:
+            with _pd.read_csv(
+                filepath, sep="\t", na_values=self.na_values, chunksize=chunksize
+            ) as reader:
+                yield from reader
+        elif format == TabularFormat.SQLITE:
+            if name is None:
+                raise ValueError("Must specify a table name")
+            with _contextlib.closing(_sqlite3.connect(filepath)) as conn:
+                yield from _pd.read_sql(
+                    f"SELECT * FROM '{name}'", conn, chunksize=chunksize
+                )
+        elif (
+            format == TabularFormat.JSON
+            and _Path(filepath).suffix in _JSON_LINES_SUFFIXES
+        ):
+            with _pd.read_json(filepath, lines=True, chunksize=chunksize) as reader:
+                yield from reader
+        elif format == TabularFormat.PARQUET:
+            import pyarrow.parquet as pq
+
+            with pq.ParquetFile(filepath) as reader:
+                for batch in reader.iter_batches(batch_size=chunksize):
+                    yield batch.to_pandas()
+        elif format == TabularFormat.FEATHER:
+            # The file is memory mapped, so only the current batch is paged in
+            for batch in self._read_arrow(filepath, format).to_batches(chunksize):
+                yield batch.to_pandas()
+        else:
+            data: _DataFrame = self._read(filepath, format, name)
+            for start in range(0, len(data), chunksize):
+                yield data.iloc[start : start + chunksize]
+
+    def iter_chunks(
         self,
+        chunksize: int = DEFAULT_CHUNKSIZE,
         filepath: str | _Path = None,
         format: str | TabularFormat = None,
         name: str = None,
-        overwrite: bool = False,
-        **kwargs: str,
-    ) -> None:
+        column: str | list[str] = None,
+        where: str = None,
+    ) -> _Iterator[_DataFrame]:
         """
-        Write the current data to disk
+        Stream the file from disk in chunks rather than loading it into `self.data`,
+        keeping memory use bounded by `chunksize` regardless of the file size.
+
+        Args:
+            chunksize (int, optional): The maximum number of rows per chunk. Defaults
+                to DEFAULT_CHUNKSIZE.
+            filepath (str | _Path, optional): The path to the file to read. Defaults to
+                the infile.
+            format (str | TabularFormat, optional): The format of the file
+            name (str, optional): The name of the table to read from a sqlite database
+            column (str | list[str], optional): Only yield the specified column(s)
+            where (str, optional): Only yield rows matching this pandas query
+
+        Examples:
+            >>> for chunk in table.iter_chunks(10_000, where="duration > 60"):
+            ...     print(chunk)
+
+        Yields:
+            _DataFrame: The next chunk of (matching) rows
+        """
+        if filepath is None:
+            filepath = self.infile or self.path
+        if format is None:
+            format = self.format
+        elif isinstance(format, str):
+            format = TabularFormat[format.upper()]
+        if name is None:
+            name = self.name
+        if isinstance(column, str):
+            column = [column]
+
+        if filepath is None or not _Path(filepath).exists():
+            return
+
+        for chunk in self._read_chunks(_Path(filepath), format, name, chunksize):
+            chunk = self._set_unnamed_index(chunk, format)
+            if where is not None:
+                chunk = chunk.query(where)
+                if chunk.empty:
+                    continue
+            if column is not None:
+                chunk = chunk[column]
+            yield chunk
+
+    def save(
+        self,
+        filepath: str | _Path = None,
+        format: str | TabularFormat = None,
+        name: str = None,
+        overwrite: bool = False,
+        append: bool = False,
+        **kwargs: str,
+    ) -> None:
+        """
+        Write the current data to disk
 
         Args:
             filepath (str | _Path, optional): The path to the save file
             format (str | TabularFormat, optional): The format to save the file as
             name (str, optional): The name of the table to save to a sqlite database
+            overwrite (bool, optional): Replace an existing sqlite table. Defaults to
+                False.
+            append (bool, optional): Append the data to the end of the existing file
+                or table rather than replacing it. Only supported for CSV, TSV,
+                SQLite, and JSON lines files. Defaults to False.
             **kwargs: Additional keyword arguments to pass to the save function
 
+        When saving a sqlite table back to the table it was loaded from, only the rows
+        which were inserted, updated, or deleted since it was loaded are written. If
+        that isn't possible (e.g. the table has no index column), the table is
+        rewritten.
+
         Raises:
             ValueError: If the format is not supported
         """
+        filepath, format, name = self._resolve_output(filepath, format, name)
+        saving_source: bool = (
+            format == TabularFormat.SQLITE
+            and self.infile is not None
+            and filepath.resolve() == self.infile.resolve()
+            and name == self.name
+        )
+        if saving_source and not (overwrite or append or kwargs):
+            if self._save_incremental(filepath, name):
+                return
+            # Fall back to rewriting the whole table
+            overwrite = True
+        self._write(self.data, filepath, format, name, overwrite, append, **kwargs)
+        if saving_source:
+            self._snapshot()
+
+    @staticmethod
+    def _sql_value(value: object) -> object:
+        """
+        Convert a pandas/numpy value to one which sqlite3 can store, matching the
+        conversions made by `DataFrame.to_sql`.
+
+        Args:
+            value (object): The value to convert
+
+        Returns:
+            object: The converted value
+        """
+        if value is None or value is _pd.NaT:
+            return None
+        elif isinstance(value, _pd.Timestamp):
+            # to_sql writes datetime64 columns as python datetimes, which pandas
+            # stores in ISO format, discarding nanoseconds
+            return value.to_pydatetime(warn=False).isoformat(" ")
+        elif isinstance(value, _datetime.datetime):
+            return value.isoformat(" ")
+        elif isinstance(value, _datetime.date):
+            return value.isoformat()
+        elif isinstance(value, _datetime.time):
+            return value.strftime("%H:%M:%S.%f")
+        elif isinstance(value, _pd.Timedelta):
+            return value.value
+        elif hasattr(value, "item"):
+            # numpy scalar
+            value = value.item()
+        if isinstance(value, float) and value != value:
+            # NaN
+            return None
+        return value
+
+    def _save_incremental(self, filepath: _Path, name: str) -> bool:
+        """
+        Write only the rows which were inserted, updated, or deleted since the table
+        was loaded (or last saved), using batched UPSERTs and DELETEs in a single
+        transaction.
+
+        Args:
+            filepath (_Path): The sqlite database the table was loaded from
+            name (str): The name of the table
+
+        Returns:
+            bool: True if the table was saved, False if it must be rewritten instead
+                (the table does not exist yet, has no index column, or has columns
+                which were dropped from the data)
+        """
+        if self._data is None:
+            # A lazily loaded table that was never accessed can't have changed
+            return True
+        if self._row_hashes is None or not filepath.exists():
+            return False
+
+        with _contextlib.closing(_sqlite3.connect(filepath)) as conn:
+            table_columns: list[str] = [
+                row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')
+            ]
+            if _SQL_INDEX_COLUMN not in table_columns or not set(
+                table_columns
+            ).issubset([_SQL_INDEX_COLUMN, *map(str, self.data.columns)]):
+                return False
+
+            hashes: _Series = self._hash_rows(self.data)
+            old_hashes: _Series = self._row_hashes
+            common: _pd.Index = hashes.index.intersection(old_hashes.index)
+            changed: _pd.Index = common[
+                hashes.loc[common].values != old_hashes.loc[common].values
+            ]
+            upserts: _pd.Index = hashes.index.difference(old_hashes.index).append(
+                changed
+            )
+            deletes: _pd.Index = old_hashes.index.difference(hashes.index)
+
+            columns: list[str] = [_SQL_INDEX_COLUMN, *map(str, self.data.columns)]
+            quoted: list[str] = [f'"{column}"' for column in columns]
+            upsert_sql: str = (
+                f'INSERT INTO "{name}" ({", ".join(quoted)})'
+                f' VALUES ({", ".join("?" * len(columns))})'
+                f' ON CONFLICT("{_SQL_INDEX_COLUMN}") DO UPDATE SET '
+                + ", ".join(f"{column} = excluded.{column}" for column in quoted[1:])
+            )
+
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                for column in columns:
+                    if column not in table_columns:
+                        conn.execute(f'ALTER TABLE "{name}" ADD COLUMN "{column}"')
+                # UPSERTs require a unique index on the conflict column
+                conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{name}_{_SQL_INDEX_COLUMN}"'
+                    f' ON "{name}" ("{_SQL_INDEX_COLUMN}")'
+                )
+                conn.executemany(
+                    upsert_sql,
+                    (
+                        tuple(map(self._sql_value, (label, *row)))
+                        for label, *row in self.data.loc[upserts].itertuples()
+                    ),
+                )
+                conn.executemany(
+                    f'DELETE FROM "{name}" WHERE "{_SQL_INDEX_COLUMN}" = ?',
+                    ((self._sql_value(label),) for label in deletes),
+                )
+
+        self._row_hashes = hashes
+        return True
+
+    def _resolve_output(
+        self,
+        filepath: str | _Path = None,
+        format: str | TabularFormat = None,
+        name: str = None,
+    ) -> tuple[_Path, TabularFormat, str]:
+        """
+        Fill in the output path, format, and table name from the object's defaults.
+
+        Args:
+            filepath (str | _Path, optional): The path to the save file
+            format (str | TabularFormat, optional): The format to save the file as
+            name (str, optional): The name of the table to save to a sqlite database
+
+        Raises:
+            ValueError: If no output file or format can be determined
+
+        Returns:
+            tuple[_Path, TabularFormat, str]: The filepath, format, and name
+        """
         if filepath is None:
             if self.path is None:
                 raise ValueError("No output file specified")
             filepath = self.path
-        elif self.outfile is None:
-            # If the outfile has not yet been set, set it now
-            self.outfile = filepath
+        else:
+            if self.outfile is None:
+                # If the outfile has not yet been set, set it now
+                self.outfile = filepath
+            if format is None and _Path(filepath).suffix != self.path.suffix:
+                # Saving to a different kind of file, so use its format
+                with _contextlib.suppress(ValueError):
+                    format = self._detect_format(_Path(filepath))
         if format is None:
             if self.format is None:
                 raise ValueError("No output format specified")
@@ -492,11 +1698,63 @@ class TableFile:
             format = getattr(TabularFormat, format.upper(), None)
         if name is None:
             name = self.name
+        return _Path(filepath), format, name
+
+    def _write(
+        self,
+        df: _DataFrame,
+        filepath: _Path,
+        format: TabularFormat,
+        name: str,
+        overwrite: bool = False,
+        append: bool = False,
+        **kwargs: str,
+    ) -> None:
+        """
+        Write a DataFrame to disk in the given format.
+
+        Args:
+            df (_DataFrame): The data to write
+            filepath (_Path): The path to the save file
+            format (TabularFormat): The format to save the file as
+            name (str): The name of the table to save to a sqlite database
+            overwrite (bool, optional): Replace an existing sqlite table. Defaults to
+                False.
+            append (bool, optional): Append to the existing file or table. Defaults to
+                False.
+            **kwargs: Additional keyword arguments to pass to the save function
+
+        Raises:
+            ValueError: If the format is not supported or cannot be appended to
+        """
+        json_lines: bool = filepath.suffix in _JSON_LINES_SUFFIXES
+        if append and format not in [
+            TabularFormat.CSV,
+            TabularFormat.TSV,
+            TabularFormat.SQLITE,
+        ]:
+            if not (format == TabularFormat.JSON and json_lines):
+                raise ValueError(f"Cannot append to format '{format}'")
+        # Only write a header when starting a new file
+        header: bool = not (append and filepath.exists())
+        mode: str = "a" if append else "w"
 
         if format == TabularFormat.CSV:
-            self.data.to_csv(filepath, na_rep=self.na_rep, **kwargs)
+            df.to_csv(filepath, na_rep=self.na_rep, mode=mode, header=header, **kwargs)
+        elif format == TabularFormat.TSV:
+            df.to_csv(
+                filepath,
+                sep="\t",
+                na_rep=self.na_rep,
+                mode=mode,
+                header=header,
+                **kwargs,
+            )
         elif format == TabularFormat.SQLITE:
             with _sqlite3.connect(filepath) as conn:
+                if append:
+                    df.to_sql(name, conn, if_exists="append", **kwargs)
+                    return
                 # Determine if the table already exists
                 cur: _Cursor = conn.cursor()
                 cur.execute(
@@ -505,26 +1763,391 @@ class TableFile:
                 )
                 if cur.fetchone() is not None:
                     if overwrite:
-                        cur.execute("DROP TABLE ?", (name,))
+                        cur.execute(f'DROP TABLE "{name}"')
                     else:
                         raise ValueError(f"Table '{name}' already exists")
-                self.data.to_sql(name, conn, **kwargs)
+                df.to_sql(name, conn, **kwargs)
         elif format == TabularFormat.XML:
-            self.data.to_xml(filepath, **kwargs)
+            df.to_xml(filepath, **kwargs)
         elif format == TabularFormat.XLSX:
-            self.data.to_excel(filepath, **kwargs)
+            df.to_excel(filepath, **kwargs)
         elif format == TabularFormat.HTML:
-            self.data.to_html(filepath, **kwargs)
+            df.to_html(filepath, **kwargs)
+        elif format == TabularFormat.JSON and json_lines:
+            df.to_json(filepath, orient="records", lines=True, mode=mode, **kwargs)
         elif format == TabularFormat.JSON:
-            self.data.to_json(filepath, **kwargs)
+            df.to_json(filepath, **kwargs)
+        elif format == TabularFormat.PARQUET:
+            # Store the index as a column so that filtered reads keep their labels
+            df.to_parquet(filepath, index=True, **kwargs)
+        elif format == TabularFormat.FEATHER:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+
+            # Unlike DataFrame.to_feather, this keeps non-default indexes
+            feather.write_feather(
+                pa.Table.from_pandas(df, preserve_index=True), filepath, **kwargs
+            )
         else:
             raise ValueError(f"Unsupported format '{format}'")
 
+    def write_chunks(
+        self,
+        chunks: _Iterable[_DataFrame],
+        filepath: str | _Path = None,
+        format: str | TabularFormat = None,
+        name: str = None,
+        overwrite: bool = False,
+        **kwargs: str,
+    ) -> int:
+        """
+        Write an iterable of DataFrames to a single file, appending each chunk after
+        the first so that only one chunk is held in memory at a time.
+
+        Args:
+            chunks (_Iterable[_DataFrame]): The chunks to write
+            filepath (str | _Path, optional): The path to the save file
+            format (str | TabularFormat, optional): The format to save the file as
+            name (str, optional): The name of the table to save to a sqlite database
+            overwrite (bool, optional): Replace an existing sqlite table. Defaults to
+                False.
+            **kwargs: Additional keyword arguments to pass to the save function
+
+        Returns:
+            int: The number of rows written
+        """
+        filepath, format, name = self._resolve_output(filepath, format, name)
+        if format in _ARROW_FORMATS:
+            return self._write_arrow_chunks(chunks, filepath, format, **kwargs)
+        rows: int = 0
+        for i, chunk in enumerate(chunks):
+            self._write(
+                chunk, filepath, format, name, overwrite, append=i > 0, **kwargs
+            )
+            rows += len(chunk)
+        return rows
+
+    @staticmethod
+    def _write_arrow_chunks(
+        chunks: _Iterable[_DataFrame],
+        filepath: _Path,
+        format: TabularFormat,
+        **kwargs: str,
+    ) -> int:
+        """
+        Write chunks to a single parquet or feather file. These formats can't be
+        appended to, so a single writer is kept open for all of the chunks, using the
+        schema of the first chunk.
+
+        Args:
+            chunks (_Iterable[_DataFrame]): The chunks to write
+            filepath (_Path): The path to the save file
+            format (TabularFormat): TabularFormat.PARQUET or TabularFormat.FEATHER
+            **kwargs: Additional keyword arguments to pass to the pyarrow writer
+
+        Returns:
+            int: The number of rows written
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows: int = 0
+        writer = None
+        schema: pa.Schema = None
+        try:
+            for chunk in chunks:
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=True)
+                    schema = table.schema
+                    if format == TabularFormat.PARQUET:
+                        writer = pq.ParquetWriter(filepath, schema, **kwargs)
+                    else:
+                        writer = pa.ipc.new_file(filepath, schema, **kwargs)
+                else:
+                    table = pa.Table.from_pandas(
+                        chunk, schema=schema, preserve_index=True
+                    )
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    def _replace_chunks(self, chunks: _Iterable[_DataFrame]) -> int:
+        """
+        Stream chunks read from the infile back into the infile. The chunks are first
+        written to a temporary file (or table) which then replaces the original, so
+        the source is never truncated while it is still being read.
+
+        Args:
+            chunks (_Iterable[_DataFrame]): The chunks to write
+
+        Returns:
+            int: The number of rows written
+        """
+        filepath: _Path = self.infile or self.path
+        if self.format == TabularFormat.SQLITE:
+            return self._replace_sqlite_table(chunks, filepath)
+
+        tmp_path: _Path = filepath.with_name(f".{filepath.stem}.tmp{filepath.suffix}")
+        try:
+            rows = self.write_chunks(chunks, tmp_path, self.format)
+            _os.replace(tmp_path, filepath)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return rows
+
+    def _replace_sqlite_table(
+        self, chunks: _Iterable[_DataFrame], filepath: _Path
+    ) -> int:
+        """
+        Stream chunks read from a sqlite table back into it. The chunks are written to
+        a temporary table with the same columns, which then replaces the original in a
+        single transaction, keeping the original's indexes.
+
+        Args:
+            chunks (_Iterable[_DataFrame]): The chunks to write
+            filepath (_Path): The path to the database
+
+        Returns:
+            int: The number of rows written
+        """
+        tmp_name: str = f"_{self.name}_tmp"
+        # Autocommit, so the swap below can be run in an explicit transaction
+        with _contextlib.closing(
+            _sqlite3.connect(filepath, isolation_level=None)
+        ) as conn:
+            # WAL mode lets the writer commit while the reader's cursor is open
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns: list[str] = [
+                row[1] for row in conn.execute(f'PRAGMA table_info("{self.name}")')
+            ]
+            # The table's own indexes, to recreate once it's replaced
+            index_sql: list[str] = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index'"
+                    " AND tbl_name = ? AND sql IS NOT NULL",
+                    (self.name,),
+                )
+            ]
+            conn.execute(f'DROP TABLE IF EXISTS "{tmp_name}"')
+            conn.execute(
+                f'CREATE TABLE "{tmp_name}" AS SELECT * FROM "{self.name}" WHERE 0'
+            )
+            # iter_chunks() turns a to_sql "index" column into the chunks' index
+            has_index: bool = bool(columns) and columns[0] == "index"
+            rows: int = 0
+            try:
+                for chunk in chunks:
+                    for column in chunk.columns:
+                        if column not in columns:
+                            conn.execute(
+                                f'ALTER TABLE "{tmp_name}" ADD COLUMN "{column}"'
+                            )
+                            columns.append(column)
+                    chunk.to_sql(
+                        tmp_name,
+                        conn,
+                        if_exists="append",
+                        index=has_index,
+                        index_label="index" if has_index else None,
+                    )
+                    rows += len(chunk)
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(f'DROP TABLE "{self.name}"')
+                    conn.execute(f'ALTER TABLE "{tmp_name}" RENAME TO "{self.name}"')
+                    for sql in index_sql:
+                        conn.execute(sql)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                conn.execute(f'DROP TABLE IF EXISTS "{tmp_name}"')
+                raise
+        return rows
+
+    def convert(
+        self,
+        filepath: str | _Path,
+        format: str | TabularFormat = None,
+        name: str = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        overwrite: bool = False,
+        **kwargs: str,
+    ) -> int:
+        """
+        Convert the infile to another file and/or format by streaming it in chunks,
+        without loading the whole table into memory.
+
+        Args:
+            filepath (str | _Path): The path to the converted file
+            format (str | TabularFormat, optional): The format to convert to. Defaults
+                to the format implied by the filepath's suffix.
+            name (str, optional): The name of the table to save to a sqlite database
+            chunksize (int, optional): The maximum number of rows per chunk. Defaults
+                to DEFAULT_CHUNKSIZE.
+            overwrite (bool, optional): Replace an existing sqlite table. Defaults to
+                False.
+            **kwargs: Additional keyword arguments to pass to the save function
+
+        Returns:
+            int: The number of rows written
+        """
+        if format is None:
+            format = self._detect_format(_Path(filepath))
+        return self.write_chunks(
+            self.iter_chunks(chunksize),
+            filepath,
+            format,
+            name or self.name,
+            overwrite,
+            **kwargs,
+        )
+
+    def update_chunks(
+        self,
+        where: str | list[str],
+        *args,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        **kwargs,
+    ) -> int:
+        """
+        Update all rows in the infile which match the condition, streaming the file in
+        chunks instead of loading it into `self.data`. Accepts the same update
+        arguments as `update`, but `where` must be one or more pandas queries since
+        row positions are not meaningful across chunks.
+
+        Args:
+            where (str | list[str]): One or more pandas queries to match
+            *args (dict): A dictionary of key/value pairs to update
+            *args (Callable): A function to apply to each row that matches
+            chunksize (int, optional): The maximum number of rows per chunk. Defaults
+                to DEFAULT_CHUNKSIZE.
+            **kwargs (str): Key/value pairs to update in the row
+
+        Returns:
+            int: The number of rows updated
+        """
+        func: _Callable = None
+        if len(args) == 1 and isinstance(args[0], dict):
+            kwargs = args[0]
+        elif len(args) == 1 and callable(args[0]):
+            func = args[0]
+        elif len(kwargs) == 0:
+            raise ValueError("No update methods specified")
+        if isinstance(where, str):
+            where = [where]
+
+        updated: list[int] = [0]
+
+        def _update(chunks: _Iterator[_DataFrame]) -> _Iterator[_DataFrame]:
+            for chunk in chunks:
+                mask: _Series = self._query_mask(chunk, where)
+                if mask.any():
+                    if func is not None:
+                        chunk.loc[mask] = chunk.loc[mask].apply(func, axis=1)
+                    else:
+                        for key, value in kwargs.items():
+                            chunk.loc[mask, key] = value
+                    updated[0] += int(mask.sum())
+                yield chunk
+
+        self._replace_chunks(_update(self.iter_chunks(chunksize)))
+        return updated[0]
+
+    def remove_chunks(
+        self, where: str | list[str], chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> int:
+        """
+        Remove all rows in the infile which match the condition, streaming the file in
+        chunks instead of loading it into `self.data`.
+
+        Args:
+            where (str | list[str]): One or more pandas queries to match
+            chunksize (int, optional): The maximum number of rows per chunk. Defaults
+                to DEFAULT_CHUNKSIZE.
+
+        Returns:
+            int: The number of rows removed
+        """
+        if isinstance(where, str):
+            where = [where]
+
+        removed: list[int] = [0]
+
+        def _remove(chunks: _Iterator[_DataFrame]) -> _Iterator[_DataFrame]:
+            for chunk in chunks:
+                mask: _Series = self._query_mask(chunk, where)
+                removed[0] += int(mask.sum())
+                yield chunk[~mask]
+
+        self._replace_chunks(_remove(self.iter_chunks(chunksize)))
+        return removed[0]
+
+    @staticmethod
+    def _query_mask(df: _DataFrame, where: list[str]) -> _Series:
+        """
+        Evaluate one or more pandas queries or row positions against a DataFrame.
+
+        Args:
+            df (_DataFrame): The DataFrame to query
+            where (list[str | int]): The pandas queries or row positions to match
+
+        Returns:
+            _Series: A boolean mask of the rows matching any of the queries
+        """
+        mask: _Series = _pd.Series(False, index=df.index)
+        positions: list[int] = [w for w in where if isinstance(w, int)]
+        if positions:
+            mask.iloc[positions] = True
+        for query in where:
+            if not isinstance(query, int):
+                mask |= TableFile._eval_query(df, query)
+        return mask
+
+    @staticmethod
+    def _eval_query(df: _DataFrame, query: str) -> _Series:
+        """
+        Evaluate a pandas query against a DataFrame. Simple queries are compiled once
+        and then evaluated directly against the columns, skipping the parsing pandas
+        does on every call; anything else is passed to `DataFrame.eval`.
+
+        Compiled comparisons behave like comparing the columns themselves, so unlike
+        `DataFrame.query` in pandas 3, a string compared with a datetime column is
+        parsed as a date (`d == '2024-01-02'` matches that day).
+
+        Args:
+            df (_DataFrame): The DataFrame to query
+            query (str): The pandas query
+
+        Returns:
+            _Series: A boolean mask of the matching rows
+        """
+        code: object = _compile_query(query)
+        if code is not None:
+            try:
+                result: object = eval(code, {"__builtins__": {}}, _QueryNamespace(df))
+            except Exception:
+                # e.g. a name which isn't a column; let pandas handle (or report) it
+                result = None
+            if isinstance(result, _Series) and result.index.equals(df.index):
+                if result.dtype != bool:
+                    result = result.fillna(False).astype(bool)
+                return result
+        return df.eval(query).astype(bool)
+
     def add(
         self, *args: dict[str, object] | list[dict[str, object]], **kwargs: str
     ) -> _DataFrame:
         """
-        Add a row to the table
+        Add a row to the table. New rows are buffered and appended to the table in a
+        single concatenation the next time `data` is accessed, so adding many rows in
+        a loop is linear rather than quadratic. A lazily loaded table is loaded first,
+        so that the new rows are numbered after its existing rows.
 
         Args:
             *args: A list of dictionaries
@@ -533,38 +2156,78 @@ class TableFile:
         Returns:
             _DataFrame: The new row(s)
         """
-        df: _DataFrame = self._to_df(*args, **kwargs)
-        self.data = _pd.concat([self.data, df], ignore_index=True)
-        return self.data[-len(df) :]
+        records: list[dict[str, object]]
+        if len(args) == 1 and isinstance(args[0], dict):
+            records = [args[0]]
+        elif len(args) == 1 and isinstance(args[0], list):
+            records = args[0]
+        else:
+            records = [kwargs]
+        if self._data is None:
+            self._load_deferred()
+        # Number the new rows as they will be numbered once flushed
+        start: int = self._next_label() + len(self._pending)
+        self._pending.extend(records)
+        new_df: _DataFrame = _pd.DataFrame(
+            records, index=_pd.RangeIndex(start, start + len(records))
+        )
+        if self._index_kinds:
+            self._index_rows(new_df)
+        return new_df
 
-    def pop(self, where: str | int | list[str | int]) -> _DataFrame:
+    def _next_label(self) -> int:
         """
-        Remove rows from the table and return them.
+        Returns:
+            int: The index label to give the next row added to the table, so that
+                existing rows keep their labels
+        """
+        if len(self._data) and _pd.api.types.is_integer_dtype(self._data.index):
+            return int(self._data.index.max()) + 1
+        return len(self._data)
+
+    def _where_mask(self, where: str | int | list[str | int]) -> _Series | _pd.Index:
+        """
+        Build a boolean mask of the rows matching any of the given queries or row
+        indices. Equality queries on indexed columns are answered from the index,
+        in which case the labels of the matching rows are returned instead.
 
         Args:
             where (str | int | list[str | int]): One or more pandas queries or row
                 indices to match
 
         Returns:
-            _DataFrame: The removed rows
+            _Series | _pd.Index: A boolean mask aligned with `self.data`, or the
+                labels of the matching rows; either can be passed to `self.data.loc`
         """
         if isinstance(where, (str, int)):
             where = [where]
+        if self._index_kinds:
+            positions: _ndarray = self._index_positions(where)
+            if positions is not None:
+                return self.data.index[positions]
+        return self._query_mask(self.data, where)
+
+    def pop(self, where: str | int | list[str | int]) -> _DataFrame:
+        """
+        Remove rows from the table and return them.
 
-        # Create an empty dataframe to hold the removed rows
-        match_df: _DataFrame = _pd.DataFrame(columns=self.data.columns)
+        Args:
+            where (str | int | list[str | int]): One or more pandas queries or row
+                indices to match
 
-        # Iterate over the list of queries
-        for w in where:
-            if isinstance(w, int):
-                # If the query is an integer, use it as a row index
-                match_df = _pd.concat([match_df, self.data.iloc[w].to_frame().T])
-            else:
-                # Otherwise, use it as a pandas query
-                match_df = _pd.concat([match_df, self.data.query(w)])
+        Returns:
+            _DataFrame: The removed rows
+        """
+        rows: _Series | _pd.Index = self._where_mask(where)
 
-        # Remove the matched rows from the table
-        self.data = self.data.drop(match_df.index)
+        # Split the table into the matched and remaining rows
+        match_df: _DataFrame = self.data.loc[rows]
+        if isinstance(rows, _pd.Index):
+            self._data = self._data.drop(rows)
+        else:
+            self._data = self._data[~rows]
+        if self._index_kinds:
+            self._index_rows(match_df, remove=True)
 
         # Return the matched rows
         return match_df
@@ -611,36 +2274,511 @@ class TableFile:
             raise ValueError("No update methods specified")
 
         # Find all rows where "where" is true
-        if isinstance(where, (str, int)):
-            where = [where]
+        rows: _Series | _pd.Index = self._where_mask(where)
+        if not (rows.any() if isinstance(rows, _Series) else len(rows)):
+            return self.data.loc[rows]
+
+        # Take the indexed rows out of the indexes while they still hold the old values
+        indexed: list[str] = [
+            c for c in self._index_kinds if func is not None or c in kwargs
+        ]
+        if indexed:
+            self._index_rows(self.data.loc[rows, indexed], remove=True)
+
+        if func is not None:
+            # Update the rows with the function, broadcasting scalar results across
+            # the row
+            self.data.loc[rows] = (
+                self.data.loc[rows]
+                .apply(func, axis=1, result_type="broadcast")
+                .infer_objects()
+            )
+        else:
+            # Update each column for all matched rows at once
+            for key, value in kwargs.items():
+                self.data.loc[rows, key] = value
 
-        original_df: _DataFrame = self.data
-        match_df: _DataFrame = _pd.DataFrame()
+        if indexed:
+            self._index_rows(self.data.loc[rows, indexed])
 
-        for loc in where:
-            if isinstance(loc, int):
-                # If the location is an integer, use it as a row index
-                match_df = _pd.concat([match_df, self.data.iloc[loc].to_frame().T])
-            else:
-                # Otherwise, use it as a query
-                match_df = _pd.concat([match_df, original_df.query(loc)])
-            original_df = original_df.drop(match_df.index)
-
-        # Get the index of the matched row
-        match_indices: _ndarray = match_df.index.values
-
-        # Loop through each matched row
-        for match_index in match_indices:
-            if func is not None:
-                # Update the row with the function
-                self.data.iloc[match_index] = func(self.data.iloc[match_index])
+        # Return the updated rows
+        return self.data.loc[rows]
+
+    def add_index(self, column: str, kind: str = "hash") -> None:
+        """
+        Index a column so that lookups on it don't need to scan the table. The index
+        is built the first time it is used and is kept up to date by `add`, `update`,
+        `pop`, and `remove`; replacing `data` rebuilds it.
+
+        Args:
+            column (str): The column to index
+            kind (str, optional): "hash" for equality lookups, or "sorted" for
+                equality and range lookups. Defaults to "hash".
+
+        Examples:
+            >>> table.add_index("job_code")
+            >>> table.add_index("duration", "sorted")
+            >>> table.get(equals={"job_code": 1234}, between={"duration": (60, 120)})
+        """
+        if kind not in ["hash", "sorted"]:
+            raise ValueError(f"Unknown index kind '{kind}'")
+        self._index_kinds[column] = kind
+        self._invalidate_indexes([column])
+
+    def drop_index(self, column: str) -> None:
+        """
+        Remove the index on a column
+
+        Args:
+            column (str): The indexed column
+        """
+        self._index_kinds.pop(column, None)
+        self._invalidate_indexes([column])
+
+    def _invalidate_indexes(self, columns: _Iterable[str] = None) -> None:
+        """
+        Discard the built indexes for the given columns so that they are rebuilt when
+        next used.
+
+        Args:
+            columns (_Iterable[str], optional): The columns which changed. Defaults to
+                None (all columns).
+        """
+        if columns is None:
+            self._hash_indexes.clear()
+            self._sorted_indexes.clear()
+            return
+        for column in columns:
+            self._hash_indexes.pop(column, None)
+            self._sorted_indexes.pop(column, None)
+
+    @staticmethod
+    def _index_key(value: object) -> object:
+        """
+        Returns:
+            object: The key to store a value under in a hash index, with all of the
+                various null values stored under None
+        """
+        try:
+            if _pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        return value
+
+    def _hash_index(self, column: str) -> dict[object, set]:
+        """
+        Returns:
+            dict[object, set]: The hash index for a column, building it if needed
+        """
+        index: dict[object, set] = self._hash_indexes.get(column)
+        if index is None:
+            index = {}
+            for label, value in zip(self.data.index, self.data[column].tolist()):
+                index.setdefault(self._index_key(value), set()).add(label)
+            self._hash_indexes[column] = index
+        return index
+
+    def _sorted_index(self, column: str) -> _Series:
+        """
+        Returns:
+            _Series: The sorted index for a column, building it if needed
+        """
+        index: _Series = self._sorted_indexes.get(column)
+        if index is None:
+            index = self.data[column].dropna().sort_values(kind="stable")
+            self._sorted_indexes[column] = index
+        return index
+
+    def _index_rows(self, df: _DataFrame, remove: bool = False) -> None:
+        """
+        Add rows to, or remove them from, the built indexes. Hash indexes are updated
+        in place unless the change touches a large part of the table, in which case
+        it's cheaper to rebuild them; sorted indexes are always rebuilt.
+
+        Args:
+            df (_DataFrame): The rows, labelled as they are in the table
+            remove (bool, optional): Remove the rows instead of adding them. Defaults
+                to False.
+        """
+        if self._data is None:
+            # The indexes are built when the table is loaded
+            return
+        columns: list[str] = [c for c in self._index_kinds if c in df.columns]
+        if len(df) * 4 > len(self._data):
+            self._invalidate_indexes(columns)
+            return
+        for column in columns:
+            self._sorted_indexes.pop(column, None)
+            index: dict[object, set] = self._hash_indexes.get(column)
+            if index is None:
+                continue
+            for label, value in zip(df.index, df[column].tolist()):
+                key: object = self._index_key(value)
+                if not remove:
+                    index.setdefault(key, set()).add(label)
+                elif key in index:
+                    index[key].discard(label)
+                    if not index[key]:
+                        del index[key]
+
+    def _index_values(
+        self, column: str, values: list, parse: bool = True
+    ) -> list | None:
+        """
+        Convert values to look up in a column's index to the column's type, the way
+        pandas converts them when comparing them to the column.
+
+        Args:
+            column (str): The indexed column
+            values (list): The values to look up. None is left as is.
+            parse (bool, optional): Parse strings as dates and times for datetime
+                columns, as `==` does. `isin` doesn't, so this is False for lists of
+                values. Defaults to True.
+
+        Returns:
+            list | None: The converted values, or None if the index can't match them
+                the way a scan would (e.g. a string looked up in a numeric column)
+        """
+        dtype: _dtype = self.data[column].dtype
+        present: list = [v for v in values if v is not None]
+        if _pd.api.types.is_datetime64_any_dtype(
+            dtype
+        ) or _pd.api.types.is_timedelta64_dtype(dtype):
+            if not parse and any(isinstance(v, str) for v in present):
+                return None
+            try:
+                converted: list = (
+                    _pd.Series(present, dtype=object).astype(dtype).tolist()
+                )
+            except (TypeError, ValueError):
+                return None
+            lookup: dict = dict(zip(map(id, present), converted))
+            return [None if v is None else lookup[id(v)] for v in values]
+        if _pd.api.types.is_numeric_dtype(dtype):
+            # pandas never matches a number to a string
+            if all(_pd.api.types.is_number(v) for v in present):
+                return values
+            return None
+        if _pd.api.types.is_object_dtype(dtype) or _pd.api.types.is_string_dtype(dtype):
+            return values
+        return None
+
+    def _lookup(
+        self,
+        equals: dict[str, object] = {},
+        between: dict[str, tuple[object, object]] = {},
+    ) -> _ndarray:
+        """
+        Find the rows whose columns equal the given values and fall within the given
+        ranges, using the columns' indexes where they have them.
+
+        Args:
+            equals (dict[str, object], optional): Columns and the value they must
+                equal. A list or tuple of values matches any of them. As in a query,
+                null values never match.
+            between (dict[str, tuple[object, object]], optional): Columns and the
+                inclusive (low, high) range they must fall within. Either bound may be
+                None.
+
+        Returns:
+            _ndarray: The sorted positions of the matching rows
+        """
+        df: _DataFrame = self.data
+        use_index: bool = df.index.is_unique
+        positions: _ndarray = None
+        for column, value in list(equals.items()) + list(between.items()):
+            kind: str = self._index_kinds.get(column) if use_index else None
+            matches: _ndarray
+            if column in between:
+                low, high = value
+                if kind == "sorted":
+                    bounds: list = self._index_values(column, [low, high])
+                    if bounds is None:
+                        kind = None
+                    else:
+                        low, high = bounds
+                if kind == "sorted":
+                    sorted_index: _Series = self._sorted_index(column)
+                    start: int = (
+                        0 if low is None else sorted_index.searchsorted(low, "left")
+                    )
+                    end: int = (
+                        len(sorted_index)
+                        if high is None
+                        else sorted_index.searchsorted(high, "right")
+                    )
+                    matches = df.index.get_indexer(sorted_index.index[start:end])
+                else:
+                    mask: _Series = _pd.Series(True, index=df.index)
+                    if low is not None:
+                        mask &= df[column] >= low
+                    if high is not None:
+                        mask &= df[column] <= high
+                    matches = _flatnonzero(mask.to_numpy())
+                matches.sort()
+                positions = (
+                    matches if positions is None else _intersect1d(positions, matches)
+                )
+                continue
+
+            requested: list = value if isinstance(value, (list, tuple)) else [value]
+            # Nulls never equal anything in a query, but the hash index files them
+            # under None and isin matches them, so drop them
+            requested = [v for v in requested if self._index_key(v) is not None]
+            values: list | None = requested
+            if kind is not None:
+                # Convert the values as a scan would compare them, or scan if the
+                # index can't match them the same way
+                values = self._index_values(
+                    column, requested, parse=not isinstance(value, (list, tuple))
+                )
+                if values is None:
+                    kind = None
+                    values = requested
+            if kind == "hash":
+                hash_index: dict[object, set] = self._hash_index(column)
+                labels: set = set()
+                for v in values:
+                    labels.update(hash_index.get(self._index_key(v), ()))
+                matches = df.index.get_indexer(list(labels))
+            elif kind == "sorted":
+                sorted_index = self._sorted_index(column)
+                sorted_labels: list = []
+                for v in values:
+                    start = sorted_index.searchsorted(v, "left")
+                    end = sorted_index.searchsorted(v, "right")
+                    sorted_labels.extend(sorted_index.index[start:end])
+                matches = _unique(df.index.get_indexer(sorted_labels))
+            elif isinstance(value, (list, tuple)) or not values:
+                matches = _flatnonzero(df[column].isin(values).to_numpy())
             else:
-                # Loop over each key/value pair and update the row
-                for key, value in kwargs.items():
-                    self.data.at[match_index, key] = value
+                # Compare single values as a query would, e.g. parsing date strings
+                matches = _flatnonzero((df[column] == value).to_numpy())
+            matches.sort()
+            positions = (
+                matches if positions is None else _intersect1d(positions, matches)
+            )
+        return positions
 
-        # Return the updated rows
-        return self.data.iloc[match_indices]
+    def _index_positions(self, where: list[str | int]) -> _ndarray:
+        """
+        Answer queries of the form `column == value` or `column in [values]` from the
+        column's index, without scanning the table.
+
+        Args:
+            where (list[str | int]): The pandas queries or row positions to match
+
+        Returns:
+            _ndarray: The sorted positions of the matching rows, or None if any of
+                the queries can't be answered from an index
+        """
+        if not where or not self.data.index.is_unique:
+            return None
+        positions: list[_ndarray] = []
+        for query in where:
+            if isinstance(query, int):
+                positions.append(_unique([range(len(self.data))[query]]))
+                continue
+            equality: tuple[str, object] = _equality_query(query)
+            if equality is None or equality[0] not in self._index_kinds:
+                return None
+            positions.append(self._lookup(equals={equality[0]: equality[1]}))
+        if len(positions) == 1:
+            return positions[0]
+        return _unique(_concatenate(positions))
+
+    def create_index(self, *columns: str) -> None:
+        """
+        Create a sqlite index on each of the given columns to speed up queries which
+        are pushed down to the database.
+
+        Args:
+            *columns (str): The columns to index
+        """
+        if self.format != TabularFormat.SQLITE:
+            raise ValueError(f"Cannot create an index for format '{self.format}'")
+        with _contextlib.closing(_sqlite3.connect(self.infile)) as conn, conn:
+            for column in columns:
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "ix_{self.name}_{column}"'
+                    f' ON "{self.name}" ("{column}")'
+                )
+
+    @staticmethod
+    def _query_to_sql(query: str) -> str:
+        """
+        Translate a simple pandas query (comparisons of columns against literals and
+        each other combined with `and`/`or`/`not`/`&`/`|`/`~`) into a sqlite WHERE
+        clause which matches the same rows. pandas treats a comparison with a null as
+        False, except `!=` and `not in`, which are True, whereas sqlite treats it as
+        NULL, so those operators and negations are made NULL-aware.
+
+        Args:
+            query (str): The pandas query
+
+        Raises:
+            ValueError: If the query can't be translated, e.g. because it references
+                local variables with `@` or does arithmetic
+
+        Returns:
+            str: The equivalent sqlite expression
+        """
+        comparisons: dict[type, str] = {
+            _ast.Eq: "=",
+            _ast.NotEq: "!=",
+            _ast.Lt: "<",
+            _ast.LtE: "<=",
+            _ast.Gt: ">",
+            _ast.GtE: ">=",
+        }
+        # Backtick quoted names aren't valid Python, so stand in names for them
+        names: dict[str, str] = {}
+
+        def _name(match: _re.Match) -> str:
+            if match.group(1) is not None:
+                return match.group()
+            alias: str = f"__backtick_{len(names)}__"
+            names[alias] = match.group(2)
+            return alias
+
+        def _operand(node: _ast.AST) -> str:
+            if isinstance(node, _ast.Name):
+                name: str = names.get(node.id, node.id)
+                return '"' + name.replace('"', '""') + '"'
+            if isinstance(node, (_ast.List, _ast.Tuple)):
+                return "(" + ", ".join(map(_operand, node.elts)) + ")"
+            value: object = _ast.literal_eval(node)
+            if value is None:
+                return "NULL"
+            if isinstance(value, bool):
+                return str(int(value))
+            if isinstance(value, (int, float)):
+                return repr(value)
+            if isinstance(value, str):
+                return "'" + value.replace("'", "''") + "'"
+            raise ValueError(f"Cannot translate {value!r} to sql")
+
+        def _compare(left: _ast.AST, op: _ast.cmpop, right: _ast.AST) -> str:
+            is_list: bool = isinstance(right, (_ast.List, _ast.Tuple))
+            left_sql: str = _operand(left)
+            right_sql: str = _operand(right)
+            if isinstance(op, _ast.In) or (isinstance(op, _ast.Eq) and is_list):
+                return f"{left_sql} IN {right_sql}"
+            if isinstance(op, _ast.NotIn) or (isinstance(op, _ast.NotEq) and is_list):
+                return f"({left_sql} NOT IN {right_sql} OR {left_sql} IS NULL)"
+            if type(op) not in comparisons or is_list:
+                raise ValueError(f"Cannot translate '{_ast.dump(op)}' to sql")
+            if "NULL" in (left_sql, right_sql):
+                # Nothing equals None to pandas
+                return "1" if isinstance(op, _ast.NotEq) else "0"
+            if isinstance(op, _ast.NotEq):
+                nulls: list[str] = [
+                    f" OR {sql} IS NULL"
+                    for node, sql in ((left, left_sql), (right, right_sql))
+                    if isinstance(node, _ast.Name)
+                ]
+                return f"({left_sql} != {right_sql}{''.join(nulls)})"
+            return f"{left_sql} {comparisons[type(op)]} {right_sql}"
+
+        def _convert(node: _ast.AST) -> str:
+            if isinstance(node, _ast.BoolOp):
+                joiner: str = " AND " if isinstance(node.op, _ast.And) else " OR "
+                return "(" + joiner.join(map(_convert, node.values)) + ")"
+            if isinstance(node, _ast.UnaryOp) and isinstance(
+                node.op, (_ast.Not, _ast.Invert)
+            ):
+                # A NULL (False to pandas) must become True when negated
+                return f"NOT COALESCE({_convert(node.operand)}, 0)"
+            if isinstance(node, _ast.Compare):
+                operands: list[_ast.AST] = [node.left, *node.comparators]
+                parts: list[str] = [
+                    _compare(operands[i], op, operands[i + 1])
+                    for i, op in enumerate(node.ops)
+                ]
+                return parts[0] if len(parts) == 1 else "(" + " AND ".join(parts) + ")"
+            if isinstance(node, _ast.Name) or (
+                isinstance(node, _ast.Constant) and isinstance(node.value, bool)
+            ):
+                return _operand(node)
+            raise ValueError(f"Cannot translate '{_ast.dump(node)}' to sql")
+
+        if "@" in _QUERY_STRING_PATTERN.sub("", query):
+            raise ValueError("Cannot translate local variables to sql")
+        code: str = _re.sub(
+            rf"({_QUERY_STRING_PATTERN.pattern})|`([^`]*)`", _name, query
+        )
+        try:
+            tree: _ast.Expression = _ast.parse(
+                _boolean_precedence(code).strip(), mode="eval"
+            )
+        except SyntaxError as e:
+            raise ValueError(f"Cannot translate '{query}' to sql") from e
+        return _convert(tree.body)
+
+    def _query_sql(self, where: str) -> _DataFrame:
+        """
+        Run a pandas query directly against the sqlite table without loading it.
+        Columns which are repeatedly queried are automatically indexed.
+
+        Args:
+            where (str): The pandas query to match
+
+        Returns:
+            _DataFrame: The matching rows, or None if the query could not be run in
+                sqlite
+        """
+        try:
+            sql_where: str = self._query_to_sql(where)
+        except ValueError:
+            return None
+
+        with _contextlib.closing(_sqlite3.connect(self.infile)) as conn:
+            try:
+                df: _DataFrame = _pd.read_sql(
+                    f'SELECT * FROM "{self.name}" WHERE {sql_where}', conn
+                )
+            except (_pd.errors.DatabaseError, _sqlite3.Error):
+                return None
+            declared: dict[str, str] = {
+                row[1]: row[2].upper()
+                for row in conn.execute(f'PRAGMA table_info("{self.name}")')
+            }
+        table_columns: list[str] = list(declared)
+
+        # read_sql infers each column's type from the matching rows alone, so NULLs
+        # come back as None rather than the NaN reading the whole table gives
+        for column in df.columns[df.dtypes == object]:
+            numeric: bool = any(
+                t in declared.get(column, "") for t in ("INT", "REAL", "FLOA")
+            )
+            if numeric:
+                try:
+                    df[column] = df[column].astype("float64")
+                    continue
+                except (ValueError, TypeError):
+                    # e.g. text stored in a numeric column
+                    pass
+            df[column] = df[column].where(df[column].notna(), _nan).infer_objects()
+
+        # Index the columns which keep showing up in queries
+        to_index: list[str] = []
+        for column in table_columns:
+            if _re.search(rf"(?<![\w`]){_re.escape(column)}(?![\w`])", sql_where):
+                self._query_counts[column] = self._query_counts.get(column, 0) + 1
+                if self._query_counts[column] == _SQL_AUTO_INDEX_AFTER:
+                    to_index.append(column)
+        if to_index:
+            self.create_index(*to_index)
+
+        if self._detect_types:
+            # Use the types detected from the whole table if it has been loaded before,
+            # since the matching rows alone may look like a different type
+            types: dict[str, type] = self._cache.get_types(self._schema_cache_key())
+            if types is None:
+                types = self._detect_column_types(df, self._sample_size)
+            self._apply_column_types(df, types, strict=False)
+        return self._set_unnamed_index(df, TabularFormat.SQLITE)
 
     def get(
         self,
@@ -649,6 +2787,8 @@ class TableFile:
         where: str = None,
         as_type: type | str | _dtype = None,
         default: object = None,
+        equals: dict[str, object] = None,
+        between: dict[str, tuple[object, object]] = None,
     ) -> _Series | _DataFrame | object:
         """
         Get a Series, DataFrame, or value from the table
@@ -657,17 +2797,51 @@ class TableFile:
             column (str | int | list[str | int], optional): The column(s) to get
             row (int, optional): The row to get
             where (str, optional): The pandas query to match rows to get
+            equals (dict[str, object], optional): Columns and the value they must
+                equal (or a list of values, any of which they may equal). Indexed
+                columns are looked up without scanning the table.
+            between (dict[str, tuple[object, object]], optional): Columns and the
+                inclusive (low, high) range they must fall within. Columns with a
+                sorted index are looked up without scanning the table.
 
         Returns:
             object: The value of the cell
         """
-        match_df: _DataFrame = self.data
+        match_df: _DataFrame = None
+        if equals or between:
+            # Look up the matching rows, using the columns' indexes where possible
+            match_df = self.data.iloc[self._lookup(equals or {}, between or {})]
+        elif row is None and self._data is None:
+            # The table hasn't been loaded, so only read what's needed from the file
+            if self.format in _ARROW_FORMATS and (where or column is not None):
+                match_df = self._query_arrow(
+                    [column] if isinstance(column, (str, int)) else column, where
+                )
+            elif where is not None:
+                match_df = self._query_sql(where)
+        if match_df is None:
+            match_df = self.data
+        elif not (equals or between):
+            where = None
 
         # If a row is specified, get the row
         if row is not None:
             if isinstance(row, int):
                 row = [row]
-            match_df = match_df.iloc[row]
+            if equals or between:
+                match_df = match_df[match_df.index.isin(self.data.index[row])]
+            else:
+                match_df = match_df.iloc[row]
+
+        # If a query is specified, limit the rows to those that match
+        if where is not None:
+            if match_df is self._data and self._index_kinds:
+                positions: _ndarray = self._index_positions([where])
+                if positions is not None:
+                    match_df = match_df.iloc[positions]
+                    where = None
+            if where is not None:
+                match_df = match_df[self._eval_query(match_df, where)]
 
         # If a column is specified, limit the columns
         if column is not None:
@@ -679,10 +2853,6 @@ class TableFile:
                     column[i] = match_df.columns[i]
             match_df = match_df[column]
 
-        # If a query is specified, limit the rows to those that match
-        if where is not None:
-            match_df = match_df.query(where)
-
         # If the result is empty and a default value is specified, return the default
         if match_df.size == 0 and default is not None:
             return default
@@ -727,12 +2897,157 @@ class TableFile:
                 raise ValueError(
                     f"Cannot convert '{cell_value}' to {as_type}"
                 ) from None
-        else:
+        elif as_type not in [None, _DataFrame]:
             response = response.astype(as_type)
 
         return response
 
 
+def _load_table(path: _Path, options: dict[str, object]) -> tuple[_DataFrame, float]:
+    """
+    Load a single file in a worker process for `load_many`.
+
+    Args:
+        path (_Path): The file to load
+        options (dict[str, object]): Keyword arguments to pass to TableFile
+
+    Returns:
+        tuple[_DataFrame, float]: The file's data and the seconds it took to load
+    """
+    start: float = _time.perf_counter()
+    data: _DataFrame = TableFile(path, **options).data
+    return data, _time.perf_counter() - start
+
+
+def expand_paths(patterns: _Iterable[str | _Path]) -> list[_Path]:
+    """
+    Expand glob patterns into a sorted list of files, keeping the order in which the
+    patterns were given and dropping duplicates.
+
+    Args:
+        patterns (_Iterable[str | _Path]): Glob patterns and/or file paths
+
+    Returns:
+        list[_Path]: The matching files
+    """
+    paths: dict[_Path, None] = {}
+    for pattern in patterns:
+        for match in sorted(_glob.glob(str(pattern), recursive=True)):
+            if _os.path.isfile(match):
+                paths[_Path(match)] = None
+    return list(paths)
+
+
+def load_many(
+    paths: _Iterable[str | _Path], jobs: int = None, **options: object
+) -> _Iterator[tuple[_Path, _DataFrame, float]]:
+    """
+    Load many files in parallel, with one TableFile per file spread across a pool of
+    processes. Results are yielded in the order the paths were given, and only a few
+    files per worker are loaded ahead of the consumer so that memory stays bounded.
+
+    Args:
+        paths (_Iterable[str | _Path]): The files to load
+        jobs (int, optional): The number of worker processes. Defaults to None (the
+            number of CPUs).
+        **options: Keyword arguments to pass to each TableFile, e.g. `name`,
+            `format`, or `detect_types`
+
+    Yields:
+        tuple[_Path, _DataFrame, float]: Each file, its data, and the seconds it took
+            to load
+    """
+    jobs = jobs or _os.cpu_count() or 1
+    pending: _deque[tuple[_Path, _Future]] = _deque()
+    with _ProcessPoolExecutor(jobs) as executor:
+        for path in paths:
+            path = _Path(path)
+            pending.append((path, executor.submit(_load_table, path, options)))
+            if len(pending) >= jobs * 2:
+                path, future = pending.popleft()
+                yield (path, *future.result())
+        while pending:
+            path, future = pending.popleft()
+            yield (path, *future.result())
+
+
+def convert_many(
+    paths: _Iterable[str | _Path],
+    filepath: str | _Path,
+    format: str | TabularFormat = None,
+    name: str = None,
+    jobs: int = None,
+    overwrite: bool = False,
+    report: _Callable[[_Path, int, float], None] = None,
+    **options: object,
+) -> int:
+    """
+    Load many files in parallel (see `load_many`) and merge them into a single
+    output table, writing each file as soon as it is loaded. Every file must have
+    the same columns as the first; columns a file is missing are left empty.
+
+    Args:
+        paths (_Iterable[str | _Path]): The files to merge
+        filepath (str | _Path): The path to the merged file
+        format (str | TabularFormat, optional): The format to write. Defaults to the
+            format implied by the filepath's suffix.
+        name (str, optional): The name of the table to read from sqlite inputs and to
+            write to a sqlite output. Defaults to None.
+        jobs (int, optional): The number of worker processes. Defaults to None (the
+            number of CPUs).
+        overwrite (bool, optional): Replace an existing sqlite table. Defaults to
+            False.
+        report (_Callable[[_Path, int, float], None], optional): Called with each
+            file, its number of rows, and the seconds it took to load once it has
+            been written. Defaults to None.
+        **options: Keyword arguments to pass to each input's TableFile
+
+    Raises:
+        ValueError: If a file has columns which the first file does not
+
+    Returns:
+        int: The number of rows written
+    """
+    filepath = _Path(filepath)
+    if format is None:
+        format = TableFile._detect_format(filepath)
+    output: TableFile = TableFile(format=format, name=name, detect_types=False)
+    if name is None and output.format == TabularFormat.SQLITE:
+        name = filepath.stem
+
+    def _chunks() -> _Iterator[_DataFrame]:
+        columns: _pd.Index = None
+        first: _Path = None
+        offset: int = 0
+        for path, data, seconds in load_many(paths, jobs, name=name, **options):
+            if columns is None:
+                columns, first = data.columns, path
+            elif not data.columns.isin(columns).all():
+                extra: list[str] = list(data.columns.difference(columns))
+                raise ValueError(f"'{path}' has columns not in '{first}': {extra}")
+            # Number the rows across all of the files
+            data = data.reindex(columns=columns)
+            data.index = _pd.RangeIndex(offset, offset + len(data))
+            offset += len(data)
+            yield data
+            if report is not None:
+                report(path, len(data), seconds)
+
+    chunks: _Iterable[_DataFrame] = _chunks()
+    streamable: bool = output.format in [
+        TabularFormat.CSV,
+        TabularFormat.TSV,
+        TabularFormat.SQLITE,
+        *_ARROW_FORMATS,
+    ] or (
+        output.format == TabularFormat.JSON and filepath.suffix in _JSON_LINES_SUFFIXES
+    )
+    if not streamable:
+        # The format can't be appended to, so it has to be written in one go
+        chunks = [_pd.concat(list(chunks))]
+    return output.write_chunks(chunks, filepath, output.format, name, overwrite)
+
+
 def run(**kwargs: object) -> None:
     """
     Run the main function
@@ -766,7 +3081,11 @@ def run(**kwargs: object) -> None:
     parser: ArgumentParser = ArgumentParser(description="Tabular data management")
     action_group: ArgumentGroup = parser.add_argument_group("action")
     # Treat the first positional argument as the file path
-    parser.add_argument("path", type=_Path, help="Path to the timesheet file")
+    parser.add_argument(
+        "path",
+        type=_Path,
+        help="Path to the timesheet file, or the merged output file with --glob",
+    )
     parser.add_argument("-F", "--format", type=str, help="Format of the file")
     action_group.add_argument(
         "-U",
@@ -854,6 +3173,22 @@ def run(**kwargs: object) -> None:
         action="store_true",
         help="overwrite existing file or table",
     )
+    batch_group: ArgumentGroup = parser.add_argument_group("batch")
+    batch_group.add_argument(
+        "-g",
+        "--glob",
+        nargs="+",
+        action="extend",
+        default=[],
+        help="merge the files matching these patterns into the path",
+    )
+    batch_group.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes for --glob (default: number of CPUs)",
+    )
     parser.set_defaults(action="list")
     args = parser.parse_args()
 
@@ -862,6 +3197,33 @@ def run(**kwargs: object) -> None:
     if kwargs:
         args.__dict__.update(kwargs)
 
+    # Batch mode: load the matching files in parallel and merge them into the path
+    if args.glob:
+        paths: list[_Path] = expand_paths(args.glob)
+        if not paths:
+            print(f"error: No files match {args.glob}", file=sys.stderr)
+            sys.exit(1)
+
+        def _report(path: _Path, rows: int, seconds: float) -> None:
+            print(f"{seconds:8.3f}s  {rows:>10} rows  {path}", file=sys.stderr)
+
+        start: float = _time.perf_counter()
+        rows: int = convert_many(
+            paths,
+            args.path,
+            format=args.format,
+            name=args.name,
+            jobs=args.jobs,
+            overwrite=args.overwrite,
+            report=_report,
+        )
+        print(
+            f"{_time.perf_counter() - start:8.3f}s  {rows:>10} rows  {args.path}"
+            f" ({len(paths)} files)",
+            file=sys.stderr,
+        )
+        return
+
     tf = TableFile(args.path, name=args.name, format=args.format)
 
     # If the file is not readable, load it, but print a warning
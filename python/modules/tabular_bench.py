@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the `tabular` module.
+
+Each RSS measurement runs in a fresh subprocess so that the peak RSS reported by
+`resource.getrusage` belongs to that measurement alone.
+
+    $ python tabular_bench.py rss --rows 100000 1000000 4000000
+    $ python tabular_bench.py mutations --rows 10000 50000
+    $ python tabular_bench.py suite --rows 10000 100000 1000000 --output suite.json
+"""
+import gc as _gc
+import json as _json
+import platform as _platform
+import resource as _resource
+import subprocess as _subprocess
+import sys as _sys
+import tempfile as _tempfile
+import threading as _threading
+import time as _time
+import tracemalloc as _tracemalloc
+
+from pathlib import Path as _Path
+
+_sys.path.insert(0, str(_Path(__file__).resolve().parent))
+
+import tabular as _tabular  # noqa: E402
+
+# The formats covered by the suite, by the suffix used to save them
+SUITE_FORMATS: dict[str, str] = {
+    "csv": ".csv",
+    "tsv": ".tsv",
+    "json": ".jsonl",
+    "sqlite": ".db",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+
+def generate_frame(rows: int, start: int = 0, rng: object = None) -> object:
+    """
+    Build a synthetic timesheet DataFrame.
+
+    Args:
+        rows (int): The number of rows to generate
+        start (int, optional): The number of the first task. Defaults to 0.
+        rng (np.random.Generator, optional): The random number generator to use.
+            Defaults to a generator seeded with 0.
+
+    Returns:
+        pd.DataFrame: The generated rows
+    """
+    import numpy as np
+    import pandas as pd
+
+    if rng is None:
+        rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "name": [f"task {i}" for i in range(start, start + rows)],
+            "description": rng.choice(["meeting", "review", "dev", "ops"], rows),
+            "job_code": rng.integers(1000, 9999, rows),
+            "start_time": "2023-01-02 09:00:00",
+            "end_time": "2023-01-02 10:30:00",
+            "duration": rng.integers(1, 480, rows),
+        }
+    )
+
+
+def generate_csv(path: _Path, rows: int, chunksize: int = 100_000) -> _Path:
+    """
+    Write a synthetic timesheet CSV with the given number of rows without holding it
+    in memory.
+
+    Args:
+        path (_Path): Where to write the file
+        rows (int): The number of rows to generate
+        chunksize (int, optional): The number of rows to generate at a time
+
+    Returns:
+        _Path: The path to the generated file
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    for start in range(0, rows, chunksize):
+        df = generate_frame(min(chunksize, rows - start), start, rng)
+        df.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    return path
+
+
+def _peak_rss_kib() -> int:
+    """
+    Returns:
+        int: The peak resident set size of the current process in KiB
+    """
+    return _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(mode: str, path: str, chunksize: int) -> dict:
+    """
+    Run a single measurement in the current process.
+
+    Args:
+        mode (str): "load" to read the whole file, "chunks" to stream it
+        path (str): The path to the CSV file
+        chunksize (int): The chunk size to use when streaming
+
+    Returns:
+        dict: The number of matched rows and the peak RSS
+    """
+    baseline: int = _peak_rss_kib()
+    matched: int = 0
+    if mode == "load":
+        tf = _tabular.TableFile(path, detect_types=False)
+        matched = len(tf.data.query("duration > 240"))
+    else:
+        tf = _tabular.TableFile(detect_types=False, format="csv")
+        for chunk in tf.iter_chunks(chunksize, filepath=path, where="duration > 240"):
+            matched += len(chunk)
+    return {"matched": matched, "baseline_kib": baseline, "peak_kib": _peak_rss_kib()}
+
+
+def bench_rss(rows: list[int], chunksize: int = _tabular.DEFAULT_CHUNKSIZE) -> list:
+    """
+    Compare the peak RSS of loading a CSV whole against streaming it in chunks for a
+    range of file sizes. Streaming should stay flat as the file grows.
+
+    Args:
+        rows (list[int]): The file sizes (in rows) to test
+        chunksize (int, optional): The chunk size to use when streaming
+
+    Returns:
+        list[dict]: One result per (rows, mode) pair
+    """
+    results: list[dict] = []
+    with _tempfile.TemporaryDirectory() as tmpdir:
+        for n in rows:
+            path: _Path = generate_csv(_Path(tmpdir) / f"{n}.csv", n)
+            for mode in ["load", "chunks"]:
+                proc = _subprocess.run(
+                    [
+                        _sys.executable,
+                        __file__,
+                        "_measure",
+                        mode,
+                        str(path),
+                        str(chunksize),
+                    ],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                result: dict = _json.loads(proc.stdout)
+                result.update(rows=n, mode=mode, size_bytes=path.stat().st_size)
+                results.append(result)
+                print(
+                    f"{n:>10} rows  {mode:<6}  peak {result['peak_kib'] / 1024:8.1f} MiB",
+                    file=_sys.stderr,
+                )
+    return results
+
+
+def _legacy_add(tf: _tabular.TableFile, row: dict) -> None:
+    """
+    The original `TableFile.add`, which concatenated onto the table on every call.
+    """
+    import pandas as pd
+
+    tf.data = pd.concat([tf.data, tf._to_df(row)], ignore_index=True)
+
+
+def _legacy_update(tf: _tabular.TableFile, where: list[str], values: dict) -> None:
+    """
+    The original `TableFile.update`, which concatenated the matches for each query
+    and then updated them one cell at a time.
+    """
+    import pandas as pd
+
+    original_df = tf.data
+    match_df = pd.DataFrame()
+    for loc in where:
+        match_df = pd.concat([match_df, original_df.query(loc)])
+        original_df = original_df.drop(match_df.index, errors="ignore")
+    for match_index in match_df.index.values:
+        for key, value in values.items():
+            tf.data.at[match_index, key] = value
+
+
+def _legacy_pop(tf: _tabular.TableFile, where: list[str]) -> None:
+    """
+    The original `TableFile.pop`, which concatenated the matches for each query.
+    """
+    import pandas as pd
+
+    match_df = pd.DataFrame(columns=tf.data.columns)
+    for w in where:
+        match_df = pd.concat([match_df, tf.data.query(w)])
+    tf.data = tf.data.drop(match_df.index)
+
+
+def _timed(func: callable, *args: object) -> float:
+    """
+    Returns:
+        float: The wall time in seconds of a single call to `func(*args)`
+    """
+    start: float = _time.perf_counter()
+    func(*args)
+    return _time.perf_counter() - start
+
+
+def bench_mutations(rows: list[int]) -> list[dict]:
+    """
+    Compare the original row-at-a-time `add`/`update`/`pop` implementations against
+    the buffered and mask-based ones.
+
+    Args:
+        rows (list[int]): The numbers of rows to insert, and then match
+
+    Returns:
+        list[dict]: One result per (rows, operation) pair
+    """
+    results: list[dict] = []
+    where: list[str] = ["duration < 120", "duration > 360"]
+    for n in rows:
+        records: list[dict] = [
+            {"name": f"task {i}", "duration": i % 480} for i in range(n)
+        ]
+        legacy = _tabular.TableFile(detect_types=False, format="csv")
+        current = _tabular.TableFile(detect_types=False, format="csv")
+
+        def add_legacy() -> None:
+            for record in records:
+                _legacy_add(legacy, record)
+
+        def add_current() -> None:
+            for record in records:
+                current.add(record)
+            current.data
+
+        timings: dict[str, tuple[float, float]] = {
+            "add": (_timed(add_legacy), _timed(add_current)),
+            "update": (
+                _timed(_legacy_update, legacy, where, {"name": "updated"}),
+                _timed(current.update, where, {"name": "updated"}),
+            ),
+            "pop": (
+                _timed(_legacy_pop, legacy, where),
+                _timed(current.pop, where),
+            ),
+        }
+        for operation, (old, new) in timings.items():
+            results.append(
+                {"rows": n, "operation": operation, "legacy_s": old, "current_s": new}
+            )
+            print(
+                f"{n:>10} rows  {operation:<6}  legacy {old:8.3f}s"
+                f"  current {new:8.3f}s  ({old / new:6.1f}x)",
+                file=_sys.stderr,
+            )
+    return results
+
+
+def _rss_bytes() -> int:
+    """
+    Returns:
+        int: The current resident set size of this process in bytes, or 0 where
+            /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _resource.getpagesize()
+    except OSError:
+        return 0
+
+
+def _profile(setup: callable, operation: callable) -> dict[str, float]:
+    """
+    Measure the wall time and peak memory of an operation. The time and memory are
+    measured on separate runs, each with fresh state from `setup`, so that tracing
+    allocations doesn't inflate the wall time.
+
+    Two memory figures are reported: the peak bytes allocated through Python and
+    numpy (from tracemalloc), and the peak growth of the process' RSS (sampled every
+    millisecond), which also covers memory allocated by pyarrow and sqlite.
+
+    Args:
+        setup (callable): Returns the argument to pass to `operation`. Not measured.
+        operation (callable): The operation to measure
+
+    Returns:
+        dict[str, float]: The wall time in seconds, the peak bytes allocated, and the
+            peak RSS growth in bytes
+    """
+    state: object = setup()
+    _gc.collect()
+    start: float = _time.perf_counter()
+    operation(state)
+    seconds: float = _time.perf_counter() - start
+
+    state = setup()
+    _gc.collect()
+    baseline: int = _rss_bytes()
+    peak_rss: list[int] = [baseline]
+    done: _threading.Event = _threading.Event()
+
+    def sample() -> None:
+        while not done.wait(0.001):
+            peak_rss[0] = max(peak_rss[0], _rss_bytes())
+
+    sampler: _threading.Thread = _threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    _tracemalloc.start()
+    try:
+        operation(state)
+        peak: int = _tracemalloc.get_traced_memory()[1]
+    finally:
+        _tracemalloc.stop()
+        done.set()
+        sampler.join()
+    peak_rss[0] = max(peak_rss[0], _rss_bytes())
+    return {
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "peak_rss_growth_bytes": peak_rss[0] - baseline,
+    }
+
+
+def _table(data: object) -> _tabular.TableFile:
+    """
+    Returns:
+        _tabular.TableFile: An in-memory table holding a copy of `data`
+    """
+    tf = _tabular.TableFile(detect_types=False, format="csv")
+    tf.data = data.copy()
+    return tf
+
+
+def _environment() -> dict[str, str]:
+    """
+    Returns:
+        dict[str, str]: The versions the suite ran against, so that results from
+            different runs can be told apart
+    """
+    import numpy as np
+    import pandas as pd
+
+    environment: dict[str, str] = {
+        "python": _platform.python_version(),
+        "platform": _platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+    try:
+        import pyarrow
+
+        environment["pyarrow"] = pyarrow.__version__
+    except ImportError:
+        pass
+    try:
+        environment["commit"] = _subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=_Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, _subprocess.CalledProcessError):
+        pass
+    return environment
+
+
+def bench_suite(
+    rows: list[int],
+    formats: list[str] = list(SUITE_FORMATS),
+    adds: int = 10_000,
+) -> dict:
+    """
+    Time the TableFile hot paths against synthetic tables of each size: saving and
+    loading every format, type detection, adding rows one at a time, and updating and
+    popping rows matched by queries.
+
+    Args:
+        rows (list[int]): The table sizes (in rows) to test
+        formats (list[str], optional): The formats to save and load. Defaults to all
+            of SUITE_FORMATS.
+        adds (int, optional): The number of rows to add one at a time. Defaults to
+            10,000.
+
+    Returns:
+        dict: The environment and one result per (rows, operation, format)
+    """
+    results: list[dict] = []
+
+    def record(n: int, operation: str, format: str, measured: dict) -> None:
+        result: dict = {"rows": n, "operation": operation, "format": format}
+        result.update(measured)
+        results.append(result)
+        print(
+            f"{n:>10} rows  {operation:<16} {format or '':<8}"
+            f"  {measured['seconds']:8.3f}s"
+            f"  peak {measured['peak_bytes'] / 2**20:8.1f} MiB"
+            f"  rss +{measured['peak_rss_growth_bytes'] / 2**20:8.1f} MiB",
+            file=_sys.stderr,
+        )
+
+    with _tempfile.TemporaryDirectory() as tmpdir:
+        for n in rows:
+            data = generate_frame(n)
+            for format in formats:
+                path: _Path = _Path(tmpdir) / f"{n}{SUITE_FORMATS[format]}"
+
+                def save(tf: _tabular.TableFile) -> None:
+                    tf.save(path, format, name="bench", overwrite=True)
+
+                def load(path: _Path) -> None:
+                    _tabular.TableFile(path, name="bench", detect_types=False).data
+
+                try:
+                    record(n, "save", format, _profile(lambda: _table(data), save))
+                    record(n, "load", format, _profile(lambda: path, load))
+                except ImportError as e:
+                    print(f"skipping {format}: {e}", file=_sys.stderr)
+
+            # Type detection starts from the strings read out of a CSV file
+            csv_path: _Path = _Path(tmpdir) / f"{n}.types.csv"
+            data.to_csv(csv_path, index=False)
+            record(
+                n,
+                "set_column_types",
+                None,
+                _profile(
+                    lambda: _tabular.TableFile(csv_path, detect_types=False),
+                    lambda tf: tf.set_column_types(),
+                ),
+            )
+
+            new_rows: list[dict] = generate_frame(adds, n).to_dict("records")
+
+            def add(tf: _tabular.TableFile) -> None:
+                for record_ in new_rows:
+                    tf.add(record_)
+                tf.data
+
+            record(n, "add", None, _profile(lambda: _table(data), add))
+            where: list[str] = [
+                "duration < 60",
+                "description == 'ops' and job_code > 9000",
+            ]
+            record(
+                n,
+                "update",
+                None,
+                _profile(
+                    lambda: _table(data),
+                    lambda tf: tf.update(where, description="updated"),
+                ),
+            )
+            record(
+                n,
+                "update_func",
+                None,
+                _profile(
+                    lambda: _table(data),
+                    lambda tf: tf.update("duration < 10", lambda row: row),
+                ),
+            )
+            record(
+                n, "pop", None, _profile(lambda: _table(data), lambda tf: tf.pop(where))
+            )
+    return {"environment": _environment(), "results": results}
+
+
+def run() -> None:
+    """
+    Run the benchmarks from the command line
+    """
+    from argparse import ArgumentParser
+
+    if len(_sys.argv) > 1 and _sys.argv[1] == "_measure":
+        mode, path, chunksize = _sys.argv[2:5]
+        print(_json.dumps(_measure(mode, path, int(chunksize))))
+        return
+
+    parser: ArgumentParser = ArgumentParser(description="tabular benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    rss_parser = subparsers.add_parser("rss", help="peak RSS of load vs iter_chunks")
+    rss_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[100_000, 1_000_000, 4_000_000]
+    )
+    rss_parser.add_argument("--chunksize", type=int, default=_tabular.DEFAULT_CHUNKSIZE)
+    mutations_parser = subparsers.add_parser(
+        "mutations", help="original vs batched add/update/pop"
+    )
+    mutations_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 50_000]
+    )
+    suite_parser = subparsers.add_parser(
+        "suite", help="wall time and peak memory of the TableFile hot paths"
+    )
+    suite_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    suite_parser.add_argument(
+        "--formats", nargs="+", choices=list(SUITE_FORMATS), default=list(SUITE_FORMATS)
+    )
+    suite_parser.add_argument(
+        "--adds", type=int, default=10_000, help="rows to add one at a time"
+    )
+    suite_parser.add_argument(
+        "-o", "--output", type=_Path, help="write the results to this JSON file"
+    )
+    args = parser.parse_args()
+
+    if args.benchmark == "rss":
+        print(_json.dumps(bench_rss(args.rows, args.chunksize), indent=2))
+    elif args.benchmark == "mutations":
+        print(_json.dumps(bench_mutations(args.rows), indent=2))
+    elif args.benchmark == "suite":
+        results: dict = bench_suite(args.rows, args.formats, args.adds)
+        if args.output is not None:
+            args.output.write_text(_json.dumps(results, indent=2) + "\n")
+        else:
+            print(_json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    run()
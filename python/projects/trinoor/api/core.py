@@ -0,0 +1,1885 @@
+"""
+This module provides an extensible API using FastAPI. It features a plugin system
+and event system by default. Any other functionality can be added via plugins.
+
+# Event System
+The event system is allows plugins to either fire events or register functions that
+are called when an event is fired.
+
+## Firing and Responding to Events
+- `API.fire_event(name: str, *args, **kwargs) -> None`
+- `@API.handles(name: str, priority: int = 0)`
+Events are fired using `API.fire_event(name: str, *args, **kwargs)`. Other functions can
+register to be called when an event is fired using the `@API.handles(event_name: str)`
+decorator. When an event is fired, all registered functions are called in order of
+priority. The default priority is 0. The higher the priority, the earlier the function
+is called. Negative priorities behave similarly to indices in a list. For example, a
+function with a priority of -1 will be called last, and a function with a priority of
+-2 will be called second to last. If two functions have the same priority, the order is
+not guaranteed.
+
+## Asynchronous Dispatch
+- `await API.fire_event_async(name: str, *args, timeout: float = None, **kwargs)`
+- `await API.do_async(name: str, *args, timeout: float = None, **kwargs)`
+From async code (e.g. a route), these run every matching handler concurrently and
+return their results in priority order. Coroutine handlers run on the server's event
+loop and synchronous handlers run in a bounded thread pool, each limited to `timeout`
+seconds. A handler that raises or times out has its exception returned in place of its
+result.
+
+## Requesting Actions
+- `API.do(name: str, *args, **kwargs) -> None`
+- `@API.does(name: str, priority: int = 0)`
+The `API.do(name: str, *args, **kwargs)` function is functionally identical to
+`API.fire_event()`. It propagates the named action to all registered functions. This
+allows plugins to request actions from other plugins without any strong coupling. i.e.
+if a given plugin is not available, rather than throwing an error, the action will
+simply not be performed. Functions with the `@API.does(name: str)` decorator
+will be called when an action is requested, and the `*args` and `**kwargs` from the
+`API.do()` call will be passed to the function.
+
+## Event / Action Context
+- `@API.context(foo = "bar", lambda data: data["this'] == "that")`
+The `@API.context()` decorator can be used to add context to an event or action. This
+context creates a set of conditions that must be met for the event or action to be
+performed. All arguments that are provided via `API.fire_event()` or `API.do()` are
+passed to the context function. If the context function returns `True`, the event or
+action is performed. If the context function returns `False` or throws an exception, the
+event or action is not performed.
+
+## Example
+: email.py
+```python
+@does("send_email")
+def send_an_email(*args, **kwargs):
+    smtp_client.send_email(*args, **kwargs)
+```
+
+: azure_devops.py
+```python
+@router.post("/webhook")
+def webhook(request: Request):
+    data = await request.json()
+    api.do(f"ado:{data['eventType']}", data)
+```
+
+: gitlogger.py
+```python
+@handles("ado:git.push")
+@context(lambda data: data["resource"]["refUpdates"][0]["name"] == "refs/heads/master")
+def email_on_push(*args, **kwargs):
+    api.do(
+        "send_email",
+        to="devops@business.com",
+        subject="Push to master",
+        body="Someone pushed to master!"
+    )
+
+# Plugin System
+The plugin system allows plugins to be loaded dynamically. Plugins are loaded from the
+directory specified, in order of highest to lowest priority:
+  1. The `plugins` attribute specified at initialization
+  2. The `API_PLUGINS` environment variable
+  3. The `plugins` directory in the current working directory
+
+In order to be recognized as a plugin, a plugin must do one or more of the following:
+  1. Define a `router: APIRouter` attribute
+  2. Define a `register(api: API) -> None` function
+  3. Subclass `APIPlugin`
+
+## Lazy Loading
+With `lazy_plugins=True`, each plugin's handlers and route prefix are recorded in a
+manifest (keyed on the plugin file's mtime and size) the first time it's loaded. On
+later startups, plugins with an up-to-date manifest entry aren't imported at all; a
+plugin is loaded by the first event or action it handles, or the first request under
+its route prefix. Plugins with a `register()` function are always loaded at startup.
+Plugins that do need loading are imported concurrently by `plugin_workers` threads,
+and the time each took is recorded in `API.plugin_report`. The first request for the
+OpenAPI schema loads every deferred plugin with routes, so that the schema is complete.
+
+## Hot Reloading
+`API.reload_plugin(plugin)` re-imports a single plugin while the old version keeps
+serving, then swaps in its routes and handlers at once; the route table is replaced,
+never mutated. Requests already in flight on the old routes are drained before the old
+version's `unregister()` function is called. With `reload_interval` set, a background
+thread checks plugin files for changes and reloads the plugins that changed.
+
+## OpenAPI Schema
+The OpenAPI schema is built once for each set of plugins and cached, along with its
+serialized and gzipped forms and an ETag, so serving it is cheap. Loading, unloading,
+or reloading a plugin invalidates the cache; call `API.invalidate_openapi()` after
+adding schema routes any other way.
+
+## Multiple Workers
+With `workers` greater than 1, `API.run()` forks the worker processes from the process
+that loaded the plugins, rather than having each worker import the API from scratch.
+Deferred plugins are loaded and the OpenAPI schema is built before forking, so the
+workers share them copy-on-write and start immediately. Anything a worker changes in
+memory stays in that worker, including route and handler metrics, so state that
+workers need to share belongs in `API.store`, a SQLite-backed `SharedStore`.
+"""
+import asyncio as _asyncio
+import copy as _copy
+import gc as _gc
+import gzip as _gzip
+import hashlib as _hashlib
+import hmac as _hmac
+import importlib as _importlib
+import json as _json
+import os as _os
+import signal as _signal
+import threading as _threading
+import time as _time
+from concurrent.futures import (
+    Future as _Future,
+    ThreadPoolExecutor as _ThreadPoolExecutor,
+)
+from fnmatch import fnmatch as _fnmatch
+from logging.handlers import QueueListener as _QueueListener
+from functools import wraps as _wraps
+from glob import glob as _glob
+from pathlib import Path as _Path
+from traceback import format_exc as _format_exc
+from typing import Generator as _Generator, Callable as _Callable
+
+from fastapi import (
+    APIRouter as _APIRouter,
+    Depends as _Depends,
+    FastAPI as _FastAPI,
+    HTTPException as _HTTPException,
+    Request as _Request,
+    Security as _Security,
+)
+from fastapi.dependencies.utils import (
+    get_body_field as _get_body_field,
+    get_parameterless_sub_dependant as _get_parameterless_sub_dependant,
+)
+from fastapi.openapi.docs import get_swagger_ui_html as _get_swagger_ui_html
+from fastapi.openapi.utils import get_openapi as _get_openapi
+from fastapi.security.api_key import (
+    APIKeyQuery as _APIKeyQuery,
+    APIKeyCookie as _APIKeyCookie,
+    APIKeyHeader as _APIKeyHeader,
+    APIKey as _APIKey,
+)
+
+from starlette import status as _status
+from starlette.routing import request_response as _request_response
+
+from ..debug import debug
+
+# for custom docs endpoint that doesn't use the default StandardizedJSONResponse class
+from fastapi.responses import (
+    Response as _Response,
+    HTMLResponse as _HTMLResponse,
+    JSONResponse as _JSONResponse,
+    PlainTextResponse as _PlainTextResponse,
+)
+from schemas import StandardizedJSONResponse as _StandardizedJSONResponse
+from starlette.routing import Route as _Route
+
+from .plugins import (
+    APIPlugin,
+    DispatchRegistry,
+    EventHandler,
+    ActionHandler,
+    Handler,
+    should_ignore_plugin,
+    load_plugins as _load_plugins,
+    read_manifest as _read_manifest,
+    write_manifest as _write_manifest,
+    PluginLoadError,
+)
+from .log import (
+    Logger,
+    start_queue_logging as _start_queue_logging,
+    stop_queue_logging as _stop_queue_logging,
+)
+from .metrics import (
+    MetricsMiddleware as _MetricsMiddleware,
+    RouteMetrics,
+    render_prometheus as _render_prometheus,
+)
+from .store import SharedStore
+from .webhooks import QueueFullError, WebhookQueue
+
+
+# The number of bytes of a token's digest used to look it up in the token index
+_TOKEN_INDEX_BYTES: int = 8
+
+
+class _RouteTracker:
+    """
+    Counts the requests in flight on a plugin's routes, so that the old version of a
+    reloaded plugin can be drained.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: int = 0
+        self._condition: _threading.Condition = _threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests in flight."""
+        return self._in_flight
+
+    def wrap(self, app: _Callable) -> _Callable:
+        """
+        Wraps a route's ASGI app to count its requests.
+
+        Args:
+            app (Callable): The route's ASGI app.
+
+        Returns:
+            Callable: The wrapped ASGI app.
+        """
+
+        async def tracked(scope, receive, send) -> None:
+            with self._condition:
+                self._in_flight += 1
+            try:
+                await app(scope, receive, send)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    if not self._in_flight:
+                        self._condition.notify_all()
+
+        return tracked
+
+    def drain(self, timeout: float = None) -> bool:
+        """
+        Waits for the requests in flight to finish.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait. Defaults
+                to None (no limit).
+
+        Returns:
+            bool: True if every request finished, False if the timeout expired.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._in_flight, timeout)
+
+
+class _LazyRouteMiddleware:
+    """
+    ASGI middleware which loads a deferred plugin before the first request under its
+    route prefix is routed.
+    """
+
+    def __init__(self, app, api: "API") -> None:
+        self.app = app
+        self.api: API = api
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] in ("http", "websocket") and self.api._deferred_routes:
+            await self.api._load_deferred_routes(scope["path"])
+        await self.app(scope, receive, send)
+
+
+class API(_FastAPI):
+    """
+    This class extends FastAPI with a plugin/event based system.
+    """
+
+    def __init__(
+        self,
+        *args,
+        plugin_dir: _Path | str = None,
+        whitelist: list[str] | None = None,
+        blacklist: list[str] | None = None,
+        title: str = "API",  # fastAPI options
+        description: str = "",
+        version: str = "0.0.1",
+        license_info: dict[str, str] = None,
+        default_response_class: type[_Response] = _StandardizedJSONResponse,
+        submodule_paths: list[_Path | str] = [],
+        tokens: dict[str, dict[str, str]] | _Path = {},
+        token_name: str = "token",
+        tokens_enabled: bool = False,
+        tokens_check_interval: float = 5.0,
+        handler_workers: int = 8,
+        handler_timeout: float = None,
+        lazy_plugins: bool = False,
+        plugin_workers: int = None,
+        plugin_manifest: _Path | str = None,
+        reload_interval: float = None,
+        drain_timeout: float = 30.0,
+        metrics_path: str | None = "/metrics",
+        store_path: _Path | str = None,
+        log_queue: bool = True,
+        log_json: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        This class extends FastAPI with support for plugins and event handlers.
+
+        Args:
+            plugin_dir (Path | str, optional): The directory to load plugins from.
+                Defaults to "plugins" or the API_PLUGINS environment variable.
+            whitelist (list[str], optional): A list of plugins to load, using glob
+                patterns. If this is specified, only plugins that match a pattern in
+                this list will be loaded. Defaults to None.
+            blacklist (list[str], optional): A list of plugins to ignore, using glob
+                patterns. If this is specified, plugins that match a pattern in this
+                list will not be loaded. Defaults to None.
+            title (str, optional): The title of the API. Defaults to "API".
+            description (str, optional): The description of the API. Defaults to "".
+            version (str, optional): The version of the API. Defaults to "0.0.1".
+            license_info (dict[str, str], optional): The license information for the
+                API. Defaults to None.
+            default_response_class (type[StandardizedJSONResponse], optional): The
+                default response class to use for the API. Defaults to
+                StandardizedJSONResponse.
+            submodule_paths (list[Path | str], optional): A list of paths that plugins
+                can use to import libraries and submodules. Defaults to [].
+            tokens (dict[str, dict[str, str]] | Path, optional): A dictionary of
+                tokens to use for authentication. If a Path is provided, the file at
+                that path will be loaded as a JSON file, and reloaded when it changes.
+                Defaults to {}.
+            token_name (str, optional): The name of the token as a query parameter,
+                cookie, or header. Defaults to "token".
+            tokens_enabled (bool, optional): Whether or not to enable token-based
+                authentication. Defaults to False.
+            tokens_check_interval (float, optional): The minimum number of seconds
+                between checks of the tokens file for changes, if `tokens` is a Path.
+                Defaults to 5.
+            handler_workers (int, optional): The number of threads used to run
+                synchronous handlers for `fire_event_async()` and `do_async()`.
+                Defaults to 8.
+            handler_timeout (float, optional): The default number of seconds each
+                handler may take in `fire_event_async()` and `do_async()`. Defaults
+                to None (no timeout).
+            lazy_plugins (bool, optional): Whether to defer loading plugins with an
+                up-to-date manifest entry until they're first used. Requesting the
+                OpenAPI schema loads every deferred plugin with routes. Defaults to
+                False.
+            plugin_workers (int, optional): The number of threads used to import
+                plugins at startup. Defaults to 1 (sequential).
+            plugin_manifest (Path | str, optional): The plugin manifest used when
+                `lazy_plugins` is set. Defaults to ".plugin_manifest.json" in the plugin
+                directory.
+            reload_interval (float, optional): If set, plugin files are checked for
+                changes every `reload_interval` seconds while the API is running, and
+                changed plugins are reloaded with `reload_plugin()`. Defaults to None.
+            drain_timeout (float, optional): The maximum number of seconds to wait for
+                requests to the old version of a reloaded plugin to finish. Defaults to
+                30.
+            metrics_path (str, optional): The path where route, handler, and webhook
+                queue metrics are served in the Prometheus text format, or None to not
+                serve them. They're always available from `metrics()`. Defaults to
+                "/metrics".
+            store_path (Path | str, optional): The SQLite database of `store`, which
+                holds state shared by every worker process. Defaults to
+                ".plugin_store.sqlite3" in the plugin directory.
+            log_queue (bool, optional): Whether to move the handlers of the root,
+                uvicorn, and API loggers behind a queue while the API is running, so
+                that records are formatted and written in a background thread instead
+                of the event loop. Defaults to True.
+            log_json (bool, optional): Whether to format those loggers' records as
+                JSON lines with `JSONFormatter`. Only applies with `log_queue`.
+                Defaults to False.
+            *args: Additional arguments to pass to FastAPI.
+            **kwargs: Additional keyword arguments to pass to FastAPI().
+        """
+        super().__init__(
+            title=title,
+            description=description,
+            version=version,
+            license_info=license_info,
+            default_response_class=default_response_class,
+            openapi_tags=[],  # we'll add these ourselves
+            *args,
+            **kwargs,
+        )
+
+        # The OpenAPI schema as JSON, gzipped JSON, and its ETag, until plugins change
+        self._openapi_cache: tuple[bytes, bytes, str] = None
+        self._openapi_lock: _threading.Lock = _threading.Lock()
+        # Incremented whenever the set of plugins (and so the schema) changes
+        self.openapi_generation: int = 0
+        if self.openapi_url:
+            # Serve the schema from the cache instead of re-serializing it each time
+            self.router.routes = [
+                route
+                for route in self.router.routes
+                if getattr(route, "path", None) != self.openapi_url
+            ]
+            self.add_route(
+                self.openapi_url, self.openapi_response, include_in_schema=False
+            )
+        self.add_event_handler("startup", self._warm_openapi)
+
+        # Handlers of each loaded plugin, keyed by plugin name
+        self._event_registry: DispatchRegistry = DispatchRegistry()
+        self._action_registry: DispatchRegistry = DispatchRegistry()
+        self._handler_workers: int = handler_workers
+        self._handler_executor: _ThreadPoolExecutor = None
+        self.handler_timeout: float = handler_timeout
+        self.add_event_handler("shutdown", self._shutdown_handler_executor)
+
+        self.lazy_plugins: bool = lazy_plugins
+        self.plugin_workers: int = plugin_workers
+        self._plugin_manifest: _Path = plugin_manifest and _Path(plugin_manifest)
+        # Route prefixes of plugins deferred by lazy loading, and their pending loads
+        self._deferred_routes: dict[str, APIPlugin] = {}
+        self._deferred_loads: dict[str, _asyncio.Future] = {}
+        # How each plugin was handled at startup, and how long it took
+        self.plugin_report: list[dict[str, object]] = []
+        self.add_middleware(_LazyRouteMiddleware, api=self)
+        # Request metrics of each route, keyed by method and route path, and the number
+        # of requests in flight for each method
+        self._route_metrics: dict[tuple[str, str], RouteMetrics] = {}
+        self._requests_in_flight: dict[str, int] = {}
+        self.add_middleware(
+            _MetricsMiddleware,
+            routes=self._route_metrics,
+            in_flight=self._requests_in_flight,
+            router=self.router,
+        )
+
+        # The routes each plugin added, and the tracker counting their requests
+        self._plugin_routes: dict[str, tuple[list[_Route], _RouteTracker]] = {}
+        # Serializes changes to the route table
+        self._routes_lock: _threading.RLock = _threading.RLock()
+        self.drain_timeout: float = drain_timeout
+        self._watcher: _threading.Thread = None
+        self._stop_watching: _threading.Event = None
+        if reload_interval:
+            self.add_event_handler(
+                "startup", lambda: self.watch_plugins(reload_interval)
+            )
+            self.add_event_handler("shutdown", self.stop_watching)
+
+        self._whitelist = whitelist
+        self._blacklist = blacklist
+        self._submodule_paths = submodule_paths
+        self.tokens_check_interval: float = tokens_check_interval
+        self._tokens_path: _Path = None
+        self._tokens_signature: tuple[int, int] = None
+        self._tokens_checked: float = 0.0
+        if isinstance(tokens, _Path):
+            self._tokens_path = tokens
+            self.reload_tokens()
+        else:
+            self.tokens = tokens
+        self.token_name = token_name
+        self.tokens_enabled = tokens_enabled
+        self.logger = Logger(title.lower().replace(" ", "_"))
+        self.log_json: bool = log_json
+        self._log_listener: _QueueListener = None
+        if log_queue:
+            self.add_event_handler("startup", self._start_log_queue)
+            self.add_event_handler("shutdown", self._stop_log_queue)
+        # The webhook queues added with add_webhook_queue(), keyed by path
+        self.webhook_queues: dict[str, WebhookQueue] = {}
+        # Opened the first time it's used
+        self._store_path: _Path = store_path and _Path(store_path)
+        self._store: SharedStore = None
+
+        if metrics_path:
+            dependencies: list = []
+            if self.tokens_enabled:
+                dependencies.append(_Depends(self._token_dependency()))
+            self.add_api_route(
+                metrics_path,
+                self._prometheus_metrics,
+                methods=["GET"],
+                dependencies=dependencies,
+                include_in_schema=False,
+            )
+
+        if plugin_dir:
+            self._plugin_dir = _Path(plugin_dir)
+            list(self.load_plugins())
+        else:
+            self._plugin_dir = _os.environ.get("API_PLUGINS", "plugins")
+
+    def _start_log_queue(self) -> None:
+        """
+        Moves the handlers of the root, uvicorn, and API loggers behind a queue. Runs at
+        startup, after uvicorn has configured logging, in each worker process.
+        """
+        self._log_listener = _start_queue_logging(
+            "",
+            "uvicorn",
+            "uvicorn.access",
+            self.logger.default_name,
+            self.logger.error_name,
+            json=self.log_json,
+        )
+
+    def _stop_log_queue(self) -> None:
+        """
+        Writes any queued log records and gives the loggers their handlers back.
+        """
+        if self._log_listener is not None:
+            _stop_queue_logging(self._log_listener)
+            self._log_listener = None
+
+    @property
+    def store(self) -> SharedStore:
+        """
+        A key-value store for plugin state and counters, shared by every worker process
+        and kept across restarts.
+        """
+        if self._store is None:
+            self._store = SharedStore(
+                self._store_path or _Path(self._plugin_dir) / ".plugin_store.sqlite3"
+            )
+        return self._store
+
+    @property
+    def tokens(self) -> dict[str, dict[str, str]]:
+        """
+        The tokens used for authentication, as labelled tokens keyed by group. Assign a
+        new dictionary rather than modifying this one, so the token index is rebuilt.
+        """
+        return self._tokens
+
+    @tokens.setter
+    def tokens(self, tokens: dict[str, dict[str, str]]) -> None:
+        # Index each token's digest and the groups it's in by the digest's first
+        # bytes, so checking a token doesn't depend on how many there are. The index is
+        # replaced at once, never modified
+        groups: dict[bytes, set[str]] = {}
+        for group, labelled in tokens.items():
+            for value in labelled.values():
+                groups.setdefault(self._token_digest(value), set()).add(group)
+        index: dict[bytes, list[tuple[bytes, frozenset[str]]]] = {}
+        for digest, token_groups in groups.items():
+            index.setdefault(digest[:_TOKEN_INDEX_BYTES], []).append(
+                (digest, frozenset(token_groups))
+            )
+        self._tokens = tokens
+        self._token_index: dict[bytes, list[tuple[bytes, frozenset[str]]]] = index
+
+    @staticmethod
+    def _token_digest(token: str) -> bytes:
+        """
+        Returns the SHA-256 digest of a token.
+        """
+        return _hashlib.sha256(token.encode()).digest()
+
+    def reload_tokens(self) -> bool:
+        """
+        Reloads the tokens from the tokens file, if the API was given one.
+
+        Returns:
+            bool: True if the tokens were reloaded, False if there's no tokens file.
+        """
+        if self._tokens_path is None:
+            return False
+        signature: tuple[int, int] = self._tokens_file_signature()
+        with open(self._tokens_path) as f:
+            self.tokens = _json.load(f)
+        self._tokens_signature = signature
+        self._tokens_checked = _time.monotonic()
+        return True
+
+    def _tokens_file_signature(self) -> tuple[int, int] | None:
+        """
+        Returns the tokens file's modification time and size, or None if it can't be
+        read.
+        """
+        try:
+            stat: _os.stat_result = self._tokens_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _check_tokens_file(self) -> None:
+        """
+        Reloads the tokens file if it has changed, checking at most once every
+        `tokens_check_interval` seconds. If the new file can't be loaded, the current
+        tokens are kept.
+        """
+        now: float = _time.monotonic()
+        if now - self._tokens_checked < self.tokens_check_interval:
+            return
+        self._tokens_checked = now
+        signature: tuple[int, int] = self._tokens_file_signature()
+        if signature is None or signature == self._tokens_signature:
+            return
+        try:
+            self.reload_tokens()
+        except (OSError, ValueError) as e:
+            # Don't retry until the file changes again
+            self._tokens_signature = signature
+            self.logger.error(f"Failed to reload tokens from {self._tokens_path}: {e}")
+
+    def _check_token_group(self, token: str, group: str | list[str] = None) -> bool:
+        """
+        Checks if a token is in the specified group(s). If the group is None, will check
+        if the token is in any existing group.
+
+        Args:
+            token (str): The token to check.
+            group (str | list[str]): The group to check.
+
+        Returns:
+            bool: True if the token is in the group, False otherwise.
+        """
+        if not token:
+            return False
+        if self._tokens_path is not None:
+            self._check_tokens_file()
+
+        # The lookup only reveals the digest's first bytes; full digests are compared
+        # in constant time
+        digest: bytes = self._token_digest(token)
+        groups: frozenset[str] = None
+        for candidate, candidate_groups in self._token_index.get(
+            digest[:_TOKEN_INDEX_BYTES], ()
+        ):
+            if _hmac.compare_digest(candidate, digest):
+                groups = candidate_groups
+        if groups is None:
+            return False
+        if group is None:
+            return True
+        if isinstance(group, str):
+            return group in groups
+        return any(g in groups for g in group)
+
+    def _token_dependency(
+        self, group: list[str] | str = None, token_name: list[str] | str = None
+    ) -> callable:
+        """
+        A FastAPI Security dependency that checks if a token is valid.
+        """
+        if token_name is None:
+            token_name = self.token_name
+
+        async def get_validated_token(
+            api_key_query: str = _Security(
+                _APIKeyQuery(name=token_name, auto_error=False)
+            ),
+            api_key_header: str = _Security(
+                _APIKeyHeader(name=token_name, auto_error=False)
+            ),
+            api_key_cookie: str = _Security(
+                _APIKeyCookie(name=token_name, auto_error=False)
+            ),
+        ) -> str:
+            token_value = api_key_query or api_key_header or api_key_cookie
+            if self.tokens_enabled and not self._check_token_group(token_value, group):
+                raise _HTTPException(
+                    status_code=_status.HTTP_403_FORBIDDEN,
+                    detail="Could not validate credentials",
+                )
+            return token_value
+
+        return get_validated_token
+
+    def load_plugins(
+        self,
+        plugin_dir: _Path | str = None,
+        whitelist: list[str] = None,
+        blacklist: list[str] = None,
+        submodule_paths: list[_Path | str] = None,
+        fail_silently: bool = False,
+    ) -> _Generator[APIPlugin, None, None]:
+        """
+        Loads plugins from the plugin directory. With `lazy_plugins` set, plugins with
+        an up-to-date manifest entry are deferred instead of loaded. The rest are
+        imported by `plugin_workers` threads, then registered in order.
+        """
+        # load plugins
+        plugin_dir = plugin_dir or self._plugin_dir
+        debug("loading plugins from", plugin_dir)
+        self._plugins: list[APIPlugin] = _load_plugins(
+            plugin_dir,
+            whitelist=whitelist or self._whitelist,
+            blacklist=blacklist or self._blacklist,
+            submodule_paths=submodule_paths or self._submodule_paths,
+            autoload=False,
+            recursive=True,
+        )
+        manifest_path: _Path = self._plugin_manifest or (
+            _Path(plugin_dir) / ".plugin_manifest.json"
+        )
+        manifest: dict[str, dict[str, object]] = {}
+        if self.lazy_plugins:
+            manifest = _read_manifest(manifest_path)
+        self.plugin_report = []
+
+        # Defer plugins whose manifest entry is up to date
+        pending: list[APIPlugin] = []
+        for plugin in self._plugins:
+            if should_ignore_plugin(plugin.name, self._whitelist, self._blacklist):
+                continue
+            if self.lazy_plugins and plugin.apply_manifest_entry(
+                manifest.get(str(plugin.filepath))
+            ):
+                self._defer_plugin(plugin)
+                self.plugin_report.append(
+                    {"plugin": plugin.name, "status": "deferred", "seconds": 0.0}
+                )
+                yield plugin
+            else:
+                pending.append(plugin)
+
+        # Import the remaining plugins concurrently, but register them in order since
+        # registering changes the API
+        with _ThreadPoolExecutor(max(self.plugin_workers or 1, 1)) as executor:
+            imports: dict[str, _Future] = {}
+            if (self.plugin_workers or 1) > 1:
+                imports = {
+                    plugin.name: executor.submit(plugin.ensure_loaded)
+                    for plugin in pending
+                }
+            for plugin in pending:
+                try:
+                    if plugin.name in imports:
+                        try:
+                            imports[plugin.name].result()
+                        except Exception as e:
+                            raise PluginLoadError(
+                                f"Error loading plugin {plugin.name}: {e}"
+                            ) from e
+                    start: float = _time.perf_counter()
+                    self.load_plugin(plugin, fail_silently=False)
+                    seconds: float = _time.perf_counter() - start
+                except Exception as e:
+                    self.plugin_report.append(
+                        {"plugin": plugin.name, "status": "failed", "seconds": None}
+                    )
+                    if fail_silently:
+                        self.logger.error(f"Failed to load plugin {plugin.name}: {e}")
+                    else:
+                        raise e
+                    continue
+                # Include the import time if it happened in a worker thread
+                if plugin.name in imports:
+                    seconds += plugin.load_time or 0.0
+                self.plugin_report.append(
+                    {"plugin": plugin.name, "status": "loaded", "seconds": seconds}
+                )
+                if self.lazy_plugins:
+                    manifest[str(plugin.filepath)] = plugin.manifest_entry()
+                yield plugin
+
+        for entry in self.plugin_report:
+            seconds: str = (
+                "-" if entry["seconds"] is None else f"{entry['seconds']:.3f}s"
+            )
+            self.logger.info(f"Plugin {entry['plugin']}: {entry['status']} ({seconds})")
+
+        if self.lazy_plugins:
+            try:
+                _write_manifest(manifest_path, manifest)
+            except OSError as e:
+                self.logger.warning(f"Failed to write plugin manifest: {e}")
+
+    def _inject_token_dependencies(self, routes: list[_Route]) -> None:
+        """
+        Injects the token dependency into routes which require it.
+
+        Args:
+            routes (list[Route]): The routes to check.
+        """
+        for route in routes:
+            if hasattr(route.endpoint, "__token_group__") or hasattr(
+                route.endpoint, "__token_name__"
+            ):
+                print(f"injecting token dependency for {route.path}")
+                group = getattr(route.endpoint, "__token_group__", None)
+                token_name = getattr(route.endpoint, "__token_name__", None)
+                route.dependant.dependencies.insert(
+                    0,
+                    _get_parameterless_sub_dependant(
+                        depends=_Depends(self._token_dependency(group, token_name)),
+                        path=route.path_format,
+                    ),
+                )
+                route.body_field = _get_body_field(
+                    dependant=route.dependant, name=route.unique_id
+                )
+                print(
+                    f"route {route} dependant dependencies:",
+                    route.dependant.dependencies,
+                )
+
+                # self._inject_token_dependency(route, group, token_name)
+
+    def _defer_plugin(self, plugin: APIPlugin) -> None:
+        """
+        Registers a plugin's lazy handlers and route prefix from its manifest entry, so
+        that it's loaded when first used.
+
+        Args:
+            plugin (APIPlugin): The plugin, after `apply_manifest_entry()`.
+        """
+        self._event_registry.add(plugin.name, plugin.get_event_handlers())
+        self._action_registry.add(plugin.name, plugin.get_action_handlers())
+        if plugin.route_prefix is not None:
+            # Same default prefix as load_plugin()
+            prefix: str = plugin.route_prefix or f"/{plugin.name.replace('.', '/')}"
+            self._deferred_routes[prefix] = plugin
+
+    async def _load_deferred_routes(self, path: str) -> None:
+        """
+        Loads the deferred plugin whose route prefix matches the given path, if any.
+        Concurrent requests for the same plugin wait on the same load.
+
+        Args:
+            path (str): The path of the request.
+        """
+        for prefix, plugin in list(self._deferred_routes.items()):
+            if path != prefix and not path.startswith(prefix.rstrip("/") + "/"):
+                continue
+            load: _asyncio.Future = self._deferred_loads.get(prefix)
+            if load is None:
+                load = _asyncio.ensure_future(
+                    self._load_deferred_plugin(prefix, plugin)
+                )
+                self._deferred_loads[prefix] = load
+            await _asyncio.shield(load)
+
+    async def _load_all_deferred_routes(self) -> None:
+        """
+        Loads every deferred plugin with routes concurrently, e.g. so that their routes
+        are in the OpenAPI schema.
+        """
+        await _asyncio.gather(
+            *(
+                self._load_deferred_routes(prefix)
+                for prefix in list(self._deferred_routes)
+            )
+        )
+
+    async def _load_deferred_plugin(self, prefix: str, plugin: APIPlugin) -> None:
+        """
+        Loads a deferred plugin in a worker thread and adds its routes to the API.
+
+        Args:
+            prefix (str): The plugin's route prefix.
+            plugin (APIPlugin): The plugin to load.
+        """
+        start: float = _time.perf_counter()
+        try:
+            await _asyncio.get_running_loop().run_in_executor(
+                None, plugin.ensure_loaded
+            )
+            self.load_plugin(plugin)
+            self.logger.info(
+                f"Plugin {plugin.name}: loaded on first request "
+                f"({_time.perf_counter() - start:.3f}s)"
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to load plugin {plugin.name}: {e}")
+        finally:
+            self._deferred_routes.pop(prefix, None)
+            self._deferred_loads.pop(prefix, None)
+
+    def load_deferred_plugins(self) -> list[APIPlugin]:
+        """
+        Loads every plugin deferred by lazy loading, e.g. before forking workers so
+        that they share the loaded plugins instead of each loading them.
+
+        Returns:
+            list[APIPlugin]: The plugins that were loaded.
+        """
+        deferred: list[APIPlugin] = [
+            plugin
+            for plugin in getattr(self, "_plugins", [])
+            if not plugin.loaded
+            and not should_ignore_plugin(plugin.name, self._whitelist, self._blacklist)
+        ]
+        with _ThreadPoolExecutor(max(self.plugin_workers or 1, 1)) as executor:
+            list(executor.map(APIPlugin.ensure_loaded, deferred))
+        # Plugins with routes are added to the API, the rest only had lazy handlers
+        for prefix, plugin in list(self._deferred_routes.items()):
+            self.load_plugin(plugin)
+            self._deferred_routes.pop(prefix, None)
+        for plugin in deferred:
+            self.logger.info(f"Plugin {plugin.name}: loaded before forking workers")
+        return deferred
+
+    def load_plugin(
+        self, plugin: APIPlugin, fail_silently: bool = False
+    ) -> tuple[callable, _APIRouter]:
+        """
+        Loads a single plugin.
+
+        Args:
+            plugin (APIPlugin): The plugin to load.
+
+        Returns:
+            [callable, _APIRouter]: The plugin's register function (if it has one) that
+                was used to register the plugin, and the plugin's router (if it has one)
+        """
+        register_func: callable = None
+        router: _APIRouter = None
+
+        # Determine if the plugin should be ignored
+        if should_ignore_plugin(plugin.name, self._whitelist, self._blacklist):
+            return
+
+        # Make sure the plugin is loaded
+        if not plugin.loaded:
+            try:
+                plugin.load()
+            except Exception as e:
+                if fail_silently:
+                    return None, None
+                else:
+                    raise PluginLoadError(
+                        f"Error loading plugin {plugin.name}: {e}"
+                    ) from e
+
+        # Add the plugin's handlers to the dispatch tables
+        self._event_registry.add(plugin.name, plugin.get_event_handlers())
+        self._action_registry.add(plugin.name, plugin.get_action_handlers())
+
+        if plugin.has_register_function():
+            # Run the plugin's register function and pass it this API instance
+            plugin.register(self)
+            register_func = plugin.register
+
+        if plugin.has_routes():
+            # Update our openapi tags with the plugin name and description
+            openapi_tag: dict[str, str] = {
+                "name": plugin.name,
+                "description": plugin.description,
+            }
+            self.openapi_tags.append(openapi_tag)
+
+            routes, tracker = self._build_plugin_routes(plugin)
+            with self._routes_lock:
+                # Copy-on-write, so requests being routed never see a partial update
+                self.router.routes = self.router.routes + routes
+                self._plugin_routes[plugin.name] = (routes, tracker)
+            self.router.on_startup.extend(plugin.router.on_startup)
+            self.router.on_shutdown.extend(plugin.router.on_shutdown)
+
+            # Set the plugin's router to be returned
+            router = plugin.router
+
+        self.invalidate_openapi()
+        return register_func, router
+
+    def _build_plugin_routes(
+        self, plugin: APIPlugin
+    ) -> tuple[list[_Route], _RouteTracker]:
+        """
+        Builds the API's routes for a plugin's router without adding them to the API.
+
+        Args:
+            plugin (APIPlugin): A loaded plugin with routes.
+
+        Returns:
+            tuple[list[Route], _RouteTracker]: The routes, with token dependencies
+                injected, and the tracker counting their requests.
+        """
+        for route in plugin.router.routes:
+            if plugin.name not in route.tags:
+                route.tags.append(plugin.name)
+
+        # TODO: Next time on Banging Your Head Against a Wall: look into
+        # TODO: FastAPI.include_router and figure out why it's not adding the above
+        # TODO: dependencies
+
+        # Include the router the same way FastAPI.include_router() would, but into a
+        # scratch router so the routes can be swapped into the API all at once. If the
+        # plugin doesn't have a prefix, use its name
+        prefix = plugin.router.prefix or f"/{plugin.name.replace('.', '/')}"
+        scratch: _APIRouter = _APIRouter(
+            dependencies=self.router.dependencies,
+            default_response_class=self.router.default_response_class,
+            dependency_overrides_provider=self,
+            route_class=self.router.route_class,
+            generate_unique_id_function=self.router.generate_unique_id_function,
+        )
+        scratch.include_router(plugin.router, prefix=prefix)
+        routes: list[_Route] = scratch.routes
+        if self.tokens_enabled:
+            self._inject_token_dependencies(routes)
+
+        tracker: _RouteTracker = _RouteTracker()
+        for route in routes:
+            route.app = tracker.wrap(route.app)
+        return routes, tracker
+
+    def unload_plugin(self, plugin: APIPlugin | str) -> APIPlugin:
+        """
+        Unloads a plugin.
+
+        Args:
+            plugin (APIPlugin | str): A plugin or the name of a plugin to unload.
+
+        Returns:
+            APIPlugin: The plugin that was unloaded.
+        """
+        if isinstance(plugin, str):
+            plugin = self.get_plugin(plugin)
+        elif isinstance(plugin, APIPlugin):
+            # Search to make sure the plugin is in the API's list of plugins
+            plugin = self.get_plugin(plugin.name)
+
+        # Make sure the plugin is actually in the API
+        if plugin is None:
+            raise ValueError(f"Plugin '{plugin.name}' not found.")
+
+        # Remove the plugin's handlers from the dispatch tables, and its route prefix if
+        # it was deferred
+        self._event_registry.remove(plugin.name)
+        self._action_registry.remove(plugin.name)
+        for prefix, deferred in list(self._deferred_routes.items()):
+            if deferred is plugin:
+                del self._deferred_routes[prefix]
+
+        # Make sure the plugin is loaded
+        if not plugin.loaded:
+            return plugin
+
+        if plugin.has_routes():
+            # Remove the plugin's routes from the API
+            with self._routes_lock:
+                routes, tracker = self._plugin_routes.pop(plugin.name, ([], None))
+                removed: set[int] = {id(route) for route in routes}
+                self.router.routes = [
+                    route for route in self.router.routes if id(route) not in removed
+                ]
+
+            # Remove the plugin's openapi tag
+            self.openapi_tags = [
+                tag for tag in self.openapi_tags if tag["name"] != plugin.name
+            ]
+
+        if plugin.has_unregister_function():
+            # Run the plugin's unregister function
+            plugin.unregister(self)
+        self.invalidate_openapi()
+
+        # Remove the plugin from the list of plugins
+        self._plugins.remove(plugin)
+
+        return plugin
+
+    def reload_plugin(
+        self, plugin: APIPlugin | str, drain_timeout: float = None
+    ) -> dict[str, object]:
+        """
+        Re-imports a plugin from its file and swaps it in for the running version
+        without dropping requests. The old version keeps serving while the new version
+        is imported and its routes are built. Then its routes, handlers, and openapi tag
+        replace the old ones at once. Requests already in flight on the old routes are
+        allowed to finish before the old version's `unregister()` function is called.
+        The new version's `register()` function is called last, so anything it sets up
+        isn't swapped atomically.
+
+        If the new version fails to import, the old version keeps running. This blocks
+        while draining, so call it from a thread rather than the event loop.
+
+        Args:
+            plugin (APIPlugin | str): A plugin or the name of a plugin to reload.
+            drain_timeout (float, optional): The maximum number of seconds to wait for
+                requests to the old version to finish. Defaults to `drain_timeout`.
+
+        Returns:
+            dict[str, object]: The plugin's name, the seconds spent importing, swapping,
+                and draining, and whether every request to the old version finished.
+        """
+        name: str = plugin if isinstance(plugin, str) else plugin.name
+        plugin = self.get_plugin(name)
+        if plugin is None:
+            raise ValueError(f"Plugin '{name}' not found.")
+        if drain_timeout is None:
+            drain_timeout = self.drain_timeout
+
+        start: float = _time.perf_counter()
+        new_plugin: APIPlugin = plugin.copy()
+        new_plugin.load()
+        routes, tracker = [], None
+        if new_plugin.has_routes():
+            routes, tracker = self._build_plugin_routes(new_plugin)
+        imported: float = _time.perf_counter()
+
+        with self._routes_lock:
+            old_routes, old_tracker = self._plugin_routes.pop(plugin.name, ([], None))
+            removed: set[int] = {id(route) for route in old_routes}
+            table: list[_Route] = []
+            pending: list[_Route] = routes
+            for route in self.router.routes:
+                if id(route) not in removed:
+                    table.append(route)
+                else:
+                    # Put the new routes where the old ones were
+                    table.extend(pending)
+                    pending = []
+            table.extend(pending)
+            self.router.routes = table
+            if routes:
+                self._plugin_routes[plugin.name] = (routes, tracker)
+            self._event_registry.add(plugin.name, new_plugin.get_event_handlers())
+            self._action_registry.add(plugin.name, new_plugin.get_action_handlers())
+            self._plugins = [new_plugin if p is plugin else p for p in self._plugins]
+            for prefix, deferred in list(self._deferred_routes.items()):
+                if deferred is plugin:
+                    del self._deferred_routes[prefix]
+            self.openapi_tags = [
+                tag for tag in self.openapi_tags if tag["name"] != plugin.name
+            ]
+            if routes:
+                self.openapi_tags.append(
+                    {"name": new_plugin.name, "description": new_plugin.description}
+                )
+            self.invalidate_openapi()
+        swapped: float = _time.perf_counter()
+
+        drained: bool = old_tracker.drain(drain_timeout) if old_tracker else True
+        if plugin.loaded and plugin.has_unregister_function():
+            plugin.unregister(self)
+        if new_plugin.has_register_function():
+            new_plugin.register(self)
+        done: float = _time.perf_counter()
+
+        report: dict[str, object] = {
+            "plugin": plugin.name,
+            "import_seconds": imported - start,
+            "swap_seconds": swapped - imported,
+            "drain_seconds": done - swapped,
+            "drained": drained,
+        }
+        self.logger.info(
+            f"Reloaded plugin {plugin.name}: imported in {imported - start:.3f}s, "
+            f"swapped in {(swapped - imported) * 1000:.3f}ms, "
+            f"drained in {done - swapped:.3f}s"
+            + ("" if drained else f" (timed out with {old_tracker.in_flight} left)")
+        )
+        return report
+
+    def watch_plugins(self, interval: float = 1.0) -> None:
+        """
+        Starts a background thread which reloads plugins whose files have changed,
+        checking every `interval` seconds. Only the plugin file itself is checked, not
+        other modules of a plugin package. Does nothing if already watching.
+
+        Args:
+            interval (float, optional): The number of seconds between checks. Defaults
+                to 1.
+        """
+        if self._watcher is not None:
+            return
+        stop: _threading.Event = _threading.Event()
+        # The file signature of each plugin that failed to reload, so it isn't retried
+        # until the file changes again
+        failed: dict[str, tuple[int, int]] = {}
+
+        def watch() -> None:
+            while not stop.wait(interval):
+                for plugin in self.plugins:
+                    if not plugin.changed:
+                        continue
+                    signature: tuple[int, int] = plugin.file_signature()
+                    if failed.get(plugin.name) == signature:
+                        continue
+                    try:
+                        self.reload_plugin(plugin)
+                        failed.pop(plugin.name, None)
+                    except Exception as e:
+                        failed[plugin.name] = signature
+                        self.logger.error(f"Failed to reload plugin {plugin.name}: {e}")
+
+        self._stop_watching = stop
+        self._watcher = _threading.Thread(
+            target=watch, name="plugin-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """
+        Stops the thread started by `watch_plugins()`.
+        """
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+        self._stop_watching = None
+
+    def unload_plugins(self, *args, **kwargs) -> list[APIPlugin]:
+        """
+        Pass the given arguments to `get_plugins()` and unload all plugins that match.
+
+        Args:
+            *args: Arguments to pass to `get_plugins()`.
+            **kwargs: Keyword arguments to pass to `get_plugins()`.
+
+        Returns:
+            list[APIPlugin]: A list of plugins that were unloaded.
+        """
+        for plugin in self.get_plugins(*args, **kwargs):
+            self.unload_plugin(plugin)
+
+    def get_plugin(self, name: str) -> APIPlugin:
+        """
+        Return a plugin by name.
+
+        Args:
+            name (str): The name of the plugin to get.
+
+        Returns:
+            APIPlugin: The plugin with the given name.
+        """
+        for plugin in self.plugins:
+            if plugin.name == name:
+                return plugin
+
+    def get_plugins(
+        self,
+        func: callable = None,
+        attr: dict[str, object] = None,
+        match_all: bool = False,
+        **kwargs,
+    ) -> list[APIPlugin]:
+        """
+        Return a list of plugins that match the given criteria.
+
+        Args:
+            func (callable, optional): A function to run on each plugin. If the
+                function returns True, the plugin will be returned. Defaults to None.
+            attr (dict[str, object]): A dictionary of attributes and values to match
+                against. If a plugin has an attribute that matches the given attributes,
+                and the plugin's attribute's value matches the given value, the plugin
+                will be returned.
+            match_all (bool, optional): If True, all attributes and functions must
+                match for a plugin to be returned. Otherwise, only one attribute or
+                function must match. Defaults to False.
+            **kwargs: Additional keyword arguments to match against. If a plugin has
+                an attribute that matches the given keyword arguments, and the plugin's
+                attribute's value matches the given value, the plugin will be returned.
+
+        Returns:
+            list[APIPlugin]: A list of plugins that match the given criteria.
+        """
+        plugins = []
+        attr.extend(kwargs)
+
+        for plugin in self.plugins:
+            attr_matches: list[bool] = []
+            func_match = True
+
+            if attr:
+                for k, v in attr.items():
+                    if not hasattr(plugin, k):
+                        attr_matches.append(False)
+                    elif getattr(plugin, k) != v:
+                        attr_matches.append(False)
+                    else:
+                        attr_matches.append(True)
+
+            if func:
+                func_match = func(plugin)
+
+            if match_all:
+                if all(attr_matches) and func_match:
+                    plugins.append(plugin)
+            else:
+                if any(attr_matches) or func_match:
+                    plugins.append(plugin)
+
+        return plugins
+
+    @property
+    def plugins(self) -> list[APIPlugin]:
+        """
+        Returns a list of all loaded plugins.
+        """
+        if hasattr(self, "_plugins"):
+            return self._plugins
+        else:
+            return []
+
+    def get_event_handlers(
+        self, event: str = None, sort: callable = None
+    ) -> list[EventHandler]:
+        """
+        Returns a list of all event handlers for the given event.
+
+        Args:
+            event (str, optional): The event to get handlers for. If no event is
+                given, all event handlers will be returned. Defaults to None.
+            sort (callable, optional): A function to use to sort the event handlers.
+                Defaults to None.
+
+        Returns:
+            list[EventHandler]: A list of event handlers.
+        """
+        event_handlers: list[EventHandler]
+        if event is None:
+            event_handlers = list(self._event_registry)
+        else:
+            event_handlers = list(self._event_registry.resolve(event))
+        if sort:
+            event_handlers.sort(key=sort)
+        return event_handlers
+
+    def get_action_handlers(
+        self, action: str = None, sort: callable = None
+    ) -> list[ActionHandler]:
+        """
+        Returns a list of all action handlers for the given action.
+
+        Args:
+            action (str, optional): The action to get handlers for. If no action is
+                given, all action handlers will be returned. Defaults to None.
+            sort (callable, optional): A function to use to sort the event handlers.
+                Defaults to None.
+
+        Returns:
+            list[ActionHandler]: A list of action handlers.
+        """
+        action_handlers: list[ActionHandler]
+        if action is None:
+            action_handlers = list(self._action_registry)
+        else:
+            action_handlers = list(self._action_registry.resolve(action))
+        if sort:
+            action_handlers.sort(key=sort)
+        return action_handlers
+
+    def fire_event(self, name: str, *args, **kwargs) -> None:
+        """
+        Fires an event.
+
+        Args:
+            name (str): The name of the event to fire.
+        """
+        # The registry's handlers are already matched and sorted by priority
+        for handler in self._event_registry.resolve(name):
+            handler(*args, **kwargs)
+
+    def do(self, action: str, *args, **kwargs) -> None:
+        """
+        Runs an action.
+
+        Args:
+            action (str): The name of the action to run.
+        """
+        for handler in self._action_registry.resolve(action):
+            handler(*args, **kwargs)
+
+    @property
+    def handler_executor(self) -> _ThreadPoolExecutor:
+        """
+        The thread pool that synchronous handlers run in when dispatched
+        asynchronously. Created on first use.
+        """
+        if self._handler_executor is None:
+            self._handler_executor = _ThreadPoolExecutor(
+                max_workers=self._handler_workers, thread_name_prefix="handler"
+            )
+        return self._handler_executor
+
+    def _shutdown_handler_executor(self) -> None:
+        """
+        Shuts down the handler thread pool when the server stops.
+        """
+        if self._handler_executor is not None:
+            self._handler_executor.shutdown(wait=False, cancel_futures=True)
+            self._handler_executor = None
+
+    async def _dispatch_async(
+        self,
+        registry: DispatchRegistry,
+        name: str,
+        args: tuple,
+        kwargs: dict[str, object],
+        timeout: float = None,
+    ) -> list[object]:
+        """
+        Runs every handler for an event or action concurrently.
+
+        Args:
+            registry (DispatchRegistry): The event or action registry.
+            name (str): The name of the event or action.
+            args (tuple): Positional arguments for the handlers.
+            kwargs (dict[str, object]): Keyword arguments for the handlers.
+            timeout (float, optional): The number of seconds each handler may take.
+                Defaults to `handler_timeout`.
+
+        Returns:
+            list[object]: Each handler's result, or the exception it raised, in
+                priority order.
+        """
+        handlers: tuple[Handler, ...] = registry.resolve(name)
+        if not handlers:
+            return []
+        if timeout is None:
+            timeout = self.handler_timeout
+        results: list[object] = await _asyncio.gather(
+            *(
+                handler.call_async(args, kwargs, self.handler_executor, timeout)
+                for handler in handlers
+            ),
+            return_exceptions=True,
+        )
+        for handler, result in zip(handlers, results):
+            if isinstance(result, _asyncio.TimeoutError):
+                self.logger.error(f"Handler {handler} for '{name}' timed out")
+            elif isinstance(result, Exception):
+                self.logger.error(f"Handler {handler} for '{name}' failed: {result!r}")
+        return results
+
+    async def fire_event_async(
+        self, name: str, *args, timeout: float = None, **kwargs
+    ) -> list[object]:
+        """
+        Fires an event from the running event loop, running its handlers
+        concurrently. Coroutine handlers run on the loop, and synchronous handlers run
+        in `handler_executor`.
+
+        Args:
+            name (str): The name of the event to fire.
+            timeout (float, optional): The number of seconds each handler may take.
+                Defaults to `handler_timeout`.
+
+        Returns:
+            list[object]: Each handler's result, or the exception it raised, in
+                priority order.
+        """
+        return await self._dispatch_async(
+            self._event_registry, name, args, kwargs, timeout
+        )
+
+    async def do_async(
+        self, action: str, *args, timeout: float = None, **kwargs
+    ) -> list[object]:
+        """
+        Runs an action from the running event loop, running its handlers
+        concurrently. See `fire_event_async()`.
+
+        Args:
+            action (str): The name of the action to run.
+            timeout (float, optional): The number of seconds each handler may take.
+                Defaults to `handler_timeout`.
+
+        Returns:
+            list[object]: Each handler's result, or the exception it raised, in
+                priority order.
+        """
+        return await self._dispatch_async(
+            self._action_registry, action, args, kwargs, timeout
+        )
+
+    def handler_stats(self) -> dict[str, list[dict[str, object]]]:
+        """
+        Returns the timing counters of every event and action handler: the number of
+        calls and errors, and the total, mean, and maximum call durations.
+
+        Returns:
+            dict[str, list[dict[str, object]]]: The counters of each handler, under
+                "events" and "actions".
+        """
+        return {
+            "events": self._event_registry.stats(),
+            "actions": self._action_registry.stats(),
+        }
+
+    def invalidate_openapi(self) -> None:
+        """
+        Discards the cached OpenAPI schema, so it's rebuilt when next requested.
+        """
+        with self._openapi_lock:
+            self.openapi_generation += 1
+            self.openapi_schema = None
+            self._openapi_cache = None
+
+    def openapi_document(self) -> tuple[bytes, bytes, str]:
+        """
+        Returns the OpenAPI schema serialized as JSON, gzipped, and its ETag, building
+        and caching them if the plugins have changed since they were last built.
+
+        Returns:
+            tuple[bytes, bytes, str]: The JSON, the gzipped JSON, and the ETag.
+        """
+        document: tuple[bytes, bytes, str] = self._openapi_cache
+        if document is None:
+            with self._openapi_lock:
+                document = self._openapi_cache
+                if document is None:
+                    body: bytes = _json.dumps(
+                        self.openapi(), separators=(",", ":")
+                    ).encode()
+                    etag: str = f'"{_hashlib.sha256(body).hexdigest()[:32]}"'
+                    document = (body, _gzip.compress(body), etag)
+                    self._openapi_cache = document
+        return document
+
+    async def openapi_response(self, request: _Request) -> _Response:
+        """
+        Serves the cached OpenAPI schema, gzipped if the client accepts it, or 304 Not
+        Modified if the client's copy is current. The schema is built in a worker
+        thread if it isn't cached, so the event loop isn't blocked, after loading any
+        deferred plugins with routes so that the schema (and its ETag) doesn't change
+        as they're used.
+
+        Args:
+            request (Request): The request for the schema.
+
+        Returns:
+            Response: The schema.
+        """
+        if self._deferred_routes:
+            await self._load_all_deferred_routes()
+        document: tuple[bytes, bytes, str] = self._openapi_cache
+        if document is None:
+            document = await _asyncio.to_thread(self.openapi_document)
+        body, gzipped, etag = document
+        headers: dict[str, str] = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag in request.headers.get("if-none-match", ""):
+            return _Response(status_code=_status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            body = gzipped
+        return _Response(body, media_type="application/json", headers=headers)
+
+    async def _warm_openapi(self) -> None:
+        """
+        Builds the OpenAPI schema in the background at startup, so that the first
+        request for it doesn't wait. With plugins still deferred, the schema is left
+        to the first request for it, rather than loading them all at startup.
+        """
+        if self._deferred_routes:
+            return
+        _asyncio.get_running_loop().run_in_executor(None, self.openapi_document)
+
+    def metrics(self) -> dict[str, object]:
+        """
+        Returns a snapshot of the API's metrics.
+
+        Returns:
+            dict[str, object]: Under "routes", the requests, errors, statuses, and
+                latency percentiles (in seconds) of each route, keyed by method and
+                path. Under "in_flight", the requests in progress for each method and
+                for each plugin's routes. Under "handlers", the counters of each event
+                and action handler (see `handler_stats()`). Under "webhook_queues", the
+                metrics of each webhook queue, keyed by path.
+        """
+        return {
+            "routes": {
+                f"{method} {path}": metrics.snapshot()
+                for (method, path), metrics in sorted(self._route_metrics.items())
+            },
+            "in_flight": {
+                "methods": dict(self._requests_in_flight),
+                "plugins": {
+                    name: tracker.in_flight
+                    for name, (routes, tracker) in self._plugin_routes.items()
+                },
+            },
+            "handlers": self.handler_stats(),
+            "webhook_queues": {
+                path: queue.metrics() for path, queue in self.webhook_queues.items()
+            },
+        }
+
+    async def _prometheus_metrics(self) -> _PlainTextResponse:
+        """
+        Serves the API's metrics in the Prometheus text format.
+        """
+        gauges: dict[str, tuple[str, dict[tuple, float]]] = {
+            "plugin_requests_in_flight": (
+                "HTTP requests in progress on each plugin's routes.",
+                {
+                    (("plugin", name),): tracker.in_flight
+                    for name, (routes, tracker) in self._plugin_routes.items()
+                },
+            )
+        }
+        if self.webhook_queues:
+            queues: dict[str, dict[str, object]] = {
+                path: await _asyncio.to_thread(queue.metrics)
+                for path, queue in self.webhook_queues.items()
+            }
+            for gauge, field, help_text in (
+                ("webhooks_pending", "pending", "Webhooks waiting to be processed."),
+                ("webhooks_running", "running", "Webhooks being processed."),
+                ("webhooks_failed", "failed", "Webhooks that ran out of attempts."),
+                ("webhooks_processed", "processed", "Webhooks processed."),
+                ("webhooks_retries", "retries", "Webhook attempts that were retried."),
+            ):
+                gauges[gauge] = (
+                    help_text,
+                    {(("queue", path),): m[field] for path, m in queues.items()},
+                )
+        text: str = _render_prometheus(
+            self._route_metrics,
+            self._requests_in_flight,
+            {
+                "event": list(self._event_registry),
+                "action": list(self._action_registry),
+            },
+            gauges,
+        )
+        return _PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+    def add_webhook_queue(
+        self,
+        path: str,
+        handler: _Callable,
+        database: _Path | str,
+        token_group: str | list[str] = None,
+        **options,
+    ) -> WebhookQueue:
+        """
+        Adds an endpoint which acknowledges webhooks as soon as they're stored, and a
+        queue which processes them in the background (see `WebhookQueue`). The endpoint
+        responds with 202 Accepted, or 503 Service Unavailable if the queue is full. The
+        queue's metrics are available at `{path}/metrics`. The queue's workers run
+        while the API does.
+
+        Args:
+            path (str): The path of the webhook endpoint.
+            handler (Callable): Called with each webhook's JSON payload.
+            database (Path | str): The path to the queue's SQLite database.
+            token_group (str | list[str], optional): If tokens are enabled, the token
+                group(s) allowed to post webhooks. Defaults to None (any group).
+            **options: Additional keyword arguments to pass to WebhookQueue().
+
+        Returns:
+            WebhookQueue: The queue.
+        """
+        options.setdefault("logger", self.logger)
+        queue: WebhookQueue = WebhookQueue(database, handler, **options)
+        dependencies: list = []
+        if self.tokens_enabled:
+            dependencies.append(_Depends(self._token_dependency(token_group)))
+
+        async def receive_webhook(request: _Request) -> _JSONResponse:
+            payload: object = await request.json()
+            try:
+                queued: bool = await _asyncio.to_thread(queue.put, payload)
+            except QueueFullError as e:
+                return _JSONResponse(
+                    {"detail": str(e)},
+                    status_code=_status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "30"},
+                )
+            return _JSONResponse(
+                {"queued": queued}, status_code=_status.HTTP_202_ACCEPTED
+            )
+
+        async def webhook_metrics() -> _JSONResponse:
+            return _JSONResponse(await _asyncio.to_thread(queue.metrics))
+
+        self.add_api_route(
+            path, receive_webhook, methods=["POST"], dependencies=dependencies
+        )
+        self.add_api_route(
+            f"{path.rstrip('/')}/metrics",
+            webhook_metrics,
+            methods=["GET"],
+            dependencies=dependencies,
+        )
+        self.invalidate_openapi()
+        self.add_event_handler("startup", queue.start)
+        self.add_event_handler("shutdown", queue.stop)
+        self.webhook_queues[path] = queue
+        return queue
+
+    def run(
+        self,
+        *args,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        headers: list[tuple[str, str]] = [],
+        ssl: bool = False,
+        ssl_keyfile: str = "key.pem",
+        ssl_certfile: str = "cert.pem",
+        reload: bool = False,
+        reload_dirs: list[str] | None = None,
+        workers: int = 1,
+        log_level: str = "info",
+        prefork: bool = True,
+        **kwargs,
+    ) -> None:
+        """
+        Runs the API.
+
+        Args:
+            host (str, optional): The host to run the API on. Defaults to "127.0.0.1".
+            port (int, optional): The port to run the API on. Defaults to 8000.
+            headers (list[tuple[str, str]], optional): A list of headers to add to
+                every response. Defaults to [].
+            ssl (bool, optional): Whether to run the API with SSL. Defaults to False.
+            ssl_keyfile (str, optional): The path to the SSL key file. Defaults to
+                "key.pem".
+            ssl_certfile (str, optional): The path to the SSL cert file. Defaults to
+                "cert.pem".
+            reload (bool, optional): Whether to reload the API on file changes. Defaults
+                to False.
+            reload_dirs (list[str], optional): A list of directories to watch for file
+                changes. Defaults to None.
+            workers (int, optional): The number of worker processes to run the API
+                with. Defaults to 1.
+            log_level (str, optional): The log level to use. Defaults to "info".
+            prefork (bool, optional): With more than one worker, whether to fork the
+                workers from this process after loading plugins, rather than having
+                uvicorn start workers which each import the app given in `args`. This
+                API is served either way. Ignored with `reload`, or where `os.fork()`
+                isn't available. Defaults to True.
+            *args: Additional arguments to pass to uvicorn.run().
+            **kwargs: Additional arguments to pass to uvicorn.run().
+
+        Notes:
+            See https://github.com/encode/uvicorn/blob/master/uvicorn/main.py#L453 for
+            a list of arguments that can be passed to uvicorn.run().
+        """
+        import uvicorn
+        import __main__ as main
+
+        # Set up the logger to use uvicorn's logger
+        self.logger.default_name = "uvicorn.asgi"
+        self.logger.error_name = "uvicorn.error"
+
+        ssl_opts: dict[str, str] = {}
+        if ssl:
+            ssl_opts = {"ssl_keyfile": ssl_keyfile, "ssl_certfile": ssl_certfile}
+
+        if prefork and workers > 1 and not reload and hasattr(_os, "fork"):
+            config: uvicorn.Config = uvicorn.Config(
+                self,
+                host=host,
+                port=port,
+                headers=headers,
+                log_level=log_level,
+                **ssl_opts,
+                **kwargs,
+            )
+            self._run_prefork(config, workers)
+            return
+
+        uvicorn.run(
+            *args,
+            host=host,
+            port=port,
+            headers=headers,
+            reload=reload,
+            reload_dirs=reload_dirs,
+            workers=workers,
+            log_level=log_level,
+            **ssl_opts,
+            **kwargs,
+        )
+
+    def _run_prefork(self, config, workers: int) -> None:
+        """
+        Binds the socket, then forks worker processes which each serve the API on it,
+        replacing any that crash, until this process is interrupted or terminated.
+
+        Args:
+            config (uvicorn.Config): The config of the workers' servers.
+            workers (int): The number of worker processes.
+        """
+        import uvicorn
+
+        # Do everything the workers would otherwise each do, so they share the result
+        self.load_deferred_plugins()
+        self.openapi_document()
+        config.load()
+        # Keep the loaded objects out of garbage collection, which would otherwise
+        # touch them and copy their memory into every worker
+        _gc.freeze()
+
+        sock = config.bind_socket()
+        children: set[int] = set()
+        stopping: bool = False
+
+        def spawn() -> None:
+            pid: int = _os.fork()
+            if pid:
+                children.add(pid)
+                return
+            # Worker: uvicorn installs its own signal handlers for a graceful shutdown
+            _signal.signal(_signal.SIGINT, _signal.SIG_DFL)
+            _signal.signal(_signal.SIGTERM, _signal.SIG_DFL)
+            status: int = 1
+            try:
+                server: uvicorn.Server = uvicorn.Server(config)
+                server.run(sockets=[sock])
+                # uvicorn's exit status for a failed startup
+                status = 0 if server.started else 3
+            except BaseException:
+                self.logger.error(f"Worker {_os.getpid()} failed:\n{_format_exc()}")
+            finally:
+                _os._exit(status)
+
+        def stop(signum: int, frame) -> None:
+            nonlocal stopping
+            stopping = True
+            for pid in children:
+                try:
+                    _os.kill(pid, _signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        handlers: dict[int, object] = {
+            signum: _signal.signal(signum, stop)
+            for signum in (_signal.SIGINT, _signal.SIGTERM)
+        }
+        self.logger.info(f"Starting {workers} workers from process {_os.getpid()}")
+        try:
+            for _ in range(workers):
+                spawn()
+            while children:
+                try:
+                    pid, status = _os.wait()
+                except ChildProcessError:
+                    break
+                children.discard(pid)
+                if stopping:
+                    continue
+                code: int = _os.waitstatus_to_exitcode(status)
+                if code == 3:
+                    # Every worker would fail the same way, so give up
+                    self.logger.error(f"Worker {pid} failed to start, stopping")
+                    stop(_signal.SIGTERM, None)
+                    continue
+                self.logger.warning(f"Worker {pid} exited ({code}), restarting it")
+                # Don't spin if workers crash as soon as they start
+                _time.sleep(1.0)
+                if not stopping:
+                    spawn()
+        finally:
+            for signum, handler in handlers.items():
+                _signal.signal(signum, handler)
+            sock.close()
+            _gc.unfreeze()
+
+
+def require_token(group: str | list[str] = None, token_name: str = "token") -> callable:
+    """
+    Decorator for APIPlugin methods to require a token when accessing the endpoint.
+    Tokens can be passed as a query parameter, a header, or a cookie.
+
+    Args:
+        group (str, list[str], optional): A token group that must be used when accessing
+            the endpoint, e.g.: "admin" or ["admin", "user"]. If no group is given, any
+            token will be accepted. Defaults to None.
+        token_name (str, optional): The name of the token to use. Defaults to "token".
+    """
+    if isinstance(group, str):
+        group = [group]
+
+    @_wraps(require_token)
+    def decorator(func: callable) -> callable:
+        nonlocal group, token_name
+        func.__token_name__ = token_name
+        func.__token_group__ = group
+        print(
+            f"setup token for function {func.__name__}:",
+            func.__token_name__,
+            func.__token_group__,
+        )
+        return func
+
+    return decorator
@@ -0,0 +1,518 @@
+"""
+Logging for the API.
+
+`Logger` writes to standard library loggers, chosen by level. Records below a logger's
+level are dropped before any formatting. `start_queue_logging()` moves the handlers of
+loggers behind a queue, so that formatting and writing records happens in a background
+thread instead of the thread that logged them, and `JSONFormatter` formats records as
+JSON lines for log collectors.
+"""
+import atexit as _atexit
+import json as _json
+import logging as _logging
+import queue as _queue
+from datetime import datetime as _datetime, timezone as _timezone
+from logging.handlers import (
+    QueueHandler as _QueueHandler,
+    QueueListener as _QueueListener,
+)
+from lib_programname import get_path_executed_script as _get_program_path
+from enum import Enum as _Enum
+from pathlib import Path as _Path
+
+
+class LogLevel(_Enum):
+    """Enum for log levels"""
+
+    # Detailed information, typically of interest only when diagnosing problems.
+    DEBUG = _logging.DEBUG
+
+    # Confirmation that things are working as expected.
+    INFO = _logging.INFO
+
+    # An indication that something unexpected happened, or indicative of some problem in
+    # the near future (e.g. ‘disk space low’). The software is still working as
+    # expected.
+    WARNING = _logging.WARNING
+
+    # Due to a more serious problem, the software has not been able to perform some
+    # function.
+    ERROR = _logging.ERROR
+
+    # A serious error, indicating that the program itself may be unable to continue
+    # running.
+    CRITICAL = _logging.CRITICAL
+
+
+# The levels, so logging calls don't look them up on the enum, which is slow
+_DEBUG: LogLevel = LogLevel.DEBUG
+_INFO: LogLevel = LogLevel.INFO
+_WARNING: LogLevel = LogLevel.WARNING
+_ERROR: LogLevel = LogLevel.ERROR
+_CRITICAL: LogLevel = LogLevel.CRITICAL
+
+
+# TODO: allow setting {"filepath": _Path, "stdout": bool, "stderr": bool, "format": str}
+#       for each log level using a Logger.config dict or similar
+class Logger:
+    """
+    A logger that handles writing to different `getLogger()` names for different log
+    levels.
+
+    Example:
+        >>> logger = Logger("my_logger", error="my_logger.error", info="my_logger.info")
+        >>> logger.info("This is an info message") # writes to my_logger.info
+        >>> logger.error("This is an error message") # writes to my_logger.error
+        >>> logger.warning("This is a warning message") # writes to my_logger
+    """
+
+    def __init__(
+        self,
+        default: str = None,
+        debug: str = None,
+        info: str = None,
+        warning: str = None,
+        error: str = None,
+        critical: str = None,
+    ) -> None:
+        """
+        A logger that handles writing to different `getLogger()` names for different log
+        levels.
+
+        Args:
+            default (str): The name of the default logger to use. Defaults to the
+                running program name.
+            debug (str, optional): The name of the logger to write debug messages to.
+                Defaults to the default logger.
+            info (str, optional): The name of the logger to write info messages to.
+                Defaults to the default logger.
+            warning (str, optional): The name of the logger to write warning messages
+                to. Defaults to the error logger.
+            error (str, optional): The name of the logger to write error messages to.
+                Defaults to the default logger.
+            critical (str, optional): The name of the logger to write critical messages
+                to. Defaults to the error logger.
+        """
+        self._default = default
+        self._debug = debug
+        self._info = info
+        self._warning = warning
+        self._error = error
+        self._critical = critical
+        # The logger of each level's value, until a name changes
+        self._loggers: dict[int, _logging.Logger] = {}
+
+    @property
+    def default_name(self) -> str:
+        """
+        The name of the default logger to use. Defaults to the running program name.
+        """
+        # If the default name is not set, set it to the name of the running program
+        if not hasattr(self, "_default") or not self._default:
+            self._default = _get_program_path().stem
+        return self._default
+
+    @default_name.setter
+    def default_name(self, name: str) -> None:
+        """
+        Sets the default logger name.
+
+        Args:
+            name (str): The name of the default logger to use.
+        """
+        self._default = name
+        self._loggers = {}
+
+    @property
+    def debug_name(self) -> str:
+        """
+        The name of the logger to write debug messages to. Defaults to the default
+        logger.
+        """
+        return self._debug or self.default_name
+
+    @debug_name.setter
+    def debug_name(self, name: str) -> None:
+        """
+        Sets the debug logger name.
+
+        Args:
+            name (str): The name of the logger to write debug messages to.
+        """
+        self._debug = name
+        self._loggers = {}
+
+    @property
+    def info_name(self) -> str:
+        """
+        The name of the logger to write info messages to. Defaults to the default
+        logger.
+        """
+        return self._info or self.default_name
+
+    @info_name.setter
+    def info_name(self, name: str) -> None:
+        """
+        Sets the info logger name.
+
+        Args:
+            name (str): The name of the logger to write info messages to.
+        """
+        self._info = name
+        self._loggers = {}
+
+    @property
+    def warning_name(self) -> str:
+        """
+        The name of the logger to write warning messages to. Defaults to the error
+        logger.
+        """
+        return self._warning or self.error_name
+
+    @warning_name.setter
+    def warning_name(self, name: str) -> None:
+        """
+        Sets the warning logger name.
+
+        Args:
+            name (str): The name of the logger to write warning messages to.
+        """
+        self._warning = name
+        self._loggers = {}
+
+    @property
+    def error_name(self) -> str:
+        """
+        The name of the logger to write error messages to.
+        """
+        if not hasattr(self, "_error") or not self._error:
+            self._error = self.default_name
+        return self._error
+
+    @error_name.setter
+    def error_name(self, name: str) -> None:
+        """
+        Sets the error logger name.
+
+        Args:
+            name (str): The name of the logger to write error messages to.
+        """
+        self._error = name
+        self._loggers = {}
+
+    @property
+    def critical_name(self) -> str:
+        """
+        The name of the logger to write critical messages to. Defaults to the error
+        logger.
+        """
+        return self._critical or self.error_name
+
+    @critical_name.setter
+    def critical_name(self, name: str) -> None:
+        """
+        Sets the critical logger name.
+
+        Args:
+            name (str): The name of the logger to write critical messages to.
+        """
+        self._critical = name
+        self._loggers = {}
+
+    def _get_logger(self, level: LogLevel) -> _logging.Logger:
+        """
+        Gets the logger for the given log level.
+
+        Args:
+            level (LogLevel): The log level to get the logger for.
+
+        Returns:
+            _logging.Logger: The logger for the given log level.
+        """
+        # Get the logger name for the given log level
+        logger_name = self.default_name
+        if level == LogLevel.DEBUG:
+            logger_name = self.debug_name
+        elif level == LogLevel.INFO:
+            logger_name = self.info_name
+        elif level == LogLevel.WARNING:
+            logger_name = self.warning_name
+        elif level == LogLevel.ERROR:
+            logger_name = self.error_name
+        elif level == LogLevel.CRITICAL:
+            logger_name = self.critical_name
+
+        # Return the logger, and remember it until a name changes
+        logger: _logging.Logger = _logging.getLogger(logger_name)
+        self._loggers[level._value_] = logger
+        return logger
+
+    def set_level(self, level: LogLevel) -> None:
+        """
+        Sets the level for messages to display. Any logging calls below this threshhold
+        will not do anything.
+
+        Args:
+            level (LogLevel): The log level to set.
+        """
+        _logging.basicConfig(level=level.value)
+
+    def log(self, level: LogLevel, msg: str | Exception, *args, **kwargs) -> None:
+        """
+        Logs a message at the specified level.
+
+        Args:
+            level (LogLevel): The level to log at.
+            msg (str): The message or Exception to log. If an Exception is passed,
+                the full traceback is logged.
+            *args: Additional arguments to pass to the logger. If an exception is
+                included in the args, the full traceback is logged.
+            **kwargs: Additional keyword arguments to pass to the logger.
+        """
+        if not isinstance(level, LogLevel):
+            raise ValueError(f"Invalid log level: {level}")
+        self._log(level, msg, args, kwargs)
+
+    def _log(
+        self, level: LogLevel, msg: str | Exception, args: tuple, kwargs: dict
+    ) -> None:
+        """
+        Logs a message for `log()` and the level methods, which must call this
+        directly so the record is attributed to their caller.
+        """
+        value: int = level._value_
+        logger: _logging.Logger = self._loggers.get(value) or self._get_logger(level)
+        # Don't format anything that won't be logged
+        if not logger.isEnabledFor(value):
+            return
+
+        # Get the exception if one is passed
+        exc: Exception = None
+        if isinstance(msg, Exception):
+            exc = msg
+            msg = f"{type(exc).__name__}: {exc}"
+        else:
+            _args: list[str] = []
+            for arg in args:
+                if isinstance(arg, Exception):
+                    exc = arg
+                    # logging tries to insert the args into the message via % formatting
+                    # so if there isn't a %s in the message, we will not include the
+                    # exception in the args
+                    if "%s" in msg:
+                        _args.append(str(arg))
+                else:
+                    _args.append(str(arg))
+            args = _args
+
+        # Log the message, with the exception's full traceback in the same record
+        if msg or exc:
+            if exc:
+                kwargs.setdefault("exc_info", exc)
+            # Attribute the record to our caller rather than this method and its caller
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 2
+            logger.log(value, msg, *args, **kwargs)
+
+    def debug(self, msg: str | Exception, *args, **kwargs) -> None:
+        """
+        Logs a message at the debug level.
+
+        Args:
+            msg (str): The message or Exception to log. If an Exception is passed,
+                the full traceback is logged.
+            *args: Additional arguments to pass to the logger. If an exception is
+                included in the args, the full traceback is logged.
+            **kwargs: Additional keyword arguments to pass to the logger.
+        """
+        self._log(_DEBUG, msg, args, kwargs)
+
+    def info(self, msg: str | Exception, *args, **kwargs) -> None:
+        """
+        Logs a message at the info level.
+
+        Args:
+            msg (str): The message or Exception to log. If an Exception is passed,
+                the full traceback is logged.
+            *args: Additional arguments to pass to the logger. If an exception is
+                included in the args, the full traceback is logged.
+            **kwargs: Additional keyword arguments to pass to the logger.
+        """
+        self._log(_INFO, msg, args, kwargs)
+
+    def warning(self, msg: str | Exception, *args, **kwargs) -> None:
+        """
+        Logs a message at the warning level.
+
+        Args:
+            msg (str): The message or Exception to log. If an Exception is passed,
+                the full traceback is logged.
+            *args: Additional arguments to pass to the logger. If an exception is
+                included in the args, the full traceback is logged.
+            **kwargs: Additional keyword arguments to pass to the logger.
+        """
+        self._log(_WARNING, msg, args, kwargs)
+
+    def error(self, msg: str | Exception, *args, **kwargs) -> None:
+        """
+        Logs a message at the error level.
+
+        Args:
+            msg (str): The message or Exception to log. If an Exception is passed,
+                the full traceback is logged.
+            *args: Additional arguments to pass to the logger. If an exception is
+                included in the args, the full traceback is logged.
+            **kwargs: Additional keyword arguments to pass to the logger.
+        """
+        self._log(_ERROR, msg, args, kwargs)
+
+    def critical(self, msg: str | Exception, *args, **kwargs) -> None:
+        """
+        Logs a message at the critical level.
+
+        Args:
+            msg (str): The message or Exception to log. If an Exception is passed,
+                the full traceback is logged.
+            *args: Additional arguments to pass to the logger. If an exception is
+                included in the args, the full traceback is logged.
+            **kwargs: Additional keyword arguments to pass to the logger.
+        """
+        self._log(_CRITICAL, msg, args, kwargs)
+
+
+class JSONFormatter(_logging.Formatter):
+    """
+    Formats log records as single-line JSON objects, with the time, level, logger,
+    message, and source of each record, its traceback if it has one, and any fields
+    passed with `extra`.
+
+    Example:
+        >>> handler.setFormatter(JSONFormatter())
+        >>> logger.info("Webhook queued", extra={"key": "ABC-123"})
+        {"time": "...", "level": "INFO", "logger": "api", "message": "Webhook queued",
+         "module": "core", "function": "receive_webhook", "line": 42, "key": "ABC-123"}
+    """
+
+    # The attributes every record has, so that the rest are known to be extra fields.
+    # uvicorn adds a copy of some messages with terminal colors, which isn't needed
+    _RECORD_ATTRIBUTES: frozenset[str] = frozenset(
+        vars(_logging.LogRecord("", 0, "", 0, "", (), None))
+    ) | {"message", "asctime", "taskName", "color_message"}
+
+    def format(self, record: _logging.LogRecord) -> str:
+        entry: dict[str, object] = {
+            "time": _datetime.fromtimestamp(record.created, _timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        for key, value in vars(record).items():
+            if key not in self._RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return _json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(_QueueHandler):
+    """
+    A queue handler which queues each record with the handlers it replaced, leaving
+    formatting to them. The standard QueueHandler formats each record before queueing
+    it, in the thread that logged it, so that the record can be pickled; that isn't
+    needed for an in-process queue.
+    """
+
+    def __init__(self, queue: _queue.Queue, handlers: list[_logging.Handler]) -> None:
+        super().__init__(queue)
+        self.handlers: tuple[_logging.Handler, ...] = tuple(handlers)
+
+    def prepare(self, record: _logging.LogRecord) -> tuple:
+        return self.handlers, record
+
+    def enqueue(self, item: tuple) -> None:
+        # Wait for room in a bounded queue rather than dropping the record
+        self.queue.put(item)
+
+
+class _QueueWriter(_QueueListener):
+    """
+    A queue listener which writes each record with the handlers it was queued with, so
+    that one background thread can serve several loggers.
+    """
+
+    def __init__(self, queue: _queue.Queue) -> None:
+        super().__init__(queue)
+        # The handlers of each logger that were moved behind the queue
+        self.replaced: dict[_logging.Logger, list[_logging.Handler]] = {}
+
+    def handle(self, item: tuple) -> None:
+        handlers, record = item
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def start_queue_logging(
+    *names: str, json: bool = False, maxsize: int = 0
+) -> _QueueListener:
+    """
+    Moves the handlers of the given loggers behind a queue, so that records are
+    formatted and written by a background thread. Loggers without handlers of their
+    own (i.e. that propagate to another logger's) are skipped. Records logged with
+    %-style arguments are formatted in the background, so arguments shouldn't be
+    modified after they're logged.
+
+    Args:
+        *names (str): The names of the loggers. Defaults to the root logger.
+        json (bool, optional): Whether to format records as JSON with
+            `JSONFormatter`. Defaults to False.
+        maxsize (int, optional): The maximum number of queued records, after which
+            logging blocks until the background thread catches up. Defaults to 0 (no
+            limit).
+
+    Returns:
+        QueueListener: The listener running the background thread. Pass it to
+            `stop_queue_logging()` to stop it, which happens at exit otherwise.
+    """
+    records: _queue.Queue = _queue.Queue(maxsize)
+    listener: _QueueWriter = _QueueWriter(records)
+    for name in dict.fromkeys(names or ("",)):
+        logger: _logging.Logger = _logging.getLogger(name or None)
+        if not logger.handlers or any(
+            isinstance(handler, _QueueHandler) for handler in logger.handlers
+        ):
+            # Nothing to move, or already queued
+            continue
+        if json:
+            for handler in logger.handlers:
+                handler.setFormatter(JSONFormatter())
+        listener.replaced[logger] = logger.handlers
+        logger.handlers = [_DeferredQueueHandler(records, logger.handlers)]
+
+    listener.start()
+    _atexit.register(stop_queue_logging, listener)
+    return listener
+
+
+def stop_queue_logging(listener: _QueueListener) -> None:
+    """
+    Stops a listener started by `start_queue_logging()` after it writes any records
+    still queued, and gives the loggers their handlers back. Does nothing if it's
+    already stopped.
+
+    Args:
+        listener (QueueListener): The listener.
+    """
+    if listener._thread is None:
+        return
+    for logger, handlers in listener.replaced.items():
+        logger.handlers = handlers
+    listener.stop()
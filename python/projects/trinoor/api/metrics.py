@@ -0,0 +1,348 @@
+"""
+Request and handler instrumentation for the API.
+
+`MetricsMiddleware` records the number of requests and their latencies for each route,
+and the number of requests in flight, and `Handler` records the calls, errors, and
+latencies of each event and action handler. `render_prometheus()` formats them in the Prometheus text exposition format,
+which `API` serves at `/metrics` by default.
+"""
+import threading as _threading
+import time as _time
+from bisect import bisect_left as _bisect_left
+from typing import Iterable as _Iterable
+
+from starlette.routing import (
+    BaseRoute as _BaseRoute,
+    Match as _Match,
+    Router as _Router,
+)
+
+# The upper bounds, in seconds, of the latency histogram buckets
+BUCKETS: tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """
+    A latency histogram with fixed buckets, like a Prometheus histogram. Quantiles are
+    estimated by interpolating within the bucket they fall in.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        """
+        Args:
+            buckets (tuple[float, ...], optional): The sorted upper bounds of the
+                buckets, in seconds. Defaults to `BUCKETS`.
+        """
+        self.buckets: tuple[float, ...] = buckets
+        # The last count is for observations above every bucket
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self._lock: _threading.Lock = _threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """
+        Records an observation.
+
+        Args:
+            seconds (float): The observed duration.
+        """
+        i: int = _bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Estimates a quantile of the observations.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float | None: The estimated quantile in seconds, or None if there are no
+                observations.
+        """
+        with self._lock:
+            counts: list[int] = list(self.counts)
+            count: int = self.count
+        if not count:
+            return None
+        rank: float = q * count
+        cumulative: int = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if i == len(self.buckets):
+                    # Above the last bucket, so the best estimate is its bound
+                    return self.buckets[-1]
+                lower: float = self.buckets[i - 1] if i else 0.0
+                fraction: float = (rank - cumulative) / bucket_count
+                return lower + (self.buckets[i] - lower) * fraction
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        """
+        Returns the number of observations, their mean, and the estimated 50th, 95th,
+        and 99th percentiles, in seconds.
+        """
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """
+        Returns the cumulative count of each bucket, keyed by its upper bound as a
+        Prometheus `le` label, ending with "+Inf".
+        """
+        with self._lock:
+            counts: list[int] = list(self.counts)
+        buckets: list[tuple[str, int]] = []
+        total: int = 0
+        for bound, count in zip([*map(repr, self.buckets), "+Inf"], counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class RouteMetrics:
+    """
+    The requests, statuses, and latencies of a single route.
+    """
+
+    def __init__(self) -> None:
+        self.statuses: dict[int, int] = {}
+        self.histogram: Histogram = Histogram()
+
+    @property
+    def requests(self) -> int:
+        """The number of finished requests."""
+        return sum(self.statuses.values())
+
+    def snapshot(self) -> dict[str, object]:
+        """
+        Returns the route's counters and latency percentiles.
+        """
+        return {
+            "requests": self.requests,
+            "errors": sum(n for status, n in self.statuses.items() if status >= 500),
+            "statuses": dict(self.statuses),
+            "latency": self.histogram.snapshot(),
+        }
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware which records `RouteMetrics` for each route. Requests which don't
+    match a route are grouped together, so that arbitrary paths can't create
+    unbounded metrics.
+    """
+
+    # The route label of requests which don't match a route
+    UNMATCHED: str = "<unmatched>"
+
+    def __init__(
+        self,
+        app,
+        routes: dict[tuple[str, str], RouteMetrics],
+        in_flight: dict[str, int],
+        router: _Router = None,
+    ) -> None:
+        """
+        Args:
+            app: The ASGI app.
+            routes (dict[tuple[str, str], RouteMetrics]): Receives the metrics of each
+                route, keyed by method and route path.
+            in_flight (dict[str, int]): Receives the number of requests in flight for
+                each method, since they haven't been routed yet.
+            router (Router, optional): The app's router, whose routes requests are
+                matched against when the router doesn't record the matched route in
+                the request's scope, as older versions of Starlette don't. Defaults to
+                None.
+        """
+        self.app = app
+        self.routes: dict[tuple[str, str], RouteMetrics] = routes
+        self.in_flight: dict[str, int] = in_flight
+        self.router: _Router = router
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method: str = scope["method"]
+        # Routing may rewrite the scope's path, e.g. for mounted apps
+        request_path: str = scope["path"]
+        status: list[int] = [500]
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        self.in_flight[method] = self.in_flight.get(method, 0) + 1
+        start: int = _time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed: float = (_time.perf_counter_ns() - start) / 1e9
+            self.in_flight[method] -= 1
+            route = scope.get("route")
+            path: str = getattr(route, "path", None)
+            if path is None and self.router is not None:
+                path = self._match_route(method, request_path)
+            path = path or self.UNMATCHED
+            metrics: RouteMetrics = self.routes.get((method, path))
+            if metrics is None:
+                metrics = self.routes.setdefault((method, path), RouteMetrics())
+            metrics.statuses[status[0]] = metrics.statuses.get(status[0], 0) + 1
+            metrics.histogram.observe(elapsed)
+
+    def _match_route(self, method: str, path: str) -> str | None:
+        """
+        Returns the path of the route a request was routed to, matching its path
+        against the router's routes as the router does, or None if none match.
+        """
+        scope: dict[str, object] = {"type": "http", "method": method, "path": path}
+        partial: _BaseRoute = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == _Match.FULL:
+                return getattr(route, "path", None)
+            if match == _Match.PARTIAL and partial is None:
+                # e.g. the route's path matches but not its methods
+                partial = route
+        return getattr(partial, "path", None)
+
+
+def _labels(**labels: object) -> str:
+    """
+    Formats Prometheus labels, escaping their values.
+    """
+    escaped: list[str] = []
+    for name, value in labels.items():
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _histogram_lines(
+    metric: str, histogram: Histogram, /, **labels: object
+) -> _Iterable[str]:
+    """
+    Formats a histogram's buckets, sum, and count as Prometheus samples.
+    """
+    for bound, count in histogram.cumulative():
+        yield f"{metric}_bucket{_labels(**labels, le=bound)} {count}"
+    yield f"{metric}_sum{_labels(**labels)} {histogram.sum}"
+    yield f"{metric}_count{_labels(**labels)} {histogram.count}"
+
+
+def _handler_labels(handlers: dict[str, list]) -> _Iterable[tuple[dict, object]]:
+    """
+    Yields the Prometheus labels of each handler, and the handler.
+    """
+    for kind, kind_handlers in handlers.items():
+        for handler in kind_handlers:
+            yield {
+                "kind": kind,
+                "name": handler.name,
+                "handler": handler.label,
+            }, handler
+
+
+def render_prometheus(
+    routes: dict[tuple[str, str], RouteMetrics],
+    in_flight: dict[str, int],
+    handlers: dict[str, list],
+    gauges: dict[str, tuple[str, dict[tuple, float]]] = None,
+    namespace: str = "trinoor",
+) -> str:
+    """
+    Formats route and handler metrics in the Prometheus text exposition format.
+
+    Args:
+        routes (dict[tuple[str, str], RouteMetrics]): The metrics of each route, keyed
+            by method and route path.
+        in_flight (dict[str, int]): The number of requests in flight for each method.
+        handlers (dict[str, list]): The event and action handlers, under "event" and
+            "action".
+        gauges (dict[str, tuple[str, dict[tuple, float]]], optional): Extra gauges,
+            keyed by name, each with its help text and its values keyed by tuples of
+            label name and value pairs. Defaults to None.
+        namespace (str, optional): The prefix of every metric name. Defaults to
+            "trinoor".
+
+    Returns:
+        str: The metrics.
+    """
+    lines: list[str] = []
+
+    name: str = f"{namespace}_http_requests_total"
+    lines += [f"# HELP {name} Finished HTTP requests.", f"# TYPE {name} counter"]
+    for (method, path), metrics in sorted(routes.items()):
+        for status, count in sorted(metrics.statuses.items()):
+            labels: str = _labels(method=method, route=path, status=status)
+            lines.append(f"{name}{labels} {count}")
+
+    name = f"{namespace}_http_request_duration_seconds"
+    lines += [f"# HELP {name} HTTP request latency.", f"# TYPE {name} histogram"]
+    for (method, path), metrics in sorted(routes.items()):
+        lines += _histogram_lines(name, metrics.histogram, method=method, route=path)
+
+    name = f"{namespace}_http_requests_in_flight"
+    lines += [f"# HELP {name} HTTP requests in progress.", f"# TYPE {name} gauge"]
+    for method, count in sorted(in_flight.items()):
+        lines.append(f"{name}{_labels(method=method)} {count}")
+
+    name = f"{namespace}_handler_calls_total"
+    lines += [
+        f"# HELP {name} Event and action handler calls.",
+        f"# TYPE {name} counter",
+    ]
+    for kind, handler in _handler_labels(handlers):
+        lines.append(f"{name}{_labels(**kind)} {handler.calls}")
+
+    name = f"{namespace}_handler_errors_total"
+    lines += [f"# HELP {name} Handler calls that raised.", f"# TYPE {name} counter"]
+    for kind, handler in _handler_labels(handlers):
+        lines.append(f"{name}{_labels(**kind)} {handler.errors}")
+
+    name = f"{namespace}_handler_duration_seconds"
+    lines += [f"# HELP {name} Handler call duration.", f"# TYPE {name} histogram"]
+    for kind, handler in _handler_labels(handlers):
+        lines += _histogram_lines(name, handler.histogram, **kind)
+
+    for gauge, (help_text, values) in (gauges or {}).items():
+        name = f"{namespace}_{gauge}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for labels, value in values.items():
+            lines.append(f"{name}{_labels(**dict(labels))} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,1283 @@
+"""
+APIPlugin is a base class for plugins.
+"""
+
+import asyncio as _asyncio
+import importlib as _importlib
+import inspect as _inspect
+import json as _json
+import os as _os
+import re as _re
+import threading as _threading
+import time as _time
+
+from fastapi import APIRouter as _APIRouter, FastAPI as _FastAPI
+from starlette.routing import Route as _Route
+from fastapi.requests import Request as _Request
+from fnmatch import fnmatch as _fnmatch, translate as _translate
+from pathlib import Path as _Path
+from concurrent.futures import Executor as _Executor
+from functools import lru_cache as _lru_cache, partial as _partial, wraps as _wraps
+from types import ModuleType as _ModuleType, CoroutineType as _CoroutineType
+from typing import Awaitable as _Awaitable, Iterator as _Iterator
+
+from ..debug import debug, enabled as _debug_enabled
+from .metrics import Histogram
+
+
+def context(
+    condition: callable = None,
+    **kwargs,
+) -> callable:
+    """
+    Decorator for APIPlugin methods that handle events. This will perform 2 types of
+    checks before running the decorated method:
+
+    1. If a lambda condition is given, it will be called with any arguments from the
+       function with the same name(s) as the lambda's arguments. If the lambda returns
+       True, the method will be run. If the lambda returns False, the method will not.
+    2. If keyword arguments are given, they will be compared to the arguments of the
+       function with the same name(s). If all keyword arguments match, the method will
+       be run. If any keyword arguments do not match, the method will not.
+
+    Example:
+        @context(lambda foo: foo["data"] == "bar", hello="world")
+        def my_method(foo, hello="blah", *args, **kwargs):
+            ...
+
+        my_method({"data": "bar"}, hello="world", "otherarg")  # Runs
+        my_method({"data": "baz"}, hello="world")  # Does not run, foo["data"] != "bar"
+        my_method({"data": "bar"})  # Does not run, hello != "world"
+
+    Notes:
+        - If both a lambda condition and keyword arguments are given, both must be
+          satisfied for the method to run.
+        - Any parameters in the lambda function will be matched to the function's
+          parameters by name. If the lambda function has a parameter that does not
+          match any of the function's parameters, the method will not run.
+        - If the function has any parameters that are not specified in the `@context`
+          decorator, they will be ignored and not factored into the condition.
+        - This decorator can be used for both asynchronous and synchronous methods.
+        - If this decorator is used on a FastAPI route, it must be below any
+          @router.post or @router.get decorators.
+        - Arguments which aren't passed take the function's default values. If an
+          argument has no default and isn't passed, the method will not run.
+        - The arguments are matched to the function's parameters once, when the
+          method is decorated, so checking them costs little more than calling the
+          condition.
+
+    Args:
+        condition (callable): Runs the decorated method if this function returns True.
+        **kwargs: Runs the decorated method if the function's arguments match these
+            keyword arguments.
+        priority (int, optional): The priority of the event handler. Defaults to 0.
+    """
+    expected: dict[str, object] = kwargs
+
+    def decorator(func: callable) -> callable:
+        return _compile_context(func, condition, expected)
+
+    return decorator
+
+
+def _compile_context(
+    func: callable, condition: callable, expected: dict[str, object]
+) -> callable:
+    """
+    Generates the wrapper for a function decorated with `@context`, which checks each
+    call's arguments against the condition and expected keyword arguments before
+    calling the function. The checks are generated as straight-line code, so nothing
+    is allocated besides the call's own `args` and `kwargs`: each argument the checks
+    need is read directly from them, or falls back to the parameter's default, with
+    where to find it worked out from the function's signature in advance.
+
+    Args:
+        func (callable): The decorated function.
+        condition (callable): The condition, or None.
+        expected (dict[str, object]): The expected values of the function's arguments.
+
+    Returns:
+        callable: The wrapper, which returns None without calling the function if the
+            checks fail.
+    """
+    parameters: list[_inspect.Parameter] = list(
+        _inspect.signature(func).parameters.values()
+    )
+    by_name: dict[str, tuple[int, _inspect.Parameter]] = {
+        p.name: (i, p) for i, p in enumerate(parameters)
+    }
+    has_var_keyword: bool = any(p.kind is p.VAR_KEYWORD for p in parameters)
+    condition_names: list[str] = []
+    if condition is not None:
+        condition_names = [
+            p.name
+            for p in _inspect.signature(condition).parameters.values()
+            if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+        ]
+
+    namespace: dict[str, object] = {"_func": func, "_condition": condition}
+    checks: list[str] = []
+
+    def load(name: str, var: str) -> bool:
+        """
+        Adds the lines which load an argument into `var`. Returns False if the argument
+        can never be present, so the checks can never pass.
+        """
+        index, parameter = by_name.get(name, (None, None))
+        if parameter is None or parameter.kind in (
+            parameter.VAR_POSITIONAL,
+            parameter.VAR_KEYWORD,
+        ):
+            if not has_var_keyword:
+                return False
+            # Only available if passed through the function's **kwargs
+            checks.append(f"if {name!r} not in kwargs: return")
+            checks.append(f"{var} = kwargs[{name!r}]")
+            return True
+
+        branch: str = "if"
+        if parameter.kind in (
+            parameter.POSITIONAL_ONLY,
+            parameter.POSITIONAL_OR_KEYWORD,
+        ):
+            checks.append(f"if len(args) > {index}: {var} = args[{index}]")
+            branch = "elif"
+        if parameter.kind is not parameter.POSITIONAL_ONLY:
+            checks.append(f"{branch} {name!r} in kwargs: {var} = kwargs[{name!r}]")
+            branch = "elif"
+        if parameter.default is parameter.empty:
+            checks.append("else: return")
+        else:
+            namespace[f"_default_{var}"] = parameter.default
+            checks.append(f"else: {var} = _default_{var}")
+        return True
+
+    possible: bool = all(load(name, f"c{i}") for i, name in enumerate(condition_names))
+    if possible and condition is not None:
+        call_args: str = ", ".join(f"c{i}" for i in range(len(condition_names)))
+        checks.append(f"if not _condition({call_args}): return")
+    for i, (name, value) in enumerate(expected.items()):
+        if not possible or not load(name, f"k{i}"):
+            possible = False
+            break
+        namespace[f"_expected_k{i}"] = value
+        checks.append(f"if not k{i} == _expected_k{i}: return")
+    if not possible:
+        checks = ["return"]
+
+    if _asyncio.iscoroutinefunction(func):
+        lines: list[str] = ["async def wrapper(*args, **kwargs):"]
+        call: str = "return await _func(*args, **kwargs)"
+    else:
+        lines = ["def wrapper(*args, **kwargs):"]
+        call = "return _func(*args, **kwargs)"
+    lines += [f"    {line}" for line in checks + [call]]
+    exec("\n".join(lines), namespace)
+    return _wraps(func)(namespace["wrapper"])
+
+
+def handles(event: str, priority: int = 0) -> callable:
+    """
+    Decorator for APIPlugin methods that handle events. This simply adds a `__handles__`
+    attribute to the method with a dictionary of events and priorities that it handles.
+
+    This works in tandem with `API.fire_event()` to allow plugins to interact with each
+    other.
+
+    Args:
+        event (str): The name of the event to handle.
+        priority (int, optional): The priority of the event handler. Defaults to 0.
+    """
+
+    @_wraps(handles)
+    def decorator(func: callable) -> callable:
+        if not hasattr(func, "__handles__"):
+            func.__handles__ = {}
+        func.__handles__[event] = priority
+        ## print(f"setup event handler for function {func.__name__}:", priority, func.__handles__,)
+        return func
+
+    return decorator
+
+
+def does(action: str, priority: int = 0) -> callable:
+    """
+    Decorator for APIPlugin methods that do actions. This simply adds a `__does__`
+    attribute to the method with a dictionary of actions and priorities that it does.
+
+    This works in tandem with `API.do()` to allow plugins to request actions from other
+    plugins.
+
+    Args:
+        action (str): The name of the action to do.
+        priority (int, optional): The priority of the action. Defaults to 0.
+    """
+
+    @_wraps(does)
+    def decorator(func: callable) -> callable:
+        if not hasattr(func, "__does__"):
+            func.__does__ = {}
+        func.__does__[action] = priority
+        ## print(f"setup action handler for function {func.__name__}:", priority, func.__does__)
+        return func
+
+    return decorator
+
+
+class Handler:
+    def __init__(self, name: str, handler: callable, priority: int = 0) -> None:
+        self.name: str = name
+        self.handler: callable = handler
+        self.priority: int = priority
+        self.signature: _inspect.Signature = _inspect.signature(handler)
+        self._init_stats()
+
+    def _init_stats(self) -> None:
+        """
+        Initializes the timing counters, which are updated on every call.
+        """
+        self.calls: int = 0
+        self.errors: int = 0
+        self.total_ns: int = 0
+        self.max_ns: int = 0
+        self.histogram: Histogram = Histogram()
+        self._stats_lock: _threading.Lock = _threading.Lock()
+
+    def _record(self, elapsed_ns: int, failed: bool) -> None:
+        """
+        Records the duration of a single call to the handler.
+
+        Args:
+            elapsed_ns (int): How long the call took in nanoseconds.
+            failed (bool): Whether the call raised an exception.
+        """
+        with self._stats_lock:
+            self.calls += 1
+            self.errors += failed
+            self.total_ns += elapsed_ns
+            self.max_ns = max(self.max_ns, elapsed_ns)
+        self.histogram.observe(elapsed_ns / 1e9)
+
+    @property
+    def label(self) -> str:
+        """
+        Returns the qualified name of the handler's function.
+        """
+        return f"{self.handler.__module__}.{self.handler.__qualname__}"
+
+    @property
+    def stats(self) -> dict[str, object]:
+        """
+        Returns the handler's timing counters.
+        """
+        return {
+            "name": self.name,
+            "handler": self.label,
+            "priority": self.priority,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": self.total_ns / 1e6,
+            "mean_ms": self.total_ns / self.calls / 1e6 if self.calls else 0.0,
+            "max_ms": self.max_ns / 1e6,
+            **{
+                f"{q}_ms": None if seconds is None else seconds * 1e3
+                for q, seconds in self.histogram.snapshot().items()
+                if q.startswith("p")
+            },
+        }
+
+    def _start_event_loop(self, coroutine: _CoroutineType, outcome: dict) -> None:
+        """
+        Starts an event loop for asynchronous handlers.
+
+        Args:
+            coroutine (CoroutineType): The coroutine to run.
+            outcome (dict): Receives the coroutine's "result" or "error".
+        """
+        loop = _asyncio.new_event_loop()
+        _asyncio.set_event_loop(loop)
+        try:
+            outcome["result"] = loop.run_until_complete(coroutine)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            loop.close()
+
+    def __call__(self, *args, **kwargs) -> object:
+        start: int = _time.perf_counter_ns()
+        failed: bool = True
+        try:
+            result: object = self._call(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self._record(_time.perf_counter_ns() - start, failed)
+
+    def _call(self, *args, **kwargs) -> object:
+        if _debug_enabled():
+            debug(f"calling handler {self.name} with {args=} {kwargs=}")
+        if _asyncio.iscoroutinefunction(self.handler):
+            # Handle asynchronous functions
+            coroutine: _CoroutineType = self.handler(*args, **kwargs)
+            try:
+                _asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop is running in this thread, so start one
+                return _asyncio.run(coroutine)
+            # This thread's event loop is busy with our caller, so run the coroutine
+            # on a loop in another thread. `call_async` avoids this.
+            outcome: dict = {}
+            loop_thread = _threading.Thread(
+                target=self._start_event_loop, args=(coroutine, outcome)
+            )
+            loop_thread.start()
+            loop_thread.join()
+            if "error" in outcome:
+                raise outcome["error"]
+            return outcome.get("result")
+        # Handle synchronous functions
+        return self.handler(*args, **kwargs)
+
+    async def call_async(
+        self,
+        args: tuple = (),
+        kwargs: dict[str, object] = {},
+        executor: _Executor = None,
+        timeout: float = None,
+    ) -> object:
+        """
+        Calls the handler from the running event loop. Coroutine handlers are awaited
+        on the loop, and synchronous handlers are run in the executor so that they
+        don't block it.
+
+        Args:
+            args (tuple, optional): Positional arguments for the handler.
+            kwargs (dict[str, object], optional): Keyword arguments for the handler.
+            executor (Executor, optional): The executor to run synchronous handlers
+                in. Defaults to the loop's default executor.
+            timeout (float, optional): The number of seconds to wait for the handler.
+                A synchronous handler that times out keeps running in its thread, but
+                its result is discarded. Defaults to None (no timeout).
+
+        Raises:
+            asyncio.TimeoutError: If the handler does not finish within the timeout.
+
+        Returns:
+            object: The handler's return value.
+        """
+        start: int = _time.perf_counter_ns()
+        failed: bool = True
+        try:
+            awaitable: _Awaitable
+            if _asyncio.iscoroutinefunction(self.handler):
+                awaitable = self.handler(*args, **kwargs)
+            else:
+                awaitable = _asyncio.get_running_loop().run_in_executor(
+                    executor, _partial(self.handler, *args, **kwargs)
+                )
+            result: object = await _asyncio.wait_for(awaitable, timeout)
+            failed = False
+            return result
+        finally:
+            self._record(_time.perf_counter_ns() - start, failed)
+
+    def __repr__(self) -> str:
+        cls: str = self.__class__.__name__
+        name: str = self.name
+        priority: int = self.priority
+        func: str = self.handler.__name__
+        signature: str = str(self.signature)
+        return f"<{cls}:{name}:{priority} {func}{signature}>"
+
+    def __gt__(self, other: object) -> bool:
+        if hasattr(other, "priority"):
+            return self.priority > other.priority
+        return NotImplemented
+
+    def __lt__(self, other: object) -> bool:
+        if hasattr(other, "priority"):
+            return self.priority < other.priority
+        return NotImplemented
+
+    def __eq__(self, other: object) -> bool:
+        if hasattr(other, "priority") and hasattr(other, "name"):
+            return self.priority == other.priority and self.name == other.name
+        return NotImplemented
+
+
+class EventHandler(Handler):
+    def __init__(self, event: str, handler: callable, priority: int = 0) -> None:
+        super().__init__(event, handler, priority)
+
+
+class ActionHandler(Handler):
+    def __init__(self, action: str, handler: callable, priority: int = 0) -> None:
+        super().__init__(action, handler, priority)
+
+
+class LazyHandler(Handler):
+    """
+    A handler of a plugin which was found in the plugin manifest but hasn't been
+    loaded yet. The plugin is loaded the first time the handler is called.
+    """
+
+    def __init__(
+        self, name: str, plugin: "APIPlugin", attr: str, priority: int = 0
+    ) -> None:
+        """
+        Args:
+            name (str): The event or action the handler is registered for.
+            plugin (APIPlugin): The plugin the handler belongs to.
+            attr (str): The name of the handler in the plugin's module.
+            priority (int, optional): The priority of the handler. Defaults to 0.
+        """
+        self.name: str = name
+        self.plugin: APIPlugin = plugin
+        self.attr: str = attr
+        self.priority: int = priority
+        self._init_stats()
+
+    @property
+    def handler(self) -> callable:
+        """
+        Returns the handler's function, loading its plugin if necessary.
+        """
+        self.plugin.ensure_loaded()
+        return getattr(self.plugin.module, self.attr)
+
+    @property
+    def signature(self) -> _inspect.Signature:
+        return _inspect.signature(self.handler)
+
+    @property
+    def label(self) -> str:
+        return f"{self.plugin.name}.{self.attr}"
+
+    def __repr__(self) -> str:
+        if self.plugin.loaded:
+            return super().__repr__()
+        cls: str = self.__class__.__name__
+        return f"<{cls}:{self.name}:{self.priority} {self.label} (not loaded)>"
+
+
+@_lru_cache(maxsize=1024)
+def _compile_pattern(pattern: str) -> _re.Pattern:
+    """
+    Compiles a glob pattern into a regular expression.
+
+    Args:
+        pattern (str): The glob pattern.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    return _re.compile(_translate(pattern))
+
+
+def _is_pattern(name: str) -> bool:
+    """
+    Returns True if the name contains glob wildcards, False otherwise.
+    """
+    return "*" in name or "?" in name or "[" in name
+
+
+def matches(handler_name: str, name: str) -> bool:
+    """
+    Returns True if a handler registered under `handler_name` should respond to the
+    event or action `name`. Either may be a glob pattern, e.g. firing "ado:*" calls
+    every handler of an "ado:" event, and a handler of "ado:*" is called for every
+    "ado:" event.
+
+    Args:
+        handler_name (str): The event or action the handler is registered for.
+        name (str): The event or action being fired.
+
+    Returns:
+        bool: True if the handler should be called, False otherwise.
+    """
+    if handler_name == name:
+        return True
+    if _is_pattern(name) and _compile_pattern(name).match(handler_name):
+        return True
+    return _is_pattern(handler_name) and bool(
+        _compile_pattern(handler_name).match(name)
+    )
+
+
+class DispatchRegistry:
+    """
+    A registry of the event or action handlers of each loaded plugin. Handlers are
+    added when a plugin is loaded and removed when it is unloaded, and the handlers
+    for each event or action name are matched and sorted by priority once, then
+    cached until the next change, so that dispatching doesn't walk every plugin on
+    every call.
+
+    Changes replace the registry's tables rather than modifying them, so that
+    dispatching never needs a lock.
+    """
+
+    # The most names to cache resolved handlers for
+    max_cached: int = 1024
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, tuple[Handler, ...]] = {}
+        self._resolved: dict[str, tuple[Handler, ...]] = {}
+        self._lock: _threading.Lock = _threading.Lock()
+
+    def add(self, owner: str, handlers: list[Handler]) -> None:
+        """
+        Registers handlers, replacing any previously registered by the same owner.
+
+        Args:
+            owner (str): The name of the plugin the handlers belong to.
+            handlers (list[Handler]): The handlers to register.
+        """
+        with self._lock:
+            self._handlers = {**self._handlers, owner: tuple(handlers)}
+            self._resolved = {}
+
+    def remove(self, owner: str) -> tuple[Handler, ...]:
+        """
+        Unregisters every handler belonging to an owner.
+
+        Args:
+            owner (str): The name of the plugin the handlers belong to.
+
+        Returns:
+            tuple[Handler, ...]: The handlers that were removed.
+        """
+        with self._lock:
+            handlers: dict[str, tuple[Handler, ...]] = dict(self._handlers)
+            removed: tuple[Handler, ...] = handlers.pop(owner, ())
+            self._handlers = handlers
+            self._resolved = {}
+        return removed
+
+    def resolve(self, name: str) -> tuple[Handler, ...]:
+        """
+        Returns the handlers for an event or action, in the order they should be
+        called.
+
+        Args:
+            name (str): The event or action. Supports glob matching.
+
+        Returns:
+            tuple[Handler, ...]: The matching handlers, sorted by priority.
+        """
+        resolved: dict[str, tuple[Handler, ...]] = self._resolved
+        handlers: tuple[Handler, ...] = resolved.get(name)
+        if handlers is None:
+            handlers = tuple(
+                sorted(
+                    (h for h in self if matches(h.name, name)),
+                    key=lambda handler: handler.priority,
+                )
+            )
+            if len(resolved) >= self.max_cached:
+                resolved.clear()
+            resolved[name] = handlers
+        return handlers
+
+    def stats(self) -> list[dict[str, object]]:
+        """
+        Returns the timing counters of every registered handler.
+        """
+        return [
+            {"plugin": owner, **handler.stats}
+            for owner, handlers in self._handlers.items()
+            for handler in handlers
+        ]
+
+    def __iter__(self) -> _Iterator[Handler]:
+        for handlers in self._handlers.values():
+            yield from handlers
+
+    def __len__(self) -> int:
+        return sum(len(handlers) for handlers in self._handlers.values())
+
+
+class APIPlugin:
+    """
+    A plugin is any python file that defines either a router: APIRouter variable or a
+    register(api: FastAPI) function. The router variable will be added to the API's
+    routes, and the register function will be called with the API as an argument.
+
+    Upon loading a file, this class will collect all of the methods that are decorated
+    with `@handles` or `@does` to be used by the API.
+    """
+
+    filepath: str | _Path
+    name: str
+    short_description: str
+    description: str
+    _submodule_paths: list[str | _Path] | str | _Path
+    _event_handlers: list[EventHandler]
+    _action_handlers: list[ActionHandler]
+    _router: _APIRouter
+    _register: callable
+    _unregister: callable
+    _module: _ModuleType
+
+    def __init__(
+        self,
+        filepath: str | _Path,
+        name: str = None,
+        short_description: str = None,
+        description: str = None,
+        submodule_paths: list[str | _Path] | str | _Path = [],
+        use_full_name: bool = False,
+        trim_base: str | _Path = None,
+        autoload: bool = True,
+        fail_silently: bool = False,
+    ) -> None:
+        """
+        Args:
+            filepath (str | Path): The path to the plugin file.
+            name (str, optional): The name of the plugin. Defaults to the filename
+                without the .py extension, unless the file is an __init__.py file, in
+                which case the name of the parent directory is used.
+            short_description (str, optional): A short description of the plugin. By
+                default, this is the first line of the plugin module's docstring. If
+                passed as a parameter, this will override that docstring.
+            description (str, optional): A longer description of the plugin. By default,
+                this will be loaded from the plugin module's docstring. If passed as a
+                parameter at initialization, this will override that docstring
+                description.
+            submodule_paths (list[str | Path] | str | Path, optional): A list of paths
+                that can be used for importing submodules within the plugin. Defaults to
+                [].
+            use_full_name (bool, optional): Whether to use the full path to the plugin
+                file, with directory separators replaced with periods, as the plugin
+                name. Defaults to False.
+            trim_base (str, optional): A string to trim from the beginning of the
+                plugin's name. Defaults to None.
+            autoload (bool, optional): Whether to automatically load the plugin. If
+                False, the plugin will not be loaded until `load()` is called. Defaults
+                to True.
+            fail_silently (bool, optional): Whether to fail silently if the plugin
+                cannot be loaded. Defaults to False.
+        """
+        self.filepath: _Path = _Path(filepath)
+        self._name = APIPlugin._determine_name(filepath, name, use_full_name, trim_base)
+        self.short_description: str = short_description
+        self.description: str = description
+        self._submodule_paths = submodule_paths or []
+        self._event_handlers: list[EventHandler] = []
+        self._action_handlers: list[ActionHandler] = []
+        self._router: _APIRouter = None
+        self._register: callable = None
+        self._unregister: callable = None
+        self._loaded: bool = False
+        self._module: _ModuleType = None
+        # The handlers, router, and register functions found when loading, for the
+        # plugin manifest
+        self._exports: list[dict[str, object]] = []
+        # The route prefix from the plugin manifest, until the plugin is loaded
+        self._route_prefix: str = None
+        self._load_lock: _threading.RLock = _threading.RLock()
+        # The number of seconds it took to load the plugin module
+        self.load_time: float = None
+        # The plugin file's modification time and size when it was loaded
+        self._file_signature: tuple[int, int] = None
+        if autoload:
+            self.load(fail_silently=fail_silently)
+
+    @staticmethod
+    def _determine_name(
+        filepath: str | _Path,
+        name: str = None,
+        use_full_name: bool = False,
+        trim_base: str | _Path = None,
+    ) -> str:
+        if name:
+            # if a name was given, just use that
+            ...
+        else:
+            # Make sure the filepath is a Path object
+            filepath = _Path(filepath)
+
+            # If the filename is __init__.py, use parent directory as the filepath
+            if filepath.name == "__init__.py":
+                filepath = filepath.parent
+            if use_full_name:
+                # Use the full path to the plugin file, minus the extension
+                # e.g. "plugins/my_plugin.py" -> "plugins/my_plugin"
+                name = filepath.with_suffix("").as_posix()
+            else:
+                # Use the filename without the extension as the plugin name
+                # e.g. "plugins/my_plugin.py" -> "my_plugin"
+                name = filepath.stem
+        if trim_base:
+            trim_base: str = str(trim_base)
+            # Remove the trim_base from the beginning of the plugin name
+            # e.g. trim_base="plugins/": "plugins/my_plugin" -> "my_plugin"
+            if name.startswith(trim_base):
+                name = name[len(trim_base) :]
+
+        # Replace any directory separators with periods in the plugin name
+        name = name.replace(_os.path.sep, ".")
+
+        # Remove any leading/trailing periods
+        name = name.strip(".")
+
+        return name
+
+    def load(self, fail_silently: bool = False) -> bool:
+        """
+        Loads the plugin file and collects all of the methods that are decorated with
+        `@handles` or `@does`.
+
+        Args:
+            fail_silently (bool, optional): If False, throws an exception when the
+                plugin fails to load properly. If True, returns a boolean with whether
+                it loaded successfully. Defaults to False.
+        """
+        # Load the plugin file
+        ## print(f"Loading plugin: {self.name=} {self.filepath=} {self._submodule_paths=}")
+        start: float = _time.perf_counter()
+        self._file_signature = self.file_signature()
+        spec = _importlib.util.spec_from_file_location(
+            name=self.name,
+            location=self.filepath,
+            submodule_search_locations=self._submodule_paths,
+        )
+        self._module = _importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(self._module)
+        except Exception as e:
+            if fail_silently:
+                ## print(f"Failed to load plugin: {self.name=} {self.filepath=}")
+                ## print(e)
+                return False
+            else:
+                raise PluginLoadError(
+                    f"Error loading plugin '{self.name}': {e}: {e.args}"
+                )
+
+        # If a short_description or description were not provided, try to get them from
+        # the module docstring, using the FastAPI convention of a short description
+        # followed by a blank line followed by a longer description and removing
+        # anything after a \f (form feed) character.
+        if self.short_description is None or self.description is None:
+            docstring = self._module.__doc__
+            if docstring:
+                docstring = docstring.split("\f")[0]
+                if self.short_description is None:
+                    self.short_description = docstring.splitlines()[0].strip()
+                if self.description is None:
+                    self.description = docstring.strip()
+
+        # Collect any event handlers, action handlers, routers, and register functions,
+        # replacing any lazy handlers from the plugin manifest
+        self._event_handlers = []
+        self._action_handlers = []
+        self._exports = []
+        for name in dir(self._module):
+            if name.startswith("_"):
+                # Skip private methods and attributes
+                continue
+
+            obj = getattr(self._module, name)
+
+            # Check for event handlers
+            if hasattr(obj, "__handles__"):
+                ## print(f"found event handler: {obj}.{obj.__name__}")
+                for event, priority in obj.__handles__.items():
+                    self._event_handlers.append(EventHandler(event, obj, priority))
+                    self._exports.append(
+                        {
+                            "kind": "event",
+                            "name": event,
+                            "priority": priority,
+                            "attr": name,
+                        }
+                    )
+
+            # Check for action handlers
+            if hasattr(obj, "__does__"):
+                ## print(f"found action handler: {obj}.{obj.__name__}")
+                for action, priority in obj.__does__.items():
+                    self._action_handlers.append(ActionHandler(action, obj, priority))
+                    self._exports.append(
+                        {
+                            "kind": "action",
+                            "name": action,
+                            "priority": priority,
+                            "attr": name,
+                        }
+                    )
+
+            # Check for routers and register functions
+            if name == "router" and isinstance(obj, _APIRouter):
+                self._router = obj
+
+                # If the router does not have a prefix, set it to the plugin name with
+                # any periods replaced with slashes
+                if not self._router.prefix:
+                    self._router.prefix = "/" + self.name.replace(".", "/")
+            elif name == "register" and callable(obj):
+                self._register = obj
+            elif name == "unregister" and callable(obj):
+                self._unregister = obj
+
+        self.load_time = _time.perf_counter() - start
+        self._loaded = True
+        return True
+
+    def ensure_loaded(self) -> None:
+        """
+        Loads the plugin if it hasn't been loaded yet. Safe to call from multiple
+        threads at once.
+        """
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the plugin has been loaded."""
+        return self._loaded
+
+    @property
+    def module(self) -> _ModuleType:
+        """The plugin's module, or None if it hasn't been loaded."""
+        return self._module
+
+    def file_signature(self) -> tuple[int, int] | None:
+        """
+        Returns the plugin file's current modification time (in nanoseconds) and size,
+        or None if it can't be read.
+        """
+        try:
+            stat: _os.stat_result = self.filepath.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def changed(self) -> bool:
+        """
+        Whether the plugin file has changed since the plugin was loaded, or since its
+        manifest entry was recorded if it hasn't been loaded.
+        """
+        return (
+            self._file_signature is not None
+            and self.file_signature() != self._file_signature
+        )
+
+    def copy(self) -> "APIPlugin":
+        """
+        Returns a new, unloaded instance of the plugin, so that a changed plugin file
+        can be loaded alongside the running version.
+        """
+        return APIPlugin(
+            self.filepath,
+            name=self.name,
+            submodule_paths=self._submodule_paths,
+            autoload=False,
+        )
+
+    @property
+    def route_prefix(self) -> str:
+        """
+        The prefix of the plugin's routes, or None if it has no router. Known from the
+        plugin manifest before the plugin is loaded.
+        """
+        if self._router is not None:
+            return self._router.prefix
+        return self._route_prefix
+
+    def manifest_entry(self) -> dict[str, object]:
+        """
+        Describes the loaded plugin for the plugin manifest, so that later startups
+        can register it without loading it. See `apply_manifest_entry()`.
+
+        Returns:
+            dict[str, object]: The plugin's file stats, descriptions, handlers, and
+                route prefix.
+        """
+        mtime_ns, size = self._file_signature
+        return {
+            "name": self.name,
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "short_description": self.short_description,
+            "description": self.description,
+            "exports": self._exports,
+            "prefix": self.route_prefix,
+            "has_register": self.has_register_function(),
+        }
+
+    def apply_manifest_entry(self, entry: dict[str, object]) -> bool:
+        """
+        Registers the plugin's handlers and route prefix from its manifest entry
+        without loading it. The handlers load the plugin when they're first called.
+
+        Plugins with a `register()` function are never deferred, since it may do
+        anything to the API. Only the plugin file itself is checked for changes, so
+        changes to other modules of a plugin package aren't detected.
+
+        Args:
+            entry (dict[str, object]): The plugin's manifest entry.
+
+        Returns:
+            bool: True if the entry was applied, False if the plugin must be loaded
+                because the entry is missing or out of date.
+        """
+        if not entry or entry.get("has_register") or entry.get("name") != self.name:
+            return False
+        signature: tuple[int, int] = (entry["mtime_ns"], entry["size"])
+        if self.file_signature() != signature:
+            return False
+        self._file_signature = signature
+
+        if self.short_description is None:
+            self.short_description = entry["short_description"]
+        if self.description is None:
+            self.description = entry["description"]
+        self._exports = entry["exports"]
+        self._event_handlers = []
+        self._action_handlers = []
+        for export in self._exports:
+            handler: LazyHandler = LazyHandler(
+                export["name"], self, export["attr"], export["priority"]
+            )
+            if export["kind"] == "event":
+                self._event_handlers.append(handler)
+            else:
+                self._action_handlers.append(handler)
+        self._route_prefix = entry["prefix"]
+        return True
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def submodule_paths(self) -> list[_Path]:
+        return self._submodule_paths
+
+    @submodule_paths.setter
+    def submodule_paths(self, value: list[str | _Path] | str | _Path) -> None:
+        # Only set the submodule path if it's not already set
+        if self._submodule_paths is None:
+            # If a single string or Path is passed, convert it to a list
+            if isinstance(value, (str, _Path)):
+                value = [value]
+
+            # Convert all of the paths to Path objects
+            self._submodule_paths = [_Path(v) for v in value]
+
+    def has_routes(self) -> bool:
+        """
+        Returns True if the plugin has a router, False otherwise.
+        """
+        return self._router is not None
+
+    @property
+    def router(self) -> _APIRouter:
+        """
+        Returns the router for the plugin.
+        """
+        return self._router
+
+    @property
+    def routes(self) -> list[_Route]:
+        """
+        Returns the routes for the plugin.
+        """
+        return self._router.routes if self.has_routes() else []
+
+    def register(self, api: _FastAPI) -> None:
+        """
+        Calls the register function for the plugin.
+
+        Args:
+            api (FastAPI): The FastAPI instance to register the plugin with.
+        """
+        return self._register(api)
+
+    def unregister(self, api: _FastAPI) -> None:
+        """
+        Calls the unregister function for the plugin.
+
+        Args:
+            api (FastAPI): The FastAPI instance to unregister the plugin from.
+        """
+        return self._unregister(api)
+
+    def has_register_function(self) -> bool:
+        """
+        Returns True if the plugin has a register function, False otherwise.
+        """
+        return self._register is not None
+
+    def has_unregister_function(self) -> bool:
+        """
+        Returns True if the plugin has an unregister function, False otherwise.
+        """
+        return self._unregister is not None
+
+    def get_event_handlers(self, event: str = None) -> list[EventHandler]:
+        """
+        Returns a list of event handlers for the given event or all event handlers if
+        no event is given.
+
+        Args:
+            event (str, optional): The event to get handlers for. If no event is given,
+                all event handlers are returned. Supports glob matching. Defaults to
+                None.
+        """
+        if event is None:
+            return self._event_handlers
+        return [h for h in self._event_handlers if _fnmatch(h.name, event)]
+
+    def get_action_handlers(self, action: str = None) -> list[ActionHandler]:
+        """
+        Returns a list of action handlers for the given action.
+
+        Args:
+            action (str, optional): The action to get handlers for. If no action is
+                given, all action handlers are returned. Supports glob matching.
+                Defaults to None.
+        """
+        if action is None:
+            return self._action_handlers
+        return [h for h in self._action_handlers if _fnmatch(h.name, action)]
+
+    def fire_event(self, event: str, *args, **kwargs) -> None:
+        """
+        Fires the given event.
+
+        Args:
+            event (str): The event to fire.
+        """
+        handlers: list[EventHandler] = self.get_event_handlers(event)
+        if handlers:
+            # Sort the handlers by priority
+            handlers.sort(key=lambda handler: handler.priority)
+
+            # Call each handler
+            for handler in handlers:
+                ## print(f"calling event handler {handler} for event {event}")
+                handler(*args, **kwargs)
+
+    def do(self, action: str, *args, **kwargs) -> object:
+        """
+        Fires the given action.
+
+        Args:
+            action (str): The action to fire.
+        """
+        handlers: list[ActionHandler] = self.get_action_handlers(action)
+        if handlers:
+            # Sort the handlers by priority
+            handlers.sort(key=lambda handler: handler.priority)
+
+            # Call each handler
+            for handler in handlers:
+                ## print(f"calling action handler {handler} for action {action}")
+                handler(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        rep: str = f"APIPlugin({self.name}"
+        handled_events: list[str] = [x.name for x in self._event_handlers]
+        if handled_events:
+            rep += f", handles={handled_events}"
+        handled_actions: list[str] = [x.name for x in self._action_handlers]
+        if handled_actions:
+            rep += f", does={handled_actions}"
+        rep += ")"
+        return rep
+
+
+def should_ignore_plugin(name: str, whitelist: list[str], blacklist: list[str]) -> bool:
+    """
+    Returns True if the plugin should be ignored, False otherwise.
+
+    Args:
+        name (str): The name of the plugin.
+        whitelist (list[str | Path]): A list of glob patterns to whitelist. Any plugin
+            that does not match one of these patterns will be ignored.
+        blacklist (list[str | Path]): A list of glob patterns to blacklist. Any plugin
+            that matches one of these patterns will be ignored.
+
+    Returns:
+        bool: True if the plugin should be ignored, False otherwise.
+    """
+    # If the plugin is in the blacklist, ignore it
+    if any(_fnmatch(name, pattern) for pattern in blacklist or []):
+        return True
+
+    # If the whitelist is empty, the plugin is not ignored
+    if not whitelist:
+        return False
+
+    # If the plugin is not in the whitelist, ignore it
+    if not any(_fnmatch(name, pattern) for pattern in whitelist):
+        return True
+
+    # The plugin is not ignored
+    return False
+
+
+def load_plugins(
+    sources: list[str | _Path] | str | _Path,
+    recursive: bool = True,
+    whitelist: list[str] = [],
+    blacklist: list[str] = [],
+    submodule_paths: list[str | _Path] = [],
+    autoload: bool = True,
+    fail_silently: bool = False,
+    _root_location: str | _Path = None,
+) -> list[APIPlugin]:
+    """
+    Load plugins from a directory, file, or list of directories/files.
+
+    Args:
+        sources (list[str | Path] | str | Path): The location(s) to load plugins from.
+            This can be a directory, file, or list of directories/files.
+        recursive (bool, optional): If True, subdirectories will be searched for
+            plugins. Defaults to True.
+        whitelist (list[str], optional): A list of plugins to load, using glob patterns.
+            If this is specified, only plugins that match a pattern in this list will be
+            loaded. Defaults to [].
+        blacklist (list[str], optional): A list of plugins to ignore, using glob
+            patterns. If this is specified, plugins that match a pattern in this list
+            will not be loaded. Defaults to [].
+        submodule_paths (list[str | Path], optional): A list of paths to add to each
+            plugin's sys.path. This is useful if the plugin needs to import modules from
+            the main application. Defaults to [].
+        autoload (bool, optional): If True, the plugin module will be loaded on
+            instantiation. Defaults to True.
+        fail_silently (bool, optional): If True, any errors that occur while
+            auto-loading a plugin will be ignored. Defaults to False.
+
+    Returns:
+        list[type[APIPlugin]]: A list of loaded plugins.
+    """
+    debug(
+        f"""
+    Loading plugins from {sources}:
+        {recursive=}
+        {whitelist=}
+        {blacklist=}
+        {submodule_paths=}
+        {autoload=}
+        {fail_silently=}
+        {_root_location=}
+    """
+    )
+    plugins: list[APIPlugin] = []
+
+    if isinstance(sources, str) or isinstance(sources, _Path):
+        sources = [sources]
+
+    for loc in sources:
+        debug("processing:", loc)
+        if isinstance(loc, str):
+            loc = _Path(loc)
+            debug(f"converted to {loc=}")
+
+        debug("wtf", loc.is_dir(), loc.is_file())
+        if loc.is_dir():
+            debug(f"{loc} is a directory")
+            for file in loc.iterdir():
+                debug(f"processing file: {file}")
+                if (file.is_file() and file.suffix == ".py") or (
+                    file.is_dir() and recursive
+                ):
+                    # Load all .py files *except* for files that start with an
+                    # underscore, except for __init__.py -- still load that one
+                    if file.name.startswith("_") and file.name != "__init__.py":
+                        continue
+                    if file.is_dir():
+                        debug("recursing using root", _root_location or loc)
+                        ...
+
+                    plugins.extend(
+                        load_plugins(
+                            file,
+                            recursive=recursive,
+                            whitelist=whitelist,
+                            blacklist=blacklist,
+                            submodule_paths=submodule_paths,
+                            autoload=autoload,
+                            fail_silently=fail_silently,
+                            _root_location=_root_location or loc,
+                        )
+                    )
+        elif loc.is_file():
+            debug("hit file", loc)
+            if loc.suffix == ".py":
+                # Load all .py files *except* for files that start with an
+                # underscore, except for __init__.py -- still load that one
+                if loc.name.startswith("_") and loc.name != "__init__.py":
+                    continue
+
+                # And no *.example.py files
+                if loc.name.endswith(".example.py"):
+                    continue
+
+                # Load the plugin, trimming the root directory from the plugin name
+                debug(f"Loading plugin {loc}: {_root_location=} {fail_silently=}")
+                plugin: APIPlugin = APIPlugin(
+                    loc,
+                    submodule_paths=submodule_paths,
+                    use_full_name=True,
+                    trim_base=_root_location,
+                    autoload=False,
+                    fail_silently=fail_silently,
+                )
+
+                # If the plugin is not ignored, add it to the list
+                if not should_ignore_plugin(plugin.name, whitelist, blacklist):
+                    if autoload:
+                        plugin.load()
+                    plugins.append(plugin)
+        else:
+            debug("no idea what loc is")
+            ...
+
+    return plugins
+
+
+def read_manifest(path: str | _Path) -> dict[str, dict[str, object]]:
+    """
+    Reads a plugin manifest written by `write_manifest()`.
+
+    Args:
+        path (str | Path): The path to the manifest.
+
+    Returns:
+        dict[str, dict[str, object]]: Each plugin's manifest entry, keyed by its
+            filepath. Empty if the manifest doesn't exist or can't be read.
+    """
+    try:
+        with open(path) as f:
+            return _json.load(f).get("plugins", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def write_manifest(path: str | _Path, entries: dict[str, dict[str, object]]) -> None:
+    """
+    Writes a plugin manifest, replacing the previous one atomically.
+
+    Args:
+        path (str | Path): The path to the manifest.
+        entries (dict[str, dict[str, object]]): Each plugin's manifest entry, keyed by
+            its filepath.
+    """
+    path = _Path(path)
+    tmp_path: _Path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        _json.dump({"version": 1, "plugins": entries}, f, indent=2)
+    _os.replace(tmp_path, path)
+
+
+class PluginLoadError(Exception):
+    """
+    Raised when a plugin fails to load.
+    """
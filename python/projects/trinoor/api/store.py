@@ -0,0 +1,261 @@
+"""
+A key-value store for plugin state which is shared by every worker process of the API.
+
+Values are stored as JSON in a SQLite database, so they're shared between processes
+and survive restarts. Each process and thread uses its own connection, opened the first
+time it's needed, so a store created before the API forks its workers is safe to use in
+each of them.
+
+## Example
+```python
+def register(api):
+    state = api.store.namespace("my_plugin")
+    state.set("last_push", {"branch": "main"})
+    state.incr("pushes")
+```
+"""
+import json as _json
+import os as _os
+import sqlite3 as _sqlite3
+import threading as _threading
+import time as _time
+from pathlib import Path as _Path
+from typing import Iterator as _Iterator
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS store (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+# Marks a missing default, since None is a valid value
+_MISSING: object = object()
+
+
+class SharedStore:
+    """
+    A process-safe, SQLite-backed store of JSON values, grouped into namespaces.
+    """
+
+    def __init__(self, database: str | _Path, timeout: float = 30.0) -> None:
+        """
+        Args:
+            database (str | Path): The path to the SQLite database.
+            timeout (float, optional): The number of seconds to wait for another
+                process to finish writing. Defaults to 30.
+        """
+        self.database: _Path = _Path(database)
+        self.timeout: float = timeout
+        self._local: _threading.local = _threading.local()
+        # Create the table up front, so workers don't race to do it
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> _sqlite3.Connection:
+        """
+        Returns this thread's connection, opening a new one in a new process since
+        SQLite connections can't be shared across a fork.
+        """
+        local: _threading.local = self._local
+        if getattr(local, "pid", None) != _os.getpid():
+            local.connection = _sqlite3.connect(
+                self.database, timeout=self.timeout, isolation_level=None
+            )
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.pid = _os.getpid()
+        return local.connection
+
+    def get(self, key: str, default: object = None, namespace: str = "") -> object:
+        """
+        Returns a value.
+
+        Args:
+            key (str): The value's key.
+            default (object, optional): Returned if there's no value. Defaults to None.
+            namespace (str, optional): The value's namespace. Defaults to "".
+
+        Returns:
+            object: The value, or `default`.
+        """
+        row: tuple = (
+            self._connection()
+            .execute(
+                "SELECT value FROM store WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            .fetchone()
+        )
+        return default if row is None else _json.loads(row[0])
+
+    def set(self, key: str, value: object, namespace: str = "") -> None:
+        """
+        Sets a value.
+
+        Args:
+            key (str): The value's key.
+            value (object): The value, which must be JSON serializable.
+            namespace (str, optional): The value's namespace. Defaults to "".
+        """
+        self._connection().execute(
+            "INSERT INTO store (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            "value = excluded.value, updated_at = excluded.updated_at",
+            (namespace, key, _json.dumps(value), _time.time()),
+        )
+
+    def setdefault(self, key: str, value: object, namespace: str = "") -> object:
+        """
+        Sets a value if there isn't one already, atomically.
+
+        Args:
+            key (str): The value's key.
+            value (object): The value, which must be JSON serializable.
+            namespace (str, optional): The value's namespace. Defaults to "".
+
+        Returns:
+            object: The value that's now stored.
+        """
+        connection: _sqlite3.Connection = self._connection()
+        connection.execute(
+            "INSERT OR IGNORE INTO store (namespace, key, value, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            (namespace, key, _json.dumps(value), _time.time()),
+        )
+        return self.get(key, namespace=namespace)
+
+    def incr(self, key: str, amount: int | float = 1, namespace: str = "") -> object:
+        """
+        Adds to a numeric value atomically, starting from 0 if there isn't one.
+
+        Args:
+            key (str): The value's key.
+            amount (int | float, optional): The amount to add. Defaults to 1.
+            namespace (str, optional): The value's namespace. Defaults to "".
+
+        Returns:
+            int | float: The new value.
+        """
+        (value,) = (
+            self._connection()
+            .execute(
+                "INSERT INTO store (namespace, key, value, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET "
+                "value = value + excluded.value, updated_at = excluded.updated_at "
+                "RETURNING value",
+                (namespace, key, amount, _time.time()),
+            )
+            .fetchone()
+        )
+        return _json.loads(value) if isinstance(value, str) else value
+
+    def delete(self, key: str, namespace: str = "") -> bool:
+        """
+        Deletes a value.
+
+        Args:
+            key (str): The value's key.
+            namespace (str, optional): The value's namespace. Defaults to "".
+
+        Returns:
+            bool: True if there was a value to delete.
+        """
+        cursor: _sqlite3.Cursor = self._connection().execute(
+            "DELETE FROM store WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        return cursor.rowcount > 0
+
+    def items(self, namespace: str = "") -> _Iterator[tuple[str, object]]:
+        """
+        Yields the key and value of everything in a namespace.
+
+        Args:
+            namespace (str, optional): The namespace. Defaults to "".
+        """
+        cursor: _sqlite3.Cursor = self._connection().execute(
+            "SELECT key, value FROM store WHERE namespace = ? ORDER BY key",
+            (namespace,),
+        )
+        for key, value in cursor:
+            yield key, _json.loads(value)
+
+    def clear(self, namespace: str = "") -> int:
+        """
+        Deletes everything in a namespace.
+
+        Args:
+            namespace (str, optional): The namespace. Defaults to "".
+
+        Returns:
+            int: The number of values deleted.
+        """
+        cursor: _sqlite3.Cursor = self._connection().execute(
+            "DELETE FROM store WHERE namespace = ?", (namespace,)
+        )
+        return cursor.rowcount
+
+    def namespace(self, namespace: str) -> "StoreNamespace":
+        """
+        Returns a view of the store limited to a single namespace, e.g. for a plugin.
+
+        Args:
+            namespace (str): The namespace.
+
+        Returns:
+            StoreNamespace: The view.
+        """
+        return StoreNamespace(self, namespace)
+
+
+class StoreNamespace:
+    """
+    A view of a `SharedStore` limited to a single namespace.
+    """
+
+    def __init__(self, store: SharedStore, namespace: str) -> None:
+        self.store: SharedStore = store
+        self.namespace: str = namespace
+
+    def get(self, key: str, default: object = None) -> object:
+        return self.store.get(key, default, self.namespace)
+
+    def set(self, key: str, value: object) -> None:
+        self.store.set(key, value, self.namespace)
+
+    def setdefault(self, key: str, value: object) -> object:
+        return self.store.setdefault(key, value, self.namespace)
+
+    def incr(self, key: str, amount: int | float = 1) -> int | float:
+        return self.store.incr(key, amount, self.namespace)
+
+    def delete(self, key: str) -> bool:
+        return self.store.delete(key, self.namespace)
+
+    def items(self) -> _Iterator[tuple[str, object]]:
+        return self.store.items(self.namespace)
+
+    def clear(self) -> int:
+        return self.store.clear(self.namespace)
+
+    def __getitem__(self, key: str) -> object:
+        value: object = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __repr__(self) -> str:
+        return f"<StoreNamespace {self.namespace!r} of {self.store.database}>"
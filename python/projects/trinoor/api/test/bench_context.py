@@ -0,0 +1,102 @@
+"""
+Microbenchmark of the per-call overhead of the `@context` decorator.
+
+Compares a bare function call, the same call through a plain pass-through decorator,
+and calls through `@context` with a condition and/or expected keyword arguments. The
+old implementation, which built a dictionary of every argument on each call, is
+included for reference.
+
+Usage:
+    python -m trinoor.api.test.bench_context [-n NUMBER] [-r REPEAT]
+"""
+from argparse import ArgumentParser
+from functools import wraps
+from timeit import repeat
+
+from trinoor.api.plugins import context
+
+
+def bare(data, hello="world", *args, **kwargs):
+    return data
+
+
+def passthrough(func):
+    """A decorator which does nothing but call the function."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def dict_context(condition=None, **expected):
+    """The previous `@context` implementation, for reference."""
+
+    def decorator(func):
+        def check_args(*args, **kwargs):
+            arg_dict = {
+                **{arg: val for arg, val in zip(func.__code__.co_varnames, args)},
+                **kwargs,
+            }
+            if condition is not None:
+                names = condition.__code__.co_varnames[: condition.__code__.co_argcount]
+                if not all(arg in arg_dict for arg in names):
+                    return False
+                if not condition(*[arg_dict[arg] for arg in names]):
+                    return False
+            if expected:
+                if not all(arg in arg_dict for arg in expected):
+                    return False
+                if not all(arg_dict[arg] == val for arg, val in expected.items()):
+                    return False
+            return True
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if check_args(*args, **kwargs):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def is_bar(data):
+    return data["data"] == "bar"
+
+
+CASES: dict[str, object] = {
+    "bare call": bare,
+    "pass-through decorator": passthrough(bare),
+    "@context(condition)": context(is_bar)(bare),
+    "@context(hello=...)": context(hello="world")(bare),
+    "@context(condition, hello=...)": context(is_bar, hello="world")(bare),
+    "old @context(condition, hello=...)": dict_context(is_bar, hello="world")(bare),
+}
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--number", type=int, default=200000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload: dict[str, str] = {"data": "bar"}
+    baseline: float = None
+    for name, func in CASES.items():
+        # Best of several rounds, in nanoseconds per call
+        best: float = min(
+            repeat(
+                lambda: func(payload, hello="world"),
+                number=args.number,
+                repeat=args.repeat,
+            )
+        )
+        ns: float = best / args.number * 1e9
+        baseline = baseline or ns
+        print(f"{name:<36} {ns:8.1f} ns  {ns - baseline:+8.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark of the per-call cost of logging with `trinoor.debug` and `Logger`.
+
+Measures `debug()` when debug output is off and when it's on, `Logger.debug()` below
+the logger's level, and `Logger.info()` and `Logger.error()` with an exception writing
+directly to a handler or through `start_queue_logging()`. Output goes to os.devnull.
+The previous `debug()` caller lookup, which used `inspect.stack()`, is included for
+reference.
+
+Usage:
+    python -m trinoor.api.test.bench_logging [-n NUMBER] [-r REPEAT]
+"""
+import inspect
+import logging
+import os
+from argparse import ArgumentParser
+from timeit import repeat
+
+import trinoor.debug.core as debug_core
+from trinoor.api.log import Logger, start_queue_logging, stop_queue_logging
+
+
+def noop(*args, **kwargs):
+    pass
+
+
+def stack_caller():
+    """The previous `debug()` caller lookup, for reference."""
+    frame = inspect.stack()[1].frame
+    try:
+        info = inspect.getframeinfo(frame)
+        return info.filename, info.function, info.lineno
+    finally:
+        del frame
+
+
+def timed(func, number: int, rounds: int) -> float:
+    """Returns the best of several rounds, in nanoseconds per call."""
+    return min(repeat(func, number=number, repeat=rounds)) / number * 1e9
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    bench_logger = logging.getLogger("bench")
+    bench_logger.addHandler(handler)
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.propagate = False
+    logger = Logger("bench")
+    try:
+        raise ValueError("bench")
+    except ValueError as e:
+        error = e
+    payload = {"key": "ABC-123", "fields": list(range(20))}
+
+    results: dict[str, float] = {}
+    results["no-op call"] = timed(lambda: noop("x", payload), args.number, args.repeat)
+
+    debug_core.set_level(debug_core.LogLevel.DISABLED)
+    results["debug() off"] = timed(
+        lambda: debug_core.debug("x", payload), args.number, args.repeat
+    )
+    debug_core.set_level(debug_core.LogLevel.DEBUG)
+    results["debug() on"] = timed(
+        lambda: debug_core.debug("x", payload, file=devnull), args.number, args.repeat
+    )
+    results["old caller lookup (inspect.stack)"] = timed(
+        stack_caller, args.number // 10, args.repeat
+    )
+
+    results["Logger.debug() below level"] = timed(
+        lambda: logger.debug("x %s", payload), args.number, args.repeat
+    )
+    results["Logger.info() direct"] = timed(
+        lambda: logger.info("x %s", payload), args.number, args.repeat
+    )
+    results["Logger.error(exception) direct"] = timed(
+        lambda: logger.error("failed: %s", error), args.number // 10, args.repeat
+    )
+    listener = start_queue_logging("bench")
+    results["Logger.info() queued"] = timed(
+        lambda: logger.info("x %s", payload), args.number, args.repeat
+    )
+    results["Logger.error(exception) queued"] = timed(
+        lambda: logger.error("failed: %s", error), args.number // 10, args.repeat
+    )
+    stop_queue_logging(listener)
+
+    baseline: float = results["no-op call"]
+    for name, ns in results.items():
+        print(f"{name:<36} {ns:10.1f} ns  {ns - baseline:+10.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""
+A durable queue for webhooks, so that they can be acknowledged as soon as they're
+received and processed in the background.
+
+Webhooks are stored in a SQLite database until they've been processed, so none are lost
+if the API restarts. They're processed by a bounded pool of worker threads, in order for
+webhooks with the same key (e.g. a Jira issue key) and concurrently otherwise. A webhook
+whose handler raises is retried with exponential backoff, and a webhook that's delivered
+again (e.g. retried by the sender after a timeout) is only processed once. Several
+processes can share a queue's database, e.g. the workers of a pre-fork server; each
+webhook is still claimed by only one of them. A webhook whose process exits while
+processing it, or that's still running when its lease expires, is claimed again.
+
+## Example
+```python
+from trinoor.ado.jira_ado import recieve_webhook, webhook_key
+
+api.add_webhook_queue(
+    "/ado/webhook", recieve_webhook, "webhooks.sqlite3", key=webhook_key
+)
+```
+"""
+import asyncio as _asyncio
+import hashlib as _hashlib
+import inspect as _inspect
+import json as _json
+import os as _os
+import random as _random
+import sqlite3 as _sqlite3
+import threading as _threading
+import time as _time
+from collections import deque as _deque
+from pathlib import Path as _Path
+from statistics import quantiles as _quantiles
+from typing import Callable as _Callable
+
+from .log import Logger
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS webhooks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    delivery_id TEXT NOT NULL UNIQUE,
+    key TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    received_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT,
+    claimed_by INTEGER,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS webhooks_status ON webhooks (status, id);
+CREATE INDEX IF NOT EXISTS webhooks_key ON webhooks (key, id)
+    WHERE status IN ('pending', 'running');
+"""
+
+# Columns added since the first version of the schema, for existing databases
+_ADDED_COLUMNS: dict[str, str] = {
+    "claimed_by": "INTEGER",
+    "lease_until": "REAL",
+}
+
+# Marks the oldest pending webhook that's due and whose key has no earlier unfinished
+# webhook as running by a process until its lease expires, in one statement so
+# processes sharing the queue can't both claim it
+_CLAIM: str = """
+UPDATE webhooks SET status = 'running', claimed_by = ?, lease_until = ? WHERE id = (
+    SELECT id FROM webhooks AS w
+    WHERE status = 'pending' AND available_at <= ? AND (
+        key IS NULL OR NOT EXISTS (
+            SELECT 1 FROM webhooks WHERE key = w.key AND id < w.id
+            AND status IN ('pending', 'running')
+        )
+    )
+    ORDER BY id LIMIT 1
+)
+RETURNING id, key, payload, attempts, received_at
+"""
+
+# Requeues running webhooks whose lease has expired or whose process has exited,
+# counting the lost run as an attempt, or marks them as failed after the last attempt
+_RECLAIM: str = """
+UPDATE webhooks SET
+    status = CASE WHEN attempts + 1 >= :max_attempts THEN 'failed' ELSE 'pending' END,
+    attempts = attempts + 1,
+    available_at = :now,
+    finished_at = CASE WHEN attempts + 1 >= :max_attempts THEN :now END,
+    error = 'Abandoned by process ' || claimed_by,
+    claimed_by = NULL,
+    lease_until = NULL
+WHERE status = 'running' AND (
+    claimed_by IS NULL OR lease_until IS NULL OR lease_until < :now
+    OR claimed_by IN ({dead})
+)
+RETURNING id, key, status
+"""
+
+# The number of recent latencies kept for the percentiles in `metrics()`
+_LATENCY_SAMPLES: int = 1000
+
+# The number of seconds between checks for webhooks abandoned by their process
+_RECLAIM_INTERVAL: float = 10.0
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a webhook is added to a queue that already holds `max_depth` unfinished
+    webhooks.
+    """
+
+    pass
+
+
+def payload_id(payload: object) -> str:
+    """
+    Returns an ID for a webhook payload: its "id" field if it has one (as Azure DevOps
+    and Jira webhooks do), otherwise a hash of its contents.
+
+    Args:
+        payload (object): The webhook's JSON payload.
+
+    Returns:
+        str: The ID, which is the same each time the webhook is delivered.
+    """
+    if isinstance(payload, dict) and payload.get("id") is not None:
+        return str(payload["id"])
+    body: bytes = _json.dumps(payload, sort_keys=True).encode()
+    return _hashlib.sha256(body).hexdigest()
+
+
+class WebhookQueue:
+    """
+    A SQLite-backed queue of webhooks processed by a pool of worker threads.
+    """
+
+    def __init__(
+        self,
+        database: str | _Path,
+        handler: _Callable,
+        key: _Callable[[object], str] = None,
+        delivery_id: _Callable[[object], str] = payload_id,
+        workers: int = 4,
+        max_depth: int = 10000,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        retention: float = 86400.0,
+        lease: float = 3600.0,
+        logger: Logger = None,
+    ) -> None:
+        """
+        Args:
+            database (str | Path): The path to the SQLite database.
+            handler (Callable): Called with each webhook's payload. May be a coroutine
+                function, or return an awaitable, in which case it's run to completion
+                in the worker thread. A webhook is retried if this raises.
+            key (Callable[[object], str], optional): Returns the key of a payload.
+                Webhooks with the same key are processed one at a time, in the order
+                they were received. Defaults to None (no ordering).
+            delivery_id (Callable[[object], str], optional): Returns the ID of a
+                payload, which must be the same each time it's delivered. Defaults to
+                `payload_id()`.
+            workers (int, optional): The number of worker threads. Defaults to 4.
+            max_depth (int, optional): The maximum number of unfinished webhooks.
+                Defaults to 10000.
+            max_attempts (int, optional): The number of times a webhook is attempted
+                before it's marked as failed. Defaults to 5.
+            backoff (float, optional): The number of seconds before the first retry,
+                doubled for each retry after that. Defaults to 1.
+            max_backoff (float, optional): The maximum number of seconds between
+                retries. Defaults to 300.
+            retention (float, optional): The number of seconds finished webhooks are
+                kept, so that redeliveries are recognized. Defaults to 86400 (one day).
+            lease (float, optional): The number of seconds a webhook can be processed
+                for before it's assumed to be lost and is claimed again. Webhooks
+                whose process exits are claimed again sooner. Defaults to 3600.
+            logger (Logger, optional): The logger for failed webhooks. Defaults to a
+                new Logger.
+        """
+        self.database: _Path = _Path(database)
+        self.handler: _Callable = handler
+        self.key: _Callable[[object], str] = key
+        self.delivery_id: _Callable[[object], str] = delivery_id
+        self.workers: int = workers
+        self.max_depth: int = max_depth
+        self.max_attempts: int = max_attempts
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.retention: float = retention
+        self.lease: float = lease
+        self.logger: Logger = logger or Logger()
+
+        self._connect()
+        self._db.executescript(_SCHEMA)
+        columns: set[str] = {
+            row[1] for row in self._db.execute("PRAGMA table_info(webhooks)")
+        }
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in columns:
+                self._db.execute(
+                    f"ALTER TABLE webhooks ADD COLUMN {column} {column_type}"
+                )
+        # Guards the connection, and wakes workers when webhooks are added or finished.
+        # Workers in other processes sharing the database poll instead
+        self._condition: _threading.Condition = _threading.Condition()
+        self._threads: list[_threading.Thread] = []
+        self._stopping: bool = False
+        self._purged: float = 0.0
+        self._reclaimed: float = 0.0
+
+        # Counters and recent timings for `metrics()`
+        self._received: int = 0
+        self._duplicates: int = 0
+        self._processed: int = 0
+        self._retries: int = 0
+        self._failures: int = 0
+        self._latencies: _deque[float] = _deque(maxlen=_LATENCY_SAMPLES)
+        self._durations: _deque[float] = _deque(maxlen=_LATENCY_SAMPLES)
+
+    def _connect(self) -> None:
+        """
+        Opens the database connection for this process.
+        """
+        self._pid: int = _os.getpid()
+        self._db: _sqlite3.Connection = _sqlite3.connect(
+            self.database, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+
+    def put(self, payload: object) -> bool:
+        """
+        Adds a webhook to the queue.
+
+        Args:
+            payload (object): The webhook's JSON payload.
+
+        Raises:
+            QueueFullError: If the queue already holds `max_depth` unfinished webhooks.
+
+        Returns:
+            bool: True if the webhook was added, False if it was already received.
+        """
+        delivery_id: str = self.delivery_id(payload)
+        key: str = self.key(payload) if self.key else None
+        now: float = _time.time()
+        with self._condition:
+            (depth,) = self._db.execute(
+                "SELECT COUNT(*) FROM webhooks WHERE status IN ('pending', 'running')"
+            ).fetchone()
+            if depth >= self.max_depth:
+                raise QueueFullError(f"Webhook queue is full ({depth} webhooks)")
+            cursor: _sqlite3.Cursor = self._db.execute(
+                "INSERT OR IGNORE INTO webhooks "
+                "(delivery_id, key, payload, available_at, received_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (delivery_id, key, _json.dumps(payload), now, now),
+            )
+            self._received += 1
+            if not cursor.rowcount:
+                self._duplicates += 1
+                return False
+            self._condition.notify()
+        return True
+
+    def start(self) -> None:
+        """
+        Starts the worker threads. Does nothing if they're already running.
+        """
+        if self._pid != _os.getpid():
+            # Forked since the queue was created (e.g. as a worker of a pre-fork
+            # server), so the connection, lock, and threads are the parent's
+            self._connect()
+            self._condition = _threading.Condition()
+            self._threads = []
+        if self._threads:
+            return
+        self._stopping = False
+        # Webhooks that were being processed by a process that has since exited
+        # (e.g. before a restart, or a crashed worker) are retried
+        with self._condition:
+            self._reclaim(force=True)
+        for i in range(self.workers):
+            thread: _threading.Thread = _threading.Thread(
+                target=self._work, name=f"webhook-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stops the worker threads after they finish their current webhooks. Webhooks
+        still in the queue are processed when the queue is started again.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait for each
+                worker. Defaults to None (no limit).
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self) -> tuple[int, str, object, int, float] | None:
+        """
+        Marks the next webhook that can be processed as running. Must be called with
+        the condition held.
+
+        Returns:
+            tuple[int, str, object, int, float] | None: The webhook's row ID, key,
+                payload, attempts so far, and when it was received, or None if no
+                webhook can be processed yet.
+        """
+        now: float = _time.time()
+        row: tuple = self._db.execute(
+            _CLAIM, (_os.getpid(), now + self.lease, now)
+        ).fetchone()
+        if row is None:
+            return None
+        row_id, key, payload, attempts, received_at = row
+        return row_id, key, _json.loads(payload), attempts, received_at
+
+    def _next_due(self) -> float:
+        """
+        Returns the number of seconds until the next retry is due, at most 1. Must be
+        called with the condition held.
+        """
+        (available_at,) = self._db.execute(
+            "SELECT MIN(available_at) FROM webhooks WHERE status = 'pending'"
+        ).fetchone()
+        if available_at is None:
+            return 1.0
+        return min(max(available_at - _time.time(), 0.01), 1.0)
+
+    def _work(self) -> None:
+        """
+        Processes webhooks until the queue is stopped.
+        """
+        while True:
+            with self._condition:
+                claimed = None
+                while not self._stopping:
+                    claimed = self._claim()
+                    if claimed is not None:
+                        break
+                    self._purge()
+                    if self._reclaim():
+                        continue
+                    self._condition.wait(self._next_due())
+                if claimed is None:
+                    return
+            self._process(*claimed)
+
+    def _process(
+        self, row_id: int, key: str, payload: object, attempts: int, received_at: float
+    ) -> None:
+        """
+        Runs the handler on a claimed webhook and records the outcome.
+        """
+        start: float = _time.time()
+        error: Exception = None
+        try:
+            result: object = self.handler(payload)
+            if _inspect.isawaitable(result):
+                _asyncio.run(_await(result))
+        except Exception as e:
+            error = e
+        finished: float = _time.time()
+        attempts += 1
+
+        with self._condition:
+            if error is None:
+                self._db.execute(
+                    "UPDATE webhooks SET status = 'done', attempts = ?, "
+                    "finished_at = ?, error = NULL WHERE id = ?",
+                    (attempts, finished, row_id),
+                )
+                self._processed += 1
+                self._latencies.append(finished - received_at)
+            elif attempts >= self.max_attempts:
+                self._db.execute(
+                    "UPDATE webhooks SET status = 'failed', attempts = ?, "
+                    "finished_at = ?, error = ? WHERE id = ?",
+                    (attempts, finished, repr(error), row_id),
+                )
+                self._failures += 1
+                self.logger.error(
+                    f"Webhook {row_id} (key {key}) failed after {attempts} attempts: "
+                    f"{error!r}"
+                )
+            else:
+                # Exponential backoff with jitter, so retries of a burst spread out
+                delay: float = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+                delay *= _random.uniform(0.5, 1.0)
+                self._db.execute(
+                    "UPDATE webhooks SET status = 'pending', attempts = ?, "
+                    "available_at = ?, error = ? WHERE id = ?",
+                    (attempts, finished + delay, repr(error), row_id),
+                )
+                self._retries += 1
+            self._durations.append(finished - start)
+            # A later webhook with the same key may be able to run now
+            self._condition.notify_all()
+
+    def _reclaim(self, force: bool = False) -> int:
+        """
+        Requeues running webhooks whose lease has expired or whose process has exited,
+        at most once every `_RECLAIM_INTERVAL` seconds unless forced. Must be called
+        with the condition held.
+
+        Returns:
+            int: The number of webhooks requeued or failed.
+        """
+        now: float = _time.time()
+        if not force and now - self._reclaimed < _RECLAIM_INTERVAL:
+            return 0
+        self._reclaimed = now
+        pids: list[int] = [
+            pid
+            for (pid,) in self._db.execute(
+                "SELECT DISTINCT claimed_by FROM webhooks "
+                "WHERE status = 'running' AND claimed_by IS NOT NULL"
+            )
+        ]
+        dead: list[int] = [pid for pid in pids if not _pid_exists(pid)]
+        rows: list[tuple] = self._db.execute(
+            _RECLAIM.format(dead=", ".join(f":dead{i}" for i in range(len(dead)))),
+            {
+                "max_attempts": self.max_attempts,
+                "now": now,
+                **{f"dead{i}": pid for i, pid in enumerate(dead)},
+            },
+        ).fetchall()
+        for row_id, key, status in rows:
+            if status == "failed":
+                self._failures += 1
+                self.logger.error(
+                    f"Webhook {row_id} (key {key}) failed after {self.max_attempts} "
+                    "attempts: abandoned by its process"
+                )
+            else:
+                self._retries += 1
+        if rows:
+            self._condition.notify_all()
+        return len(rows)
+
+    def _purge(self) -> None:
+        """
+        Deletes finished webhooks older than `retention`, at most once a minute. Must be
+        called with the condition held.
+        """
+        now: float = _time.time()
+        if now - self._purged < 60:
+            return
+        self._purged = now
+        self._db.execute(
+            "DELETE FROM webhooks WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (now - self.retention,),
+        )
+
+    def retry_failed(self) -> int:
+        """
+        Queues every failed webhook to be attempted again.
+
+        Returns:
+            int: The number of webhooks queued.
+        """
+        with self._condition:
+            cursor: _sqlite3.Cursor = self._db.execute(
+                "UPDATE webhooks SET status = 'pending', attempts = 0, "
+                "available_at = ?, finished_at = NULL WHERE status = 'failed'",
+                (_time.time(),),
+            )
+            self._condition.notify_all()
+        return cursor.rowcount
+
+    def metrics(self) -> dict[str, object]:
+        """
+        Returns the queue's depth, counters, and recent processing times.
+
+        Returns:
+            dict[str, object]: The number of pending, running, and failed webhooks; the
+                age in seconds of the oldest pending webhook; the number of webhooks
+                received, duplicates ignored, processed, retried, and failed since the
+                queue was created; and the 50th, 95th, and 99th percentiles of the
+                seconds from receipt to completion (`latency`) and spent in the handler
+                (`duration`) for recent webhooks.
+        """
+        with self._condition:
+            counts: dict[str, int] = dict(
+                self._db.execute(
+                    "SELECT status, COUNT(*) FROM webhooks GROUP BY status"
+                ).fetchall()
+            )
+            (oldest,) = self._db.execute(
+                "SELECT MIN(received_at) FROM webhooks WHERE status = 'pending'"
+            ).fetchone()
+            latencies: list[float] = list(self._latencies)
+            durations: list[float] = list(self._durations)
+            return {
+                "pending": counts.get("pending", 0),
+                "running": counts.get("running", 0),
+                "failed": counts.get("failed", 0),
+                "oldest_pending_seconds": (
+                    _time.time() - oldest if oldest is not None else None
+                ),
+                "received": self._received,
+                "duplicates": self._duplicates,
+                "processed": self._processed,
+                "retries": self._retries,
+                "failures": self._failures,
+                "workers": len(self._threads),
+                "latency": _percentiles(latencies),
+                "duration": _percentiles(durations),
+            }
+
+    def close(self) -> None:
+        """
+        Stops the workers and closes the database.
+        """
+        self.stop()
+        self._db.close()
+
+
+def _pid_exists(pid: int) -> bool:
+    """
+    Returns whether a process is running on this machine.
+    """
+    if pid == _os.getpid() or _os.name == "nt":
+        # Signal 0 terminates the process on Windows, so rely on the lease there
+        return True
+    try:
+        _os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # e.g. the process belongs to another user
+        pass
+    return True
+
+
+async def _await(awaitable: object) -> object:
+    """
+    Awaits any awaitable, since `asyncio.run()` only accepts coroutines.
+    """
+    return await awaitable
+
+
+def _percentiles(samples: list[float]) -> dict[str, float] | None:
+    """
+    Returns the 50th, 95th, and 99th percentiles of the samples, or None if there
+    aren't any.
+    """
+    if not samples:
+        return None
+    if len(samples) == 1:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0]}
+    cuts: list[float] = _quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
@@ -0,0 +1,4 @@
+from .interactive import ask_for_shell
+from .core import debug, enabled, set_level
+
+__all__ = ["ask_for_shell", "debug", "enabled", "set_level"]
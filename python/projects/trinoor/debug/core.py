@@ -0,0 +1,234 @@
+import os as _os
+import traceback as _traceback
+import sys as _sys
+import time as _time
+from enum import Enum as _Enum
+from types import FrameType as _Frame
+
+
+class LogLevel(_Enum):
+    """
+    Enum for logging levels
+    """
+
+    DEBUG = 0
+    INFO = 1
+    WARNING = 2
+    ERROR = 3
+    CRITICAL = 4
+    DISABLED = 5
+
+    def __gt__(self, other: object) -> bool:
+        return self.value > other.value
+
+    def __ge__(self, other: object) -> bool:
+        return self.value >= other.value
+
+    def __lt__(self, other: object) -> bool:
+        return self.value < other.value
+
+    def __le__(self, other: object) -> bool:
+        return self.value <= other.value
+
+    def __eq__(self, other: object) -> bool:
+        return self.value == other.value
+
+    def __ne__(self, other: object) -> bool:
+        return self.value != other.value
+
+
+LEVEL: LogLevel = LogLevel.DEBUG
+# The values of LEVEL and each level, so checking whether a message is logged doesn't
+# go through the enum, which is slow
+_LEVEL_VALUE: int = LEVEL.value
+_DEBUG: int = LogLevel.DEBUG.value
+_INFO: int = LogLevel.INFO.value
+_WARNING: int = LogLevel.WARNING.value
+_ERROR: int = LogLevel.ERROR.value
+_CRITICAL: int = LogLevel.CRITICAL.value
+
+
+def set_level(level: LogLevel | int) -> None:
+    """
+    Set the logging level
+
+    Args:
+        level (LogLevel | int): Logging level
+    """
+    global LEVEL, _LEVEL_VALUE
+    # Verify that the level is valid
+    try:
+        if isinstance(level, LogLevel):
+            pass
+        elif isinstance(level, int):
+            level = LogLevel(level)
+        elif isinstance(level, str):
+            level = LogLevel[level.upper()]
+        else:
+            raise ValueError(f"Invalid logging level '{level}'")
+    except (ValueError, KeyError) as e:
+        valid_levels: str = ", ".join([l.name for l in LogLevel])
+        raise ValueError(
+            f"Invalid logging level '{level}', must be one of {valid_levels}"
+        ) from e
+    LEVEL = LogLevel(level)
+    _LEVEL_VALUE = LEVEL.value
+
+
+def enabled(level: LogLevel = LogLevel.DEBUG) -> bool:
+    """
+    Check whether messages at a logging level are printed, e.g. to skip building an
+    expensive message
+
+    Args:
+        level (LogLevel, optional): Logging level. Defaults to LogLevel.DEBUG.
+
+    Returns:
+        bool: True if messages at the level are printed
+    """
+    return level._value_ >= _LEVEL_VALUE
+
+
+def log(
+    *args: object,
+    sep: str = " ",
+    end: str = "\n",
+    file: object = _sys.stderr,
+    flush: bool = True,
+    level: LogLevel = LogLevel.DEBUG,
+    expand_tb: bool = True,
+    include_stack: bool = False,
+    include_caller: bool = True,
+    include_fullpath: bool = True,
+    strftime: str = "%Y-%m-%d %H:%M:%S",
+    _stack_offset: int = 1,
+) -> None:
+    """
+    Print a message to stderr if the logging level is set to DEBUG
+
+    Args:
+        *args (object): Objects / strings to print.
+        sep (str, optional): Separator between objects. Defaults to " ".
+        end (str, optional): End of line character. Defaults to "\n".
+        file (object, optional): File to print to. Defaults to sys.stderr.
+        flush (bool, optional): Flush the file after printing. Defaults to False.
+        level (LogLevel, optional): Logging level. Defaults to LogLevel.DEBUG.
+        expand_tb (bool, optional): If there are any exceptions passed as arguments,
+            expand them to their full traceback. Defaults to False.
+        include_stack (bool, optional): Include the stack trace. Defaults to False.
+        include_caller (bool, optional): Include the caller. Defaults to True.
+        include_fullpath (bool, optional): Include the full filepath to the caller.
+            Defaults to True.
+        strftime (str, optional): Format string for the timestamp. Defaults to
+            "%Y-%m-%d %H:%M:%S".
+    """
+    if level._value_ < _LEVEL_VALUE:
+        return
+    timestamp: str = _time.strftime(strftime)
+    # Build the whole message first, so it's written at once and messages from
+    # different threads don't interleave
+    parts: list[str] = []
+    if include_caller:
+        # Get the caller's filename, function name, and line number. Only the caller's
+        # frame is needed, so don't build the whole stack like inspect.stack() does
+        frame: _Frame = _sys._getframe(_stack_offset)
+        try:
+            filename: str = frame.f_code.co_filename
+            if not include_fullpath:
+                filename = filename.split(_os.path.sep)[-1]
+            funcname: str = frame.f_code.co_name
+            lineno: int = frame.f_lineno
+        finally:
+            del frame
+        parts.append(f"[{timestamp}] {filename}:{funcname}:{lineno}")
+    # Convert any tracebacks to full strings if expand_tb is True
+    if expand_tb:
+        args = [
+            (
+                "".join(_traceback.format_exception(type(arg), arg, arg.__traceback__))
+                if isinstance(arg, Exception)
+                else arg
+            )
+            for arg in args
+        ]
+    # Prefix every line of the message with a timestamp if there is more than one line
+    lines: list[str] = str(sep.join(map(str, args))).splitlines()
+    if len(lines) > 1:
+        lines = [f"[{timestamp}] {line}" for line in lines]
+        parts.append("\n")
+    else:
+        parts.append(" -- ")
+    parts.append("\n".join(lines))
+    parts.append(end)
+    if include_stack:
+        # Get the stack *excluding* this function call
+        stack = _traceback.extract_stack(_sys._getframe(_stack_offset))
+        parts.append("Debug Stack:\n")
+        parts.extend(_traceback.format_list(stack))
+    file.write("".join(parts))
+    if flush:
+        file.flush()
+
+
+def debug(*args: object, **kwargs: object) -> None:
+    """
+    Print a message to stderr with the DEBUG level
+
+    Args:
+        *args (object): Objects / strings to print.
+        **kwargs (object): Keyword arguments to pass to debug()
+    """
+    if _DEBUG >= _LEVEL_VALUE:
+        log(*args, level=LogLevel.DEBUG, _stack_offset=2, **kwargs)
+
+
+def info(*args: object, **kwargs: object) -> None:
+    """
+    Print a message to stderr with the INFO level
+
+    Args:
+        *args (object): Objects / strings to print.
+        **kwargs (object): Keyword arguments to pass to debug()
+    """
+    if _INFO >= _LEVEL_VALUE:
+        log(*args, level=LogLevel.INFO, _stack_offset=2, **kwargs)
+
+
+def warn(*args: object, **kwargs: object) -> None:
+    """
+    Print a message to stderr with the WARNING level
+
+    Args:
+        *args (object): Objects / strings to print.
+        **kwargs (object): Keyword arguments to pass to debug()
+    """
+    if _WARNING >= _LEVEL_VALUE:
+        log(*args, level=LogLevel.WARNING, _stack_offset=2, **kwargs)
+
+
+def error(*args: object, **kwargs: object) -> None:
+    """
+    Print a message to stderr with the ERROR level
+
+    Args:
+        *args (object): Objects / strings to print.
+        **kwargs (object): Keyword arguments to pass to debug()
+    """
+    if _ERROR >= _LEVEL_VALUE:
+        log(*args, level=LogLevel.ERROR, _stack_offset=2, **kwargs)
+
+
+def critical(*args: object, **kwargs: object) -> None:
+    """
+    Print a message to stderr with the CRITICAL level
+
+    Args:
+        *args (object): Objects / strings to print.
+        **kwargs (object): Keyword arguments to pass to debug()
+    """
+    if _CRITICAL >= _LEVEL_VALUE:
+        log(*args, level=LogLevel.CRITICAL, _stack_offset=2, **kwargs)
+
+
+def _test():
+    debug("hello world")
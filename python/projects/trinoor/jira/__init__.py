@@ -0,0 +1,781 @@
+import json as _json
+import os as _os
+import re as _re
+import textwrap
+import threading as _threading
+import time
+from collections import deque as _deque
+from concurrent.futures import (
+    Future as _Future,
+    ThreadPoolExecutor as _ThreadPoolExecutor,
+)
+from pathlib import Path as _Path
+
+from jira import JIRA as _JIRA
+from jira import Issue as _Issue
+from jira.exceptions import JIRAError as _JIRAError
+from typing import Callable, Iterable, Literal, Iterator
+
+from .mirror import IssueMirror
+
+_instance_url: str = "https://trinoorsupport.atlassian.net"
+
+# The most issues Jira Cloud returns from one bulk fetch, and the most issue IDs it
+# lists in one page of a search that doesn't request any fields
+_BULK_FETCH_MAX: int = 100
+_ID_PAGE_SIZE: int = 5000
+# How many times a page is retried after being rate limited
+_RATE_LIMIT_RETRIES: int = 8
+
+# How long field metadata is cached for, in seconds, and where it's saved between runs
+_FIELD_CACHE_TTL: float = 3600.0
+_FIELD_CACHE_DIR: _Path = _Path.home() / ".cache" / "trinoor" / "jira"
+# Cached field metadata older than this, in seconds, is refreshed when a field isn't
+# found in it. Newer metadata isn't, so a missing field doesn't refresh it every time
+_FIELD_MISS_REFRESH: float = 60.0
+
+# Field metadata loaded by any JIRA client in this process, by server URL
+_field_cache: dict[str, "FieldMetadata"] = {}
+_field_cache_lock: _threading.Lock = _threading.Lock()
+
+
+class _AdaptiveLimit:
+    """
+    Bounds the number of concurrent requests. The bound is halved, and new requests
+    wait, when the server rate limits a request, then grows back by one after each
+    `limit` requests that succeed.
+    """
+
+    def __init__(self, maximum: int) -> None:
+        self.maximum: int = max(maximum, 1)
+        self.limit: int = self.maximum
+        self.active: int = 0
+        self._successes: int = 0
+        self._paused_until: float = 0.0
+        self._condition: _threading.Condition = _threading.Condition()
+
+    def __enter__(self) -> "_AdaptiveLimit":
+        with self._condition:
+            while True:
+                wait: float = self._paused_until - time.monotonic()
+                if wait <= 0 and self.active < self.limit:
+                    break
+                self._condition.wait(wait if wait > 0 else None)
+            self.active += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        with self._condition:
+            self.active -= 1
+            if exc_type is None:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(self.limit + 1, self.maximum)
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def throttle(self, retry_after: float) -> None:
+        """
+        Halves the bound and pauses new requests after a rate limited request.
+
+        Args:
+            retry_after (float): The seconds the server asked the client to wait.
+        """
+        with self._condition:
+            self.limit = max(self.limit // 2, 1)
+            self._successes = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+class FieldMetadata:
+    """
+    The fields of a Jira server, with maps between their names and IDs.
+    """
+
+    def __init__(self, fields: list[dict[str, object]], loaded_at: float) -> None:
+        """
+        Args:
+            fields (list[dict[str, object]]): The fields, as returned by the REST API.
+            loaded_at (float): When the fields were downloaded, as a Unix timestamp.
+        """
+        self.fields: list[dict[str, object]] = fields
+        self.loaded_at: float = loaded_at
+        # Field IDs by name. Names aren't unique, so the first field with a name wins
+        self.ids: dict[str, str] = {}
+        # Field names by ID
+        self.names: dict[str, str] = {}
+        for field in fields:
+            self.ids.setdefault(field["name"], field["id"])
+            self.names[field["id"]] = field["name"]
+
+    def age(self) -> float:
+        """
+        Return how long ago the fields were downloaded, in seconds.
+        """
+        return time.time() - self.loaded_at
+
+
+class JIRA(_JIRA):
+    def __init__(
+        self,
+        email: str,
+        token: str,
+        instance_url: str = _instance_url,
+        field_cache_ttl: float = _FIELD_CACHE_TTL,
+        field_cache_dir: str | _Path | None = _FIELD_CACHE_DIR,
+    ) -> None:
+        """
+        Args:
+            email (str): The email address to authenticate with.
+            token (str): The API token to authenticate with.
+            instance_url (str, optional): The Jira server's URL. Defaults to the
+                Trinoor support instance.
+            field_cache_ttl (float, optional): How long field metadata is cached for,
+                in seconds. Defaults to 1 hour.
+            field_cache_dir (str | Path | None, optional): The directory field
+                metadata is saved in between runs, or None to only cache it in memory.
+                Defaults to ~/.cache/trinoor/jira.
+        """
+        self.field_cache_ttl: float = field_cache_ttl
+        self.field_cache_dir: _Path | None = (
+            None if field_cache_dir is None else _Path(field_cache_dir)
+        )
+        super().__init__({"server": instance_url}, basic_auth=(email, token))
+        # A local copy of issues, if one has been opened with open_mirror()
+        self.mirror: IssueMirror = None
+
+    def open_mirror(self, database: str | _Path) -> "IssueMirror":
+        """
+        Open a local SQLite mirror of issues, which `cached_issue()` reads from. Use
+        `IssueMirror.sync()` to download issues into it.
+
+        Args:
+            database (str | Path): The path to the SQLite database.
+
+        Returns:
+            IssueMirror: The mirror.
+        """
+        self.mirror = IssueMirror(self, database)
+        return self.mirror
+
+    def cached_issue(self, issue_key: _Issue | str) -> _Issue:
+        """
+        Return an issue from the mirror opened with `open_mirror()`, or from Jira if
+        there's no mirror or the issue isn't in it with all of its fields. The mirror
+        may be out of date, so use this to read issues, not to check them before
+        changing them.
+
+        Args:
+            issue_key (Issue | str): The issue or its key/id.
+
+        Returns:
+            Issue: The issue.
+        """
+        if isinstance(issue_key, _Issue):
+            return issue_key
+        if self.mirror is not None:
+            issue: _Issue = self.mirror.get(issue_key, all_fields=True)
+            if issue is not None:
+                return issue
+        return self.issue(issue_key)
+
+    def field_metadata(self, refresh: bool = False) -> FieldMetadata:
+        """
+        Return the server's fields. They're downloaded at most once per
+        `field_cache_ttl` seconds, and shared by every client for the same server, in
+        this process and, through `field_cache_dir`, in later ones.
+
+        Args:
+            refresh (bool, optional): Download the fields even if they're cached.
+                Defaults to False.
+
+        Returns:
+            FieldMetadata: The fields.
+        """
+        server: str = self.server_url
+        with _field_cache_lock:
+            metadata: FieldMetadata | None = _field_cache.get(server)
+            if refresh or metadata is None or metadata.age() >= self.field_cache_ttl:
+                metadata = None if refresh else self._read_field_cache()
+                if metadata is None:
+                    metadata = FieldMetadata(super().fields(), time.time())
+                    self._write_field_cache(metadata)
+                _field_cache[server] = metadata
+        return metadata
+
+    def fields(self, refresh: bool = False) -> list[dict[str, object]]:
+        """
+        Return a list of all issue fields, from the cache described in
+        `field_metadata()`.
+
+        Args:
+            refresh (bool, optional): Download the fields even if they're cached.
+                Defaults to False.
+
+        Returns:
+            list[dict[str, object]]: The fields.
+        """
+        return list(self.field_metadata(refresh).fields)
+
+    def _field_cache_path(self) -> _Path | None:
+        """
+        Return the path field metadata for this server is saved at, if it's saved.
+        """
+        if self.field_cache_dir is None:
+            return None
+        name: str = _re.sub(r"[^\w.-]+", "_", self.server_url)
+        return self.field_cache_dir / f"{name}.json"
+
+    def _read_field_cache(self) -> FieldMetadata | None:
+        """
+        Return the field metadata saved for this server, or None if there isn't any
+        or it's expired.
+        """
+        path: _Path | None = self._field_cache_path()
+        if path is None:
+            return None
+        try:
+            data: dict = _json.loads(path.read_text())
+            metadata: FieldMetadata = FieldMetadata(data["fields"], data["loaded_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return metadata if metadata.age() < self.field_cache_ttl else None
+
+    def _write_field_cache(self, metadata: FieldMetadata) -> None:
+        """
+        Save field metadata for this server. The cache is only an optimization, so
+        it's skipped if it can't be written.
+        """
+        path: _Path | None = self._field_cache_path()
+        if path is None:
+            return
+        temp: _Path = path.with_name(f"{path.name}.{_os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp.write_text(
+                _json.dumps(
+                    {
+                        "server": self.server_url,
+                        "loaded_at": metadata.loaded_at,
+                        "fields": metadata.fields,
+                    }
+                )
+            )
+            # Replace the file in one step, so other processes never read half of it
+            _os.replace(temp, path)
+        except OSError:
+            temp.unlink(missing_ok=True)
+
+    def _field_metadata_with(self, field: str) -> FieldMetadata:
+        """
+        Return the field metadata, refreshed if it doesn't have a field with the given
+        name or ID, in case the field is new.
+        """
+        metadata: FieldMetadata = self.field_metadata()
+        if (
+            field not in metadata.names
+            and field not in metadata.ids
+            and metadata.age() >= _FIELD_MISS_REFRESH
+        ):
+            metadata = self.field_metadata(refresh=True)
+        return metadata
+
+    def _field_id(self, field: str) -> str | None:
+        """
+        Return the ID of a field given its ID or name, or None if there's no such
+        field.
+        """
+        metadata: FieldMetadata = self._field_metadata_with(field)
+        return field if field in metadata.names else metadata.ids.get(field)
+
+    def get_custom_field_id(self, field_name: str) -> str:
+        """
+        Return the custom field id for the given field name.
+
+        Args:
+            field_name (str): The custom field name.
+
+        Raises:
+            ValueError: The custom field does not exist.
+
+        Returns:
+            str: The custom field id.
+        """
+        metadata: FieldMetadata = self._field_metadata_with(field_name)
+        if field_name not in metadata.ids:
+            raise ValueError(f"Could not find custom field with name '{field_name}'")
+        return metadata.ids[field_name]
+
+    def get_custom_field_name(self, field_id: str | int) -> str:
+        """
+        Return the name of the field with the given id.
+
+        Args:
+            field_id (str | int): The field id as either `"customfield_123"` or `123`.
+
+        Returns:
+            str: The field name.
+
+        Raises:
+            ValueError: The field id does not exist.
+        """
+        if isinstance(field_id, int):
+            field_id = f"customfield_{field_id}"
+        metadata: FieldMetadata = self._field_metadata_with(field_id)
+        if field_id not in metadata.names:
+            raise ValueError(f"Could not find custom field with id '{field_id}'")
+        return metadata.names[field_id]
+
+    def get_custom_field(
+        self, issue: _Issue, field_name: str, default: object = None
+    ) -> object:
+        """
+        Return the value of the custom field with the given name.
+
+        Args:
+            issue (Issue): The jira issue object to get the custom field value from.
+            field_name (str): The issue's custom field name.
+
+        Returns:
+            str: The custom field value.
+        """
+        field_id: str = self.get_custom_field_id(field_name)
+        value: object = issue.raw["fields"][field_id]
+        return value or default
+
+    def get_field(self, issue: _Issue, field_name: str, default: object = None) -> str:
+        """
+        Return the value of the built-in or custom field with the given name.
+
+        Args:
+            issue (Issue): The jira issue object to get the field value from.
+            field_name (str): The issue's field name.
+
+        Returns:
+            str: The field value.
+        """
+        value: object
+        try:
+            # try to get the field name as a built-in field
+            value = issue.raw["fields"][field_name]
+        except KeyError:
+            try:
+                # try to get the field name as a custom field
+                value = self.get_custom_field(issue, field_name)
+            except ValueError:
+                # return the default value if provided
+                if default is not None:
+                    value = default
+                else:
+                    # field does not exist and no default return value was provided
+                    raise ValueError(f"Could not find field with name '{field_name}'")
+        return value
+
+    def get_fields(
+        self,
+        issues: Iterable[_Issue | dict],
+        field_names: Iterable[str],
+        default: object = None,
+    ) -> list[dict[str, object]]:
+        """
+        Return the values of several built-in or custom fields of several issues. Each
+        field is looked up once, rather than once per issue as with `get_field()`.
+
+        Args:
+            issues (Iterable[Issue | dict]): The jira issue objects or raw issues to get
+                the field values from.
+            field_names (Iterable[str]): The fields' names (e.g. `"Release Notes"`) or
+                ids (e.g. `"summary"` or `"customfield_123"`).
+            default (object, optional): The value of fields an issue doesn't have a
+                value for. If None, fields that don't exist raise a ValueError.
+                Defaults to None.
+
+        Raises:
+            ValueError: A field does not exist and no default was provided.
+
+        Returns:
+            list[dict[str, object]]: The field values of each issue, by field name.
+        """
+        field_ids: dict[str, str] = {}
+        for field_name in field_names:
+            field_id: str | None = self._field_id(field_name)
+            if field_id is None:
+                if default is None:
+                    raise ValueError(f"Could not find field with name '{field_name}'")
+                # Issues may still have it, as with get_field()
+                field_id = field_name
+            field_ids[field_name] = field_id
+
+        values: list[dict[str, object]] = []
+        for issue in issues:
+            raw: dict = issue.raw if isinstance(issue, _Issue) else issue
+            fields: dict[str, object] = raw.get("fields") or {}
+            issue_values: dict[str, object] = {}
+            for field_name, field_id in field_ids.items():
+                value: object = fields.get(field_id)
+                issue_values[field_name] = default if value is None else value
+            values.append(issue_values)
+        return values
+
+    def search_all_issues(
+        self,
+        jql_str: str,
+        raw: bool = False,
+        fields: str | list[str] | None = None,
+        expand: str | None = None,
+        page_size: int = 100,
+        workers: int = 4,
+        progress: Callable[[int, int], None] | None = None,
+        **kwargs: object,
+    ) -> Iterator[_Issue | dict[str, object]]:
+        """
+        Return all issues matching a JQL query. Unlike `jira.search_issues`, this will
+        return all issues matching the query, not just the first 50. Issues are
+        yielded in order as soon as their page arrives, while up to `workers` later
+        pages are fetched concurrently, so at most a few pages are held in memory.
+
+        On Jira Server, the first page reports the total and the remaining pages are
+        fetched concurrently by offset. On Jira Cloud, which only pages searches with a
+        token, the matching issue IDs are listed (thousands per request) and the
+        issues are bulk fetched concurrently. If the server rate limits a request, the
+        number of concurrent requests is halved and grows back as requests succeed.
+
+        Args:
+            jql_str (str): The JQL query string.
+            raw (bool): If True, return each issue as a dict rather than a jira.Issue
+            fields (str | list[str], optional): The IDs of the fields to fetch, e.g.
+                `["summary", "status"]`. Fetching only the fields needed makes pages
+                much smaller. Defaults to None (all fields).
+            expand (str, optional): Extra information to fetch for each issue, e.g.
+                "changelog". Defaults to None.
+            page_size (int, optional): The number of issues per request. The server
+                may return fewer, up to its own maximum. Defaults to 100.
+            workers (int, optional): The maximum number of concurrent requests.
+                Defaults to 4.
+            progress (Callable[[int, int], None], optional): Called after each page
+                with the number of issues fetched so far and the total, which is
+                approximate on Jira Cloud. Defaults to None.
+            **kwargs (object): Extra parameters to pass to `jira.search_issues` on Jira
+                Server.
+
+        Returns:
+            Iterator[Issue | dict[str, object]]: An iterator of issues.
+        """
+        fields = fields.split(",") if isinstance(fields, str) else fields
+        limit: _AdaptiveLimit = _AdaptiveLimit(workers)
+        total: int
+        pages: Iterable[Callable[[], list[dict[str, object]]]]
+        if self._is_cloud:
+            total = self.approximate_issue_count(jql_str)
+            pages = self._bulk_fetch_pages(
+                jql_str, fields, expand, min(page_size, _BULK_FETCH_MAX)
+            )
+        else:
+            first: dict[str, object] = self.search_issues(
+                jql_str,
+                startAt=0,
+                maxResults=page_size,
+                fields=fields,
+                expand=expand,
+                json_result=True,
+                **kwargs,
+            )
+            total = first["total"]
+            # The server's maximum may be smaller than the page size asked for
+            page_size = first["maxResults"] or page_size
+            pages = [lambda: first["issues"]]
+            pages += [
+                (
+                    lambda start=start: self.search_issues(
+                        jql_str,
+                        startAt=start,
+                        maxResults=page_size,
+                        fields=fields,
+                        expand=expand,
+                        validate_query=False,
+                        json_result=True,
+                        **kwargs,
+                    )["issues"]
+                )
+                for start in range(page_size, total, page_size)
+            ]
+
+        fetched: int = 0
+        for page in self._fetch_pages_concurrently(pages, limit):
+            for issue in page:
+                yield issue if raw else _Issue(self._options, self._session, raw=issue)
+            fetched += len(page)
+            if progress is not None:
+                progress(fetched, max(total, fetched))
+
+    def search_issue_ids(self, jql_str: str, workers: int = 4) -> Iterator[str]:
+        """
+        Return the IDs of all issues matching a JQL query, without fetching their
+        fields, which is much quicker than `search_all_issues()`.
+
+        Args:
+            jql_str (str): The JQL query string.
+            workers (int, optional): The maximum number of concurrent requests on Jira
+                Server. Defaults to 4.
+
+        Returns:
+            Iterator[str]: An iterator of issue IDs.
+        """
+        if self._is_cloud:
+            for ids in self._issue_id_pages(jql_str):
+                yield from ids
+            return
+        # Jira Server always returns the ID, so ask for it as the only field
+        for issue in self.search_all_issues(
+            jql_str, raw=True, fields="id", page_size=1000, workers=workers
+        ):
+            yield issue["id"]
+
+    def _issue_id_pages(self, jql_str: str) -> Iterator[list[str]]:
+        """
+        Lists the IDs of the issues matching a JQL query on Jira Cloud, thousands per
+        request, and yields each page of them.
+        """
+        token: str = None
+        while True:
+            result: dict[str, object] = self.enhanced_search_issues(
+                jql_str,
+                nextPageToken=token,
+                maxResults=_ID_PAGE_SIZE,
+                fields="",
+                json_result=True,
+            )
+            ids: list[str] = [issue["id"] for issue in result.get("issues", [])]
+            if ids:
+                yield ids
+            token = result.get("nextPageToken")
+            if result.get("isLast", token is None) or not ids:
+                break
+
+    def _bulk_fetch_pages(
+        self,
+        jql_str: str,
+        fields: list[str] | None,
+        expand: str | None,
+        page_size: int,
+    ) -> Iterator[Callable[[], list[dict[str, object]]]]:
+        """
+        Lists the IDs of the issues matching a JQL query on Jira Cloud, and yields a
+        function which bulk fetches each page of them, in order.
+        """
+        for ids in self._issue_id_pages(jql_str):
+            for i in range(0, len(ids), page_size):
+                yield lambda page=ids[i : i + page_size]: self._bulk_fetch(
+                    page, fields, expand
+                )
+
+    def _bulk_fetch(
+        self, ids: list[str], fields: list[str] | None, expand: str | None
+    ) -> list[dict[str, object]]:
+        """
+        Fetches issues by ID on Jira Cloud, in the order of the IDs.
+        """
+        body: dict[str, object] = {"issueIdsOrKeys": ids, "fields": fields or ["*all"]}
+        if expand:
+            body["expand"] = expand.split(",")
+        response = self._session.post(
+            self._get_url("issue/bulkfetch"), data=_json.dumps(body)
+        )
+        issues: dict[str, dict] = {
+            issue["id"]: issue for issue in response.json().get("issues", [])
+        }
+        # Issues deleted since they were listed are missing
+        return [issues[id] for id in ids if id in issues]
+
+    def _fetch_pages_concurrently(
+        self,
+        pages: Iterable[Callable[[], list[dict[str, object]]]],
+        limit: _AdaptiveLimit,
+    ) -> Iterator[list[dict[str, object]]]:
+        """
+        Calls each page's function in a thread pool, keeping at most `limit.maximum`
+        pages ahead of the one being yielded, and yields the pages in order.
+        """
+
+        def on_response(response, *args, **kwargs) -> None:
+            # Every rate limited response counts, including ones the session retries
+            if response.status_code == 429:
+                limit.throttle(float(response.headers.get("Retry-After") or 1))
+
+        def fetch(page: Callable[[], list[dict[str, object]]]) -> list:
+            for attempt in range(_RATE_LIMIT_RETRIES + 1):
+                try:
+                    with limit:
+                        return page()
+                except _JIRAError as e:
+                    if e.status_code != 429 or attempt == _RATE_LIMIT_RETRIES:
+                        raise
+
+        hooks: list[Callable] = self._session.hooks.setdefault("response", [])
+        hooks.append(on_response)
+        pending: _deque[_Future] = _deque()
+        try:
+            with _ThreadPoolExecutor(limit.maximum) as executor:
+                try:
+                    for page in pages:
+                        pending.append(executor.submit(fetch, page))
+                        if len(pending) > limit.maximum:
+                            yield pending.popleft().result()
+                    while pending:
+                        yield pending.popleft().result()
+                finally:
+                    # Don't fetch pages nobody will read if iteration stops early
+                    for future in pending:
+                        future.cancel()
+        finally:
+            hooks.remove(on_response)
+
+    def generate_release_notes(
+        self,
+        issues: list[_Issue],
+        version: str = "",
+        title: str = "",
+        date_format: str = "%B %d, %Y",
+        format: Literal["html", "markdown"] = "markdown",
+    ) -> str:
+        """
+        Generate release notes from a list of issues.
+
+        Args:
+            issues (list[Issue]): The issues to generate release notes for.
+            format (Literal["html", "markdown"], optional): The format to generate the
+                release notes in. Defaults to "markdown".
+
+        Returns:
+            str: The release notes.
+        """
+        release_notes: str
+
+        # Add the title
+        if not title and version:
+            title = f"Release Notes for {version}"
+        else:
+            title = "Release Notes"
+        release_notes = f"{title}\n---\n"
+
+        # Add the date
+        release_notes += f"*{time.strftime(date_format)}* | "
+
+        # Sort the issues by issue type
+        issues_by_type: dict[str, list[_Issue]] = {}
+        for issue in issues:
+            issue_type: str = issue.fields.issuetype.name
+            if issue_type not in issues_by_type:
+                issues_by_type[issue_type] = []
+            issues_by_type[issue_type].append(issue)
+
+        counts: list[str] = []
+        nicknames: dict[str, str] = {"Story": "Features", "Bug": "Bug Fixes"}
+        for nickname in nicknames:
+            if nickname in issues_by_type:
+                counts.append(
+                    f"**{len(issues_by_type[nickname])} {nicknames[nickname].lower()}**"
+                )
+        release_notes += " & ".join(counts) + "\n\n"
+
+        # Start with Stories
+        is_first: bool = True
+        for issue_type in issues_by_type:
+            if is_first:
+                is_first = False
+            else:
+                release_notes += "\n"
+            release_notes += f"## {nicknames.get(issue_type, issue_type)}\n\n"
+            # Remove the stories from the issues_by_type dict
+            sub_issues: list[_Issue] = issues_by_type[issue_type]
+            for issue in sub_issues:
+                # Standardize the summaries:
+                # - Remove leading/trailing whitespace
+                # - Remove trailing periods
+                # - Capitalize the first letter
+                summary: str = issue.fields.summary.strip().rstrip(".").capitalize()
+                # Wrap the line at 80 chars per markdown spec
+                release_notes += (
+                    textwrap.fill(
+                        f"* **[{issue.key}]** {summary}\n",
+                        width=78,
+                        subsequent_indent="  ",
+                    )
+                    + "  \n"
+                )
+                if issue_type in ["Story", "Bug"]:
+                    issue_notes: str
+                    if issue_type == "Story":
+                        issue_notes = self.get_field(issue, "Release Notes")
+                    elif issue_type == "Bug":
+                        issue_notes = self.get_field(issue, "Bug Notes")
+                    if issue_notes:
+                        # Wrap the line at 80 chars per markdown spec, adding an extra
+                        # 2 spaces to each indent to account the italic asterisks that
+                        # will be added to each line
+                        issue_notes_lines: list[str] = textwrap.fill(
+                            issue_notes,
+                            width=80,
+                            initial_indent="    ",
+                            subsequent_indent="    ",
+                        ).split("\n")
+                        # Italicize each line of the release notes
+                        issue_notes_lines = [
+                            f"  *{line[4:]}*" for line in issue_notes_lines
+                        ]
+                        release_notes += "\n".join(issue_notes_lines) + "\n"
+        return release_notes
+
+    # TODO: Make sure that this converts to jira markdown
+    def convert_markdown_to_jira(self, markdown: str) -> str:
+        """
+        Convert markdown to jira markup.
+
+        Args:
+            markdown (str): The markdown to convert.
+
+        Returns:
+            str: The converted jira markup.
+        """
+        # Convert markdown to html
+        regex = r"""\[(?P<label>[^\]]*)\]\((?P<url>[^)]*)\)"""
+        out = _re.findall(regex, markdown)
+        found_all = False
+        while not found_all:
+            match = _re.search(regex, markdown)
+
+            if match is None:
+                found_all = True
+
+            else:
+                pre_string = markdown[0 : match.start()]
+                mid_string = "[" + out[0][0] + "|" + out[0][1] + "]"
+                post_string = markdown[match.end() :]
+                out.pop(0)
+                markdown = pre_string + mid_string + post_string
+
+        return markdown
+
+
+class UserPermissionError(Exception):
+    """
+    Exception for when a user is missing permissions
+    """
+
+
+class InvalidProjectError(Exception):
+    """
+    Exception for when a project is invalid or doesn't exist
+    """
+
+
+class InvalidIssueError(Exception):
+    """
+    Exception for when a issue is invalid or doesn't exist
+    """
+
+
+class CustomFieldNotFoundError(Exception):
+    """
+    Exception for when a custom field is not found
+    """
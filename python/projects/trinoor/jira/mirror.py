@@ -0,0 +1,434 @@
+"""
+A local SQLite mirror of Jira issues, so that reports and helpers can query issues in
+milliseconds instead of downloading them again on every run.
+
+The first sync of a JQL query downloads every matching issue. Later syncs only
+download the issues updated since the previous sync, and list the IDs of the matching
+issues to drop the ones that no longer match, so they're usually quick. Each
+issue's raw JSON is stored along with indexed columns for its key, project, type,
+status, fix versions, and when it was updated.
+
+Example:
+    >>> jira = JIRA(email, token)
+    >>> mirror = jira.open_mirror("issues.sqlite3")
+    >>> mirror.sync("project = DOC")
+    >>> notes = jira.generate_release_notes(mirror.issues(fix_version="1.2.0"))
+"""
+import json as _json
+import re as _re
+import sqlite3 as _sqlite3
+import threading as _threading
+from datetime import datetime as _datetime, timedelta as _timedelta, timezone as _tz
+from pathlib import Path as _Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+from zoneinfo import ZoneInfo as _ZoneInfo
+
+from jira import Issue as _Issue
+
+if TYPE_CHECKING:
+    from . import JIRA
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS issues (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    project TEXT,
+    type TEXT,
+    status TEXT,
+    updated TEXT,
+    fields TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_project ON issues (project);
+CREATE INDEX IF NOT EXISTS issues_type ON issues (type);
+CREATE INDEX IF NOT EXISTS issues_status ON issues (status);
+CREATE INDEX IF NOT EXISTS issues_updated ON issues (updated);
+CREATE TABLE IF NOT EXISTS fix_versions (
+    issue_id TEXT NOT NULL REFERENCES issues (id) ON DELETE CASCADE,
+    version TEXT NOT NULL,
+    PRIMARY KEY (version, issue_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS syncs (
+    jql TEXT PRIMARY KEY,
+    last_sync TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_issues (
+    jql TEXT NOT NULL,
+    issue_id TEXT NOT NULL,
+    PRIMARY KEY (jql, issue_id)
+) WITHOUT ROWID;
+"""
+
+# Columns added since the first version of the schema, for existing databases
+_ADDED_COLUMNS: dict[str, str] = {"fields": "TEXT"}
+
+# Stored as an issue's fields when it was synced with all of them. Otherwise they're
+# a JSON list of the field IDs, or NULL if the issue was synced before they were stored
+_ALL_FIELDS: str = "*"
+
+# The fields the indexed columns come from, which are always fetched
+_INDEXED_FIELDS: list[str] = [
+    "project",
+    "issuetype",
+    "status",
+    "fixVersions",
+    "updated",
+]
+
+# JQL dates only have minutes, and clocks differ, so incremental syncs overlap a little
+_SYNC_OVERLAP: _timedelta = _timedelta(minutes=2)
+
+# The number of issues written at once during a sync
+_BATCH_SIZE: int = 500
+
+# The number of issues downloaded by ID in one JQL query
+_ID_BATCH_SIZE: int = 100
+
+_ORDER_BY: _re.Pattern = _re.compile(
+    r"\s+ORDER\s+BY\s+.*$", _re.IGNORECASE | _re.DOTALL
+)
+
+
+class IssueMirror:
+    """
+    A local SQLite mirror of the Jira issues matching one or more JQL queries.
+    """
+
+    def __init__(self, jira: "JIRA", database: str | _Path) -> None:
+        """
+        Args:
+            jira (JIRA): The Jira client used to sync issues.
+            database (str | Path): The path to the SQLite database.
+        """
+        self.jira = jira
+        self.database: _Path = _Path(database)
+        self._timezone: _tz | _ZoneInfo = None
+        # The connection is shared by threads, so writes are serialized
+        self._lock: _threading.Lock = _threading.Lock()
+        self._db: _sqlite3.Connection = _sqlite3.connect(
+            self.database, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+        columns: set[str] = {
+            row[1] for row in self._db.execute("PRAGMA table_info(issues)")
+        }
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in columns:
+                self._db.execute(
+                    f"ALTER TABLE issues ADD COLUMN {column} {column_type}"
+                )
+
+    def close(self) -> None:
+        """
+        Closes the database.
+        """
+        self._db.close()
+
+    def __enter__(self) -> "IssueMirror":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM issues").fetchone()[0]
+
+    def last_sync(self, jql: str) -> _datetime | None:
+        """
+        Return when a JQL query was last synced.
+
+        Args:
+            jql (str): The JQL query.
+
+        Returns:
+            datetime | None: When the sync started, in UTC, or None if it never has.
+        """
+        row: tuple = self._db.execute(
+            "SELECT last_sync FROM syncs WHERE jql = ?", (jql,)
+        ).fetchone()
+        return _datetime.fromisoformat(row[0]) if row else None
+
+    def sync(
+        self,
+        jql: str,
+        full: bool = False,
+        fields: str | list[str] | None = None,
+        workers: int = 4,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> int:
+        """
+        Download the issues matching a JQL query into the mirror. The first sync of a
+        query downloads every matching issue; later syncs only download the issues
+        updated since the last one.
+
+        Later syncs also list the IDs of the issues matching the query, without their
+        fields, to drop the issues that no longer match (or were deleted) from the
+        query's results, and download the ones that match without having been
+        updated. Issues that no synced query matches are removed from the mirror.
+
+        Args:
+            jql (str): The JQL query.
+            full (bool, optional): Download every matching issue even if the query has
+                been synced before. Defaults to False.
+            fields (str | list[str], optional): The IDs of the fields to store, in
+                addition to the indexed ones. Defaults to None (all fields).
+            workers (int, optional): The maximum number of concurrent requests.
+                Defaults to 4.
+            progress (Callable[[int, int], None], optional): Called with the number
+                of issues downloaded so far and the total. Defaults to None.
+
+        Returns:
+            int: The number of issues downloaded.
+        """
+        started: _datetime = _datetime.now(_tz.utc)
+        since: _datetime = None if full else self.last_sync(jql)
+        query: str = jql
+        if since is not None:
+            # Jira interprets JQL dates in the user's time zone
+            since = (since - _SYNC_OVERLAP).astimezone(self._user_timezone())
+            order_by: _re.Match = _ORDER_BY.search(jql)
+            where: str = jql[: order_by.start()] if order_by else jql
+            query = f'({where}) AND updated >= "{since:%Y/%m/%d %H:%M}"'
+            if order_by:
+                query += order_by.group()
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        if fields is not None:
+            fields = list(dict.fromkeys([*fields, *_INDEXED_FIELDS]))
+
+        issues: Iterable[dict] = self.jira.search_all_issues(
+            query, raw=True, fields=fields, workers=workers, progress=progress
+        )
+        count: int = 0
+        with self._lock, self._db:
+            if since is None:
+                # The query's results are replaced, not added to
+                self._db.execute("DELETE FROM sync_issues WHERE jql = ?", (jql,))
+            batch: list[dict] = []
+            for issue in issues:
+                batch.append(issue)
+                if len(batch) >= _BATCH_SIZE:
+                    self._store(jql, batch, fields)
+                    count += len(batch)
+                    batch = []
+            self._store(jql, batch, fields)
+            count += len(batch)
+            if since is not None:
+                count += self._reconcile(jql, fields, workers)
+            self._db.execute(
+                "DELETE FROM issues WHERE id NOT IN (SELECT issue_id FROM sync_issues)"
+            )
+            self._db.execute(
+                "INSERT INTO syncs (jql, last_sync) VALUES (?, ?) "
+                "ON CONFLICT (jql) DO UPDATE SET last_sync = excluded.last_sync",
+                (jql, started.isoformat()),
+            )
+        return count
+
+    def _reconcile(self, jql: str, fields: list[str] | None, workers: int) -> int:
+        """
+        Makes a query's results match the IDs of the issues matching it in Jira,
+        downloading any that are missing. Must be called in a transaction.
+
+        Returns:
+            int: The number of issues downloaded.
+        """
+        current: set[str] = set(self.jira.search_issue_ids(jql, workers=workers))
+        stored: set[str] = {
+            row[0]
+            for row in self._db.execute(
+                "SELECT issue_id FROM sync_issues WHERE jql = ?", (jql,)
+            )
+        }
+        self._db.executemany(
+            "DELETE FROM sync_issues WHERE jql = ? AND issue_id = ?",
+            [(jql, issue_id) for issue_id in stored - current],
+        )
+        missing: list[str] = sorted(current - stored, key=int)
+        count: int = 0
+        for i in range(0, len(missing), _ID_BATCH_SIZE):
+            batch: list[dict] = list(
+                self.jira.search_all_issues(
+                    f"id in ({', '.join(missing[i : i + _ID_BATCH_SIZE])})",
+                    raw=True,
+                    fields=fields,
+                    workers=workers,
+                )
+            )
+            self._store(jql, batch, fields)
+            count += len(batch)
+        return count
+
+    def _store(self, jql: str, issues: list[dict], fields: list[str] | None) -> None:
+        """
+        Writes a batch of raw issues synced with the given fields (None for all of
+        them), and records that they match a query. Must be called in a transaction.
+        """
+        synced_fields: str = _ALL_FIELDS if fields is None else _json.dumps(fields)
+        rows: list[tuple] = []
+        versions: list[tuple[str, str]] = []
+        for issue in issues:
+            fields: dict = issue.get("fields") or {}
+            rows.append(
+                (
+                    issue["id"],
+                    issue["key"],
+                    (fields.get("project") or {}).get("key"),
+                    (fields.get("issuetype") or {}).get("name"),
+                    (fields.get("status") or {}).get("name"),
+                    _normalize_timestamp(fields.get("updated")),
+                    synced_fields,
+                    _json.dumps(issue),
+                )
+            )
+            versions += [
+                (issue["id"], version["name"])
+                for version in fields.get("fixVersions") or []
+            ]
+        ids: list[tuple[str]] = [(row[0],) for row in rows]
+        self._db.executemany(
+            "INSERT INTO issues "
+            "(id, key, project, type, status, updated, fields, raw) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+            "key = excluded.key, project = excluded.project, type = excluded.type, "
+            "status = excluded.status, updated = excluded.updated, "
+            "fields = excluded.fields, raw = excluded.raw",
+            rows,
+        )
+        self._db.executemany("DELETE FROM fix_versions WHERE issue_id = ?", ids)
+        self._db.executemany(
+            "INSERT OR IGNORE INTO fix_versions (issue_id, version) VALUES (?, ?)",
+            versions,
+        )
+        self._db.executemany(
+            "INSERT OR IGNORE INTO sync_issues (jql, issue_id) VALUES (?, ?)",
+            [(jql, issue_id) for (issue_id,) in ids],
+        )
+
+    def _user_timezone(self) -> _tz | _ZoneInfo:
+        """
+        Return the Jira user's time zone, which JQL dates are interpreted in.
+        """
+        if self._timezone is None:
+            try:
+                self._timezone = _ZoneInfo(self.jira.myself()["timeZone"])
+            except Exception:
+                self._timezone = _tz.utc
+        return self._timezone
+
+    def get(
+        self, key: str, raw: bool = False, all_fields: bool = False
+    ) -> _Issue | dict | None:
+        """
+        Return a mirrored issue.
+
+        Args:
+            key (str): The issue's key or ID.
+            raw (bool, optional): If True, return the issue as a dict rather than a
+                jira.Issue. Defaults to False.
+            all_fields (bool, optional): Only return the issue if it was synced with
+                all of its fields, not just some of them. Defaults to False.
+
+        Returns:
+            Issue | dict | None: The issue, or None if it isn't mirrored.
+        """
+        row: tuple = self._db.execute(
+            "SELECT raw, fields FROM issues WHERE key = ? OR id = ?", (key, key)
+        ).fetchone()
+        if row is None or (all_fields and row[1] != _ALL_FIELDS):
+            return None
+        return self._issue(row[0], raw)
+
+    def issues(
+        self,
+        jql: str = None,
+        project: str = None,
+        type: str = None,
+        status: str | list[str] = None,
+        fix_version: str = None,
+        updated_since: _datetime = None,
+        raw: bool = False,
+    ) -> Iterator[_Issue | dict]:
+        """
+        Return mirrored issues, filtered by the indexed columns, in the order they
+        were created. Issues are read from the database as they're iterated over, so
+        they aren't all held in memory.
+
+        Args:
+            jql (str, optional): Only issues that matched this synced query. Defaults
+                to None.
+            project (str, optional): Only issues in this project, by key. Defaults to
+                None.
+            type (str, optional): Only issues of this type, e.g. "Bug". Defaults to
+                None.
+            status (str | list[str], optional): Only issues with this status, or one
+                of these statuses. Defaults to None.
+            fix_version (str, optional): Only issues with this fix version. Defaults
+                to None.
+            updated_since (datetime, optional): Only issues updated at or after this
+                time. Defaults to None.
+            raw (bool, optional): If True, return each issue as a dict rather than a
+                jira.Issue. Defaults to False.
+
+        Returns:
+            Iterator[Issue | dict]: An iterator of issues.
+        """
+        clauses: list[str] = []
+        params: list[object] = []
+        if jql is not None:
+            clauses.append("id IN (SELECT issue_id FROM sync_issues WHERE jql = ?)")
+            params.append(jql)
+        if project is not None:
+            clauses.append("project = ?")
+            params.append(project)
+        if type is not None:
+            clauses.append("type = ?")
+            params.append(type)
+        if status is not None:
+            statuses: list[str] = [status] if isinstance(status, str) else status
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params += statuses
+        if fix_version is not None:
+            clauses.append(
+                "id IN (SELECT issue_id FROM fix_versions WHERE version = ?)"
+            )
+            params.append(fix_version)
+        if updated_since is not None:
+            clauses.append("updated >= ?")
+            params.append(_normalize_timestamp(updated_since))
+        where: str = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # A cursor of its own, so other queries can run while this one is iterated
+        cursor: _sqlite3.Cursor = self._db.cursor()
+        cursor.execute(
+            f"SELECT raw FROM issues {where} ORDER BY CAST(id AS INTEGER)", params
+        )
+        try:
+            for row in cursor:
+                yield self._issue(row[0], raw)
+        finally:
+            cursor.close()
+
+    def _issue(self, data: str, raw: bool) -> _Issue | dict:
+        """
+        Return a stored issue as a dict or a jira.Issue.
+        """
+        issue: dict = _json.loads(data)
+        if raw:
+            return issue
+        return _Issue(self.jira._options, self.jira._session, raw=issue)
+
+
+def _normalize_timestamp(value: str | _datetime | None) -> str | None:
+    """
+    Return a Jira timestamp (e.g. "2024-01-31T09:15:00.000+1100") or datetime as an
+    ISO 8601 timestamp in UTC, so that timestamps sort correctly.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = _datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_tz.utc)
+    return value.astimezone(_tz.utc).isoformat(timespec="milliseconds")
@@ -0,0 +1,185 @@
+"""
+Benchmark of `JIRA.search_all_issues` against a local stub Jira server.
+
+The stub serves a fixed number of generated issues with a per-request latency, like a
+remote Jira, and rate limits clients that make too many concurrent requests with 429
+Too Many Requests. It serves either the Jira Server search API (paged by offset) or
+the Jira Cloud one (paged by token, with bulk fetches). The previous sequential
+implementation, which fetched 50 issues per request, is included for reference.
+
+Usage:
+    python -m trinoor.jira.test.bench_search [--issues N] [--latency SECONDS]
+        [--server-limit N] [--cloud]
+"""
+import json
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from trinoor.jira import JIRA
+
+# The most issues the stub returns per request, like Jira
+MAX_RESULTS: int = 100
+
+
+def make_issue(i: int, fields: list[str]) -> dict:
+    all_fields: dict = {
+        "summary": f"Issue {i}",
+        "status": {"name": "Done" if i % 3 else "In Progress"},
+        "description": "Lorem ipsum dolor sit amet. " * 40,
+        "comment": {"comments": [{"body": "A comment. " * 20}] * 5},
+    }
+    if fields and "*all" not in fields:
+        all_fields = {name: all_fields.get(name) for name in fields}
+    return {"id": str(10000 + i), "key": f"BENCH-{i}", "fields": all_fields}
+
+
+class StubJira(BaseHTTPRequestHandler):
+    issues: int = 2000
+    latency: float = 0.05
+    limit: int = 6
+    cloud: bool = False
+    active: int = 0
+    requests: int = 0
+    rate_limited: int = 0
+    lock: threading.Lock = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def respond(self, body: dict, status: int = 200, headers: dict = {}) -> None:
+        data: bytes = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self.handle_request(parse_qs(urlparse(self.path).query), None)
+
+    def do_POST(self) -> None:
+        length: int = int(self.headers.get("Content-Length") or 0)
+        body: dict = json.loads(self.rfile.read(length) or b"{}")
+        self.handle_request(parse_qs(urlparse(self.path).query), body)
+
+    def handle_request(self, query: dict, body: dict | None) -> None:
+        path: str = urlparse(self.path).path
+        if path.endswith("/serverInfo"):
+            deployment: str = "Cloud" if self.cloud else "Server"
+            self.respond({"deploymentType": deployment, "versionNumbers": [9, 4, 0]})
+            return
+
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            if cls.active >= cls.limit:
+                cls.rate_limited += 1
+                self.respond({}, 429, {"Retry-After": "1"})
+                return
+            cls.active += 1
+        try:
+            time.sleep(self.latency)
+            self.respond(self.route(path, query, body or {}))
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def route(self, path: str, query: dict, body: dict) -> dict:
+        def param(name: str, default: str) -> str:
+            return str(body.get(name, query.get(name, [default])[0]))
+
+        fields: list[str] = [f for f in param("fields", "*all").split(",") if f]
+        if path.endswith("/search/approximate-count"):
+            return {"count": self.issues}
+        if path.endswith("/search/jql"):
+            start: int = int(param("nextPageToken", "0") or 0)
+            end: int = min(start + int(param("maxResults", "50")), self.issues)
+            result: dict = {
+                "issues": [{"id": str(10000 + i)} for i in range(start, end)],
+                "isLast": end >= self.issues,
+            }
+            if end < self.issues:
+                result["nextPageToken"] = str(end)
+            return result
+        if path.endswith("/issue/bulkfetch"):
+            ids: list[str] = body["issueIdsOrKeys"][:MAX_RESULTS]
+            return {"issues": [make_issue(int(i) - 10000, body["fields"]) for i in ids]}
+        if path.endswith("/search"):
+            start = int(param("startAt", "0"))
+            count: int = min(int(param("maxResults", "50")), MAX_RESULTS)
+            end = min(start + count, self.issues)
+            return {
+                "startAt": start,
+                "maxResults": count,
+                "total": self.issues,
+                "issues": [make_issue(i, fields) for i in range(start, end)],
+            }
+        return {}
+
+
+def sequential(jira: JIRA, jql: str):
+    """The previous `search_all_issues` implementation, for reference."""
+    start_at = 0
+    while True:
+        results = jira.search_issues(jql, startAt=start_at, maxResults=50)
+        if len(results) == 0:
+            break
+        yield from results
+        start_at += 50
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--issues", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--server-limit", type=int, default=6)
+    parser.add_argument("--cloud", action="store_true")
+    args = parser.parse_args()
+
+    StubJira.issues = args.issues
+    StubJira.latency = args.latency
+    StubJira.limit = args.server_limit
+    StubJira.cloud = args.cloud
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubJira)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    jira = JIRA("bench", "token", f"http://127.0.0.1:{server.server_port}")
+
+    cases: dict[str, object] = {
+        "search_all_issues(workers=1)": lambda: jira.search_all_issues(
+            "project = BENCH", workers=1
+        ),
+        "search_all_issues(workers=4)": lambda: jira.search_all_issues(
+            "project = BENCH", workers=4
+        ),
+        "search_all_issues(workers=16)": lambda: jira.search_all_issues(
+            "project = BENCH", workers=16
+        ),
+        "search_all_issues(workers=4, fields=...)": lambda: jira.search_all_issues(
+            "project = BENCH", workers=4, fields=["summary", "status"]
+        ),
+    }
+    if not args.cloud:
+        # Jira Cloud no longer supports paging searches by offset
+        cases = {"old sequential, 50 per page": lambda: sequential(jira, "x"), **cases}
+
+    for name, search in cases.items():
+        StubJira.requests = StubJira.rate_limited = 0
+        start: float = time.perf_counter()
+        keys: list[str] = [issue.key for issue in search()]
+        seconds: float = time.perf_counter() - start
+        in_order: bool = keys == [f"BENCH-{i}" for i in range(args.issues)]
+        print(
+            f"{name:<42} {seconds:7.2f}s  {len(keys)} issues  "
+            f"{StubJira.requests} requests  {StubJira.rate_limited} rate limited"
+            f"{'' if in_order else '  OUT OF ORDER'}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
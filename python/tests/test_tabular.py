@@ -0,0 +1,315 @@
+import contextlib
+import datetime
+import pathlib
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "modules"))
+
+import tabular  # noqa: E402
+
+
+def make_table(tmp_path, df, name="t.csv", **kwargs):
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return tabular.TableFile(path, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "n == 2 | n == 3",
+        "n > 1 & n < 4",
+        "n > 1 & n < 4 | n == 5",
+        "n == 1 | n > 2 & n < 5",
+        "(n == 1) | (n == 5)",
+        "~(n == 2) & n < 4",
+        "n in [1, 2] & n != 2",
+        "s == 'a|b' | n == 4",
+        "not n == 2 & s != 'c'",
+    ],
+)
+def test_compiled_query_matches_pandas(query):
+    df = pd.DataFrame({"n": [1, 2, 3, 4, 5], "s": ["a|b", "b", "c", "d", "e"]})
+    assert tabular._compile_query(query) is not None
+    compiled = df[tabular.TableFile._eval_query(df, query)]
+    assert compiled["n"].tolist() == df.query(query)["n"].tolist()
+
+
+def test_get_with_mixed_boolean_query(tmp_path):
+    table = make_table(tmp_path, pd.DataFrame({"n": [1, 2, 3, 4, 5]}))
+    result = table.get(where="n == 2 | n == 3", column="n", as_type=pd.DataFrame)
+    assert result["n"].tolist() == [2, 3]
+
+
+def make_sqlite_table(tmp_path, index):
+    path = tmp_path / "t.db"
+    with sqlite3.connect(path) as conn:
+        pd.DataFrame({"n": [1, 2, 3], "s": ["a", "b", "c"]}).to_sql(
+            "t", conn, index=index
+        )
+        conn.execute('CREATE INDEX "ix_t_s" ON "t" ("s")')
+    return path, tabular.TableFile(path, name="t")
+
+
+def sqlite_schema(path):
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        return sorted(
+            (row[0], row[1])
+            for row in conn.execute("SELECT type, name FROM sqlite_master")
+        )
+
+
+@pytest.mark.parametrize("index", [False, True])
+def test_remove_chunks_twice_keeps_sqlite_schema(tmp_path, index):
+    path, table = make_sqlite_table(tmp_path, index)
+    schema = sqlite_schema(path)
+    assert table.remove_chunks("n == 1") == 1
+    assert table.remove_chunks("n == 2") == 1
+    assert sqlite_schema(path) == schema
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        assert conn.execute('SELECT n, s FROM "t"').fetchall() == [(3, "c")]
+
+
+def test_failed_sqlite_rewrite_drops_temp_table(tmp_path):
+    path, table = make_sqlite_table(tmp_path, False)
+    schema = sqlite_schema(path)
+
+    def failing_chunks():
+        yield pd.DataFrame({"n": [1], "s": ["a"]})
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        table._replace_chunks(failing_chunks())
+    assert sqlite_schema(path) == schema
+
+
+def index_table(tmp_path, kind):
+    tmp_path.mkdir()
+    df = pd.DataFrame({"d": ["2024-01-01", "2024-01-02", "2024-01-03"], "n": [1, 2, 3]})
+    indexes = {"d": kind, "n": kind} if kind else None
+    table = make_table(tmp_path, df, indexes=indexes)
+    assert pd.api.types.is_datetime64_any_dtype(table.data["d"])
+    return table
+
+
+@pytest.mark.parametrize("kind", ["hash", "sorted"])
+@pytest.mark.parametrize(
+    "query",
+    [
+        "d == '2024-01-02'",
+        "d in ['2024-01-02', '2024-01-03']",
+        "n == '2'",
+        "n == 2",
+        "n in ['1', 2]",
+    ],
+)
+def test_index_lookup_matches_scan(tmp_path, kind, query):
+    indexed = index_table(tmp_path / "indexed", kind)
+    scanned = index_table(tmp_path / "scanned", None)
+
+    def rows(table):
+        return table.get(where=query, column="n", as_type=pd.DataFrame)["n"].tolist()
+
+    assert rows(indexed) == rows(scanned)
+    assert (
+        indexed.update(query, n=0).index.tolist()
+        == scanned.update(query, n=0).index.tolist()
+    )
+    assert indexed.data["n"].tolist() == scanned.data["n"].tolist()
+
+
+@pytest.mark.parametrize("kind", ["hash", "sorted"])
+def test_index_lookup_converts_datetime_values(tmp_path, kind):
+    table = index_table(tmp_path / "t", kind)
+    assert table._lookup(equals={"d": "2024-01-02"}).tolist() == [1]
+    assert table._lookup(between={"d": ("2024-01-02", "2024-01-03")}).tolist() == [
+        1,
+        2,
+    ]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["2024-01-01 10:00:00", "2024-01-02 10:00:00.5"],
+        ["2024-01-01 10:00:00.000000008"],
+        ["2024-01-01 10:00:00+11:00", "2024-01-02 10:00:00.25+11:00"],
+    ],
+)
+def test_sql_value_matches_to_sql(tmp_path, values):
+    df = pd.DataFrame({"d": pd.to_datetime(values, format="ISO8601")})
+    with contextlib.closing(sqlite3.connect(tmp_path / "t.db")) as conn:
+        df.to_sql("t", conn, index=False)
+        stored = [row[0] for row in conn.execute('SELECT d FROM "t"')]
+    assert [tabular.TableFile._sql_value(value) for value in df["d"]] == stored
+
+
+def test_save_without_index_column_rewrites_table(tmp_path):
+    path = tmp_path / "t.db"
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        pd.DataFrame({"n": [1, 2, 3]}).to_sql("t", conn, index=False)
+    table = tabular.TableFile(path, name="t")
+    table.update("n == 2", n=20)
+    table.save()
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        assert [row[0] for row in conn.execute('SELECT n FROM "t"')] == [1, 20, 3]
+
+
+def test_lazy_sql_query_detects_column_types(tmp_path):
+    path = tmp_path / "t.db"
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        pd.DataFrame(
+            {"d": ["2024-01-01", "2024-01-02"], "n": ["1", "2"], "s": ["a", "b"]}
+        ).to_sql("t", conn)
+    lazy = tabular.TableFile(path, name="t", lazy=True)
+    result = lazy.get(where="s == 'b'", as_type=pd.DataFrame)
+    assert lazy._data is None
+    expected = tabular.TableFile(path, name="t").get(
+        where="s == 'b'", as_type=pd.DataFrame
+    )
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_table_cache_evicts_entries_for_changed_files(tmp_path):
+    cache = tabular.TableCache(tmp_path / "cache")
+    source = tmp_path / "t.csv"
+    pd.DataFrame({"n": [1, 2]}).to_csv(source, index=False)
+    tabular.TableFile(source, cache=cache)
+    assert len(list(cache.directory.glob("*.pkl"))) == 1
+
+    pd.DataFrame({"n": [1, 2, 3]}).to_csv(source, index=False)
+    assert tabular.TableFile(source, cache=cache).data["n"].tolist() == [1, 2, 3]
+    assert len(list(cache.directory.glob("*.pkl"))) == 1
+
+    source.unlink()
+    other = tmp_path / "u.csv"
+    pd.DataFrame({"n": range(1000)}).to_csv(other, index=False)
+    cache.max_disk_bytes = 1
+    tabular.TableFile(other, cache=cache)
+    assert len(list(cache.directory.glob("*.pkl"))) <= 1
+
+
+def test_column_types_are_cached_with_the_table_cache(tmp_path):
+    cache = tabular.TableCache()
+    table = make_table(tmp_path, pd.DataFrame({"d": ["2024-01-01"]}), cache=cache)
+    assert cache.get_types(table._schema_cache_key()) == {"d": datetime.date}
+
+
+@pytest.mark.parametrize("indexes", [None, ["a"]])
+def test_add_to_lazy_sqlite_table(tmp_path, indexes):
+    path = tmp_path / "t.db"
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}).to_sql("t", conn)
+    table = tabular.TableFile(path, name="t", lazy=True, indexes=indexes)
+    table.add(a=5, b="z")
+    assert table.data.index.tolist() == [0, 1, 2]
+    result = table.get(where="a == 5", column="b", as_type=pd.DataFrame)
+    assert result["b"].tolist() == ["z"]
+    table.save()
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        assert conn.execute('SELECT "index", a, b FROM "t" WHERE a = 5').fetchall() == [
+            (2, 5, "z")
+        ]
+
+
+NULL_QUERIES = [
+    "a != 1",
+    "a not in [1]",
+    "~(a == 1)",
+    "not a == 1",
+    "b != 'x'",
+    "~(b == 'x') & a > 0",
+    "a == 1 | b != 'y'",
+    "a in [1, 3]",
+    "a > 1",
+]
+
+
+def null_frame():
+    return pd.DataFrame({"a": [1.0, None, 3.0, 1.0], "b": ["x", "y", None, None]})
+
+
+@pytest.mark.parametrize("query", NULL_QUERIES)
+def test_lazy_sqlite_query_matches_eager_with_nulls(tmp_path, query):
+    path = tmp_path / "t.db"
+    with contextlib.closing(sqlite3.connect(path)) as conn:
+        null_frame().to_sql("t", conn)
+    lazy = tabular.TableFile(path, name="t", lazy=True)
+    eager = tabular.TableFile(path, name="t")
+    result = lazy.get(where=query, as_type=pd.DataFrame)
+    assert lazy._data is None
+    pd.testing.assert_frame_equal(
+        result, eager.get(where=query, as_type=pd.DataFrame), check_dtype=False
+    )
+
+
+@pytest.mark.parametrize("query", NULL_QUERIES)
+def test_lazy_parquet_query_matches_eager_with_nulls(tmp_path, query):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "t.parquet"
+    # As TableFile writes them, so that filtered reads keep their labels
+    null_frame().to_parquet(path, index=True)
+    lazy = tabular.TableFile(path, lazy=True)
+    result = lazy.get(where=query, as_type=pd.DataFrame)
+    assert lazy._data is None
+    eager = tabular.TableFile(path).get(where=query, as_type=pd.DataFrame)
+    pd.testing.assert_frame_equal(result, eager, check_dtype=False)
+
+
+@pytest.mark.parametrize("kind", ["hash", "sorted"])
+@pytest.mark.parametrize("query", ["a == None", "a in [2, None]", "a in [None]"])
+def test_index_lookup_never_matches_nulls(tmp_path, kind, query):
+    df = pd.DataFrame({"a": [1.0, None, 2.0]})
+    path = tmp_path / "t.parquet"
+    df.to_parquet(path)
+    indexed = tabular.TableFile(path, indexes={"a": kind}, detect_types=False)
+    scanned = tabular.TableFile(path, detect_types=False)
+
+    def rows(table):
+        return table.get(where=query, as_type=pd.DataFrame).index.tolist()
+
+    assert rows(indexed) == rows(scanned) == df.query(query).index.tolist()
+    assert indexed._lookup(equals={"a": None}).tolist() == []
+
+
+def test_compiled_query_parses_dates_for_datetime_columns():
+    df = pd.DataFrame({"d": pd.to_datetime(["2023-01-01", "2023-01-02"])})
+    mask = tabular.TableFile._eval_query(df, "d == '2023-01-02'")
+    assert mask.tolist() == (df["d"] == "2023-01-02").tolist() == [False, True]
+
+
+@pytest.mark.parametrize("name", ["t.csv", "t.tsv", "t.json", "t.parquet"])
+def test_index_column_kept_outside_sqlite(tmp_path, name):
+    df = pd.DataFrame({"index": [10, 20], "val": ["a", "b"]})
+    path = tmp_path / name
+    if name.endswith(".csv"):
+        df.to_csv(path, index=False)
+    elif name.endswith(".tsv"):
+        df.to_csv(path, sep="\t", index=False)
+    elif name.endswith(".json"):
+        df.to_json(path)
+    else:
+        df.to_parquet(path, index=False)
+    table = tabular.TableFile(path, detect_types=False)
+
+    assert table.data.columns.tolist() == ["index", "val"]
+    chunks = list(table.iter_chunks())
+    assert pd.concat(chunks).columns.tolist() == ["index", "val"]
+
+
+def test_unnamed_and_sqlite_index_columns_used_as_index(tmp_path):
+    df = pd.DataFrame({"val": ["a", "b"]}, index=[10, 20])
+    df.to_csv(tmp_path / "t.csv")
+    with sqlite3.connect(tmp_path / "t.sqlite") as conn:
+        df.to_sql("t", conn)
+
+    for table in [
+        tabular.TableFile(tmp_path / "t.csv", detect_types=False),
+        tabular.TableFile(tmp_path / "t.sqlite", name="t", detect_types=False),
+    ]:
+        assert table.data.columns.tolist() == ["val"]
+        assert table.data.index.tolist() == [10, 20]
@@ -0,0 +1,299 @@
+"""
+Benchmark of jira-report.py's export over a synthetic dump of Jira issues.
+
+Compares the previous export, which built a jira.Issue for every issue, normalized
+every field in one process and wrote the report from a pandas DataFrame, with the
+streaming pipeline, which normalizes raw issues in batches (optionally in worker
+processes) and writes each row as it's generated. Each case runs in its own process,
+so its peak memory is reported separately.
+
+Usage:
+    python bench_report.py [-n ISSUES] [-j JOBS] [--output-type {csv,json,xlsx}]
+"""
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import resource
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from pprint import pformat
+from tempfile import TemporaryDirectory
+
+import dateutil.parser
+import pandas as pd
+from jira import Issue, resources
+
+# jira-report.py isn't importable by name, so load it from its path
+spec = importlib.util.spec_from_file_location(
+    "jira_report", Path(__file__).with_name("jira-report.py")
+)
+report = importlib.util.module_from_spec(spec)
+sys.modules["jira_report"] = report
+spec.loader.exec_module(report)
+
+SERVER: str = "https://example.atlassian.net"
+COLUMNS: list[tuple[str, str]] = [
+    ("key", "Key"),
+    ("summary", "Summary"),
+    ("status", "Status"),
+    ("priority", "Priority"),
+    ("assignee", "Assignee"),
+    ("reporter", "Reporter"),
+    ("resolution", "Resolution"),
+    ("created", "Created"),
+    ("updated", "Updated"),
+    ("labels", "Labels"),
+    ("fixVersions", "Fix versions"),
+    ("customfield_10001", "Customer"),
+    ("customfield_10002", "Story Points"),
+    ("comment", "Comment"),
+]
+
+
+def make_user(i: int) -> dict:
+    return {
+        "self": f"{SERVER}/rest/api/2/user?accountId=account-{i}",
+        "accountId": f"account-{i}",
+        "displayName": f"User {i}",
+        "emailAddress": f"user{i}@example.com",
+        "active": True,
+    }
+
+
+def make_issues(count: int, seed: int = 0) -> list[dict]:
+    """
+    Return synthetic raw issues with the kinds of fields a report usually includes.
+    """
+    rng: random.Random = random.Random(seed)
+    statuses: list[dict] = [
+        {"self": f"{SERVER}/rest/api/2/status/{i}", "name": name, "id": str(i)}
+        for i, name in enumerate(["To Do", "In Progress", "In Review", "Done"])
+    ]
+    priorities: list[dict] = [
+        {"self": f"{SERVER}/rest/api/2/priority/{i}", "name": name, "id": str(i)}
+        for i, name in enumerate(["Low", "Medium", "High"])
+    ]
+    customers: list[dict] = [
+        {
+            "self": f"{SERVER}/rest/api/2/customFieldOption/{i}",
+            "value": f"Customer {i}",
+            "id": str(i),
+        }
+        for i in range(20)
+    ]
+    versions: list[dict] = [
+        {"self": f"{SERVER}/rest/api/2/version/{i}", "name": f"1.{i}", "id": str(i)}
+        for i in range(10)
+    ]
+    users: list[dict] = [make_user(i) for i in range(50)]
+    resolution: dict = {
+        "self": f"{SERVER}/rest/api/2/resolution/1",
+        "name": "Fixed",
+        "id": "1",
+    }
+    issues: list[dict] = []
+    for i in range(count):
+        comments: list[dict] = [
+            {
+                "self": f"{SERVER}/rest/api/2/issue/{i}/comment/{c}",
+                "author": rng.choice(users),
+                "body": f"Comment {c} on issue {i}. " * rng.randint(1, 5),
+                "created": "2024-01-31T09:15:00.000+1100",
+            }
+            for c in range(rng.randint(0, 4))
+        ]
+        status: dict = rng.choice(statuses)
+        issues.append(
+            {
+                "id": str(10000 + i),
+                "key": f"BENCH-{i}",
+                "self": f"{SERVER}/rest/api/2/issue/{10000 + i}",
+                "fields": {
+                    "summary": f"Issue {i}: something needs doing",
+                    "status": status,
+                    "priority": rng.choice(priorities),
+                    "assignee": rng.choice(users + [None]),
+                    "reporter": rng.choice(users),
+                    "resolution": resolution if status["name"] == "Done" else None,
+                    "created": "2024-01-31T09:15:00.000+1100",
+                    "updated": "2024-02-01T17:45:12.345+1100",
+                    "labels": rng.sample(["backend", "ui", "test", "docs"], 2),
+                    "fixVersions": rng.sample(versions, rng.randint(0, 2)),
+                    "customfield_10001": rng.choice(customers),
+                    "customfield_10002": rng.choice([1, 2, 3, 5, 8, None]),
+                    "comment": {
+                        "self": f"{SERVER}/rest/api/2/issue/{10000 + i}/comment",
+                        "comments": comments,
+                        "maxResults": len(comments),
+                        "total": len(comments),
+                        "startAt": 0,
+                    },
+                },
+            }
+        )
+    return issues
+
+
+def old_normalize_issue_value(value: object, opts: dict = {}):
+    """The previous `normalize_issue_value()`, for reference."""
+    valuestr = str(value)
+    if (
+        isinstance(value, report.Iterable)
+        and not isinstance(value, (str, bytes))
+        and "self" in value
+    ):
+        if "/resolution/" in value["self"]:
+            return value["name"]
+        elif "accountId" in value:
+            display_name = value.get("displayName", "")
+            email_address = value.get("emailAddress", "")
+            if display_name and email_address:
+                value = f"{display_name} <{email_address}>"
+            elif display_name:
+                value = display_name
+            elif email_address:
+                value = email_address
+        elif "name" in value:
+            value = value["name"]
+        elif "value" in value:
+            value = value["value"]
+        elif "comments" in value:
+            commentlist = []
+            i = 0
+            limit = opts.get("commentLimit")
+            for c in value["comments"]:
+                i += 1
+                if limit and i > limit:
+                    break
+                author = c["author"]
+                author = author.get(
+                    "displayName", author.get("emailAddress", "<unknown>")
+                )
+                commentlist.append(f"{author} on {c['created']}: {c['body']}")
+            value = "\n---\n".join(commentlist)
+    elif isinstance(value, list):
+        valuelist = []
+        for subvalue in value:
+            valuelist.append(old_normalize_issue_value(subvalue))
+        print(f"valuelist: '''{valuelist}'''")
+        value = pformat(valuelist)
+    elif isinstance(value, dict):
+        valuedict = {}
+        for k, v in value.items():
+            valuedict[k] = old_normalize_issue_value(v)
+        value = pformat(valuedict)
+    elif isinstance(value, resources.Resource):
+        value = valuestr
+    elif not isinstance(value, (int, float, str, bool)):
+        value = valuestr
+    elif isinstance(value, str):
+        value = value.replace(r"\\ ", "\n")
+        if value in ("NA", "N/A", "NULL"):
+            value = None
+    return value
+
+
+def old_export(issues: list[dict], path: Path, output_type: str) -> int:
+    """The previous export, for reference."""
+    options: dict = {"server": SERVER, "rest_path": "api", "rest_api_version": "2"}
+    rows: list[dict] = []
+    # The previous export printed every list field it normalized
+    with contextlib.redirect_stdout(io.StringIO()):
+        for raw in issues:
+            issue: Issue = Issue(options, None, raw=raw)
+            if "test" in issue.fields.labels or issue.fields.summary.startswith(
+                "[test]"
+            ):
+                continue
+            row: dict = {}
+            for field_id, heading in COLUMNS:
+                if field_id == "key":
+                    value = issue.key
+                else:
+                    value = old_normalize_issue_value(
+                        issue.raw["fields"][field_id], opts={"commentLimit": 0}
+                    )
+                if isinstance(value, str) and report.re.match(
+                    r"\d{4}-\d{2}-\d{2}", value
+                ):
+                    value = dateutil.parser.parse(value).strftime("%Y-%m-%d")
+                row[heading] = value
+            rows.append(row)
+    df = pd.DataFrame(rows)
+    if output_type == "csv":
+        path.write_bytes(df.to_csv(index=False).encode())
+    elif output_type == "json":
+        path.write_bytes(df.to_json(orient="records", indent=4).encode())
+    else:
+        with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="Report")
+    return len(df)
+
+
+def new_export(issues: list[dict], path: Path, output_type: str, jobs: int) -> int:
+    """The streaming export."""
+    writer_class: type = {
+        "csv": report.CSVReportWriter,
+        "json": report.JSONReportWriter,
+        "xlsx": report.ExcelReportWriter,
+    }[output_type]
+    count: int = 0
+    with writer_class(path, [heading for _, heading in COLUMNS], "Report") as writer:
+        for row in report.generate_rows(issues, COLUMNS, jobs=jobs):
+            writer.write(row)
+            count += 1
+    return count
+
+
+def run_case(case: str, count: int, output_type: str, jobs: int) -> tuple:
+    """
+    Run one case in this process, returning its time, row count, output size and
+    peak memory.
+    """
+    issues: list[dict] = make_issues(count)
+    baseline: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with TemporaryDirectory() as directory:
+        path: Path = Path(directory) / f"report.{output_type}"
+        start: float = time.perf_counter()
+        if case == "old":
+            rows: int = old_export(issues, path, output_type)
+        else:
+            rows = new_export(issues, path, output_type, jobs)
+        elapsed: float = time.perf_counter() - start
+        size: int = path.stat().st_size
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, rows, size, max(peak - baseline, 0) / 1024
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--issues", type=int, default=50000)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-type", choices=["csv", "json", "xlsx"], default="csv")
+    args = parser.parse_args()
+
+    cases: list[tuple[str, str, int]] = [
+        ("previous export (jira.Issue + pandas)", "old", 1),
+        ("streaming export, 1 job", "new", 1),
+    ]
+    if args.jobs > 1:
+        cases.append((f"streaming export, {args.jobs} jobs", "new", args.jobs))
+    print(f"{args.issues} issues, {args.output_type}, {os.cpu_count()} CPUs")
+    for name, case, jobs in cases:
+        with ProcessPoolExecutor(1) as pool:
+            elapsed, rows, size, memory = pool.submit(
+                run_case, case, args.issues, args.output_type, jobs
+            ).result()
+        print(
+            f"{name:<40} {elapsed:7.2f}s  {rows} rows  {size / 1e6:6.1f} MB  "
+            f"+{memory:6.0f} MB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,817 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Download all JIRA issues for a given filter, save them to a file, and then email the
+file to a list of recipients.
+"""
+# TODO:
+# - [ ] add support for multiple filters
+# - [ ] convert all top-level imports to have a _prefix
+
+import csv
+import dateutil.parser
+import json
+import os
+import re
+import shlex
+import sys
+import time
+
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+from itertools import islice
+from pprint import pformat
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from textwrap import indent
+from jira import resources
+from trinoor.jira import JIRA, FieldMetadata
+from typing import Callable, Iterable, Iterator
+
+
+class OutputFormat(Enum):
+    CSV = "csv"
+    JSON = "json"
+    EXCEL = "xlsx"
+    XLSX = "xlsx"
+
+
+def load_env(env_path: Path | str) -> dict[str, str | int | float | bool]:
+    """
+    Load environment variables from a file and return them as a dict. Will parse a
+    bash style environment file:
+        FOO_BAR="some value"
+        FOO_BAR2=123
+    or a python style environment file:
+        FOO_BAR = "some value"
+        FOO_BAR2 = 123
+    """
+    env_path: Path = Path(env_path)
+    print(f"Loading environment from {env_path}")
+    env_values: dict[str, str | int | float | bool] = {}
+    if env_path.exists():
+        with open(env_path) as env_file:
+            for line in env_file:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    key, value = line.split("=", 1)
+                    # Clean up the key/value
+                    key = key.strip()
+                    value = value.strip(" '\"")
+                    os.environ[key] = value
+                    env_values[key] = parse_value(value)
+                    print(f" - {key}={env_values[key]}")
+    else:
+        raise FileNotFoundError(f"Environment file not found: {env_path}")
+    print("loaded:", env_values)
+    return env_values
+
+
+def parse_value(value: str) -> str | int | float | bool:
+    """
+    Parse a string value into a string, int, float, or bool.
+    """
+    try:
+        value = float(value)
+        if value.is_integer():
+            value = int(value)
+    except ValueError:
+        if value.lower() == "true":
+            value = True
+        elif value.lower() in ("false", ""):
+            value = False
+    return value
+
+
+def normalize_issue_value(value: object, opts: dict = {}):
+    """
+    Normalize a JIRA issue field's value to a string.
+    """
+    normalizer: Callable[[object, dict], object] | None = _normalizers.get(type(value))
+    if normalizer is None:
+        normalizer = _normalizers[type(value)] = _find_normalizer(type(value))
+    return normalizer(value, opts)
+
+
+def _normalize_str(value: str, opts: dict) -> str | None:
+    value = value.replace(r"\\ ", "\n")
+    if value in ("NA", "N/A", "NULL"):
+        return None
+    return value
+
+
+def _normalize_scalar(value: int | float | bool, opts: dict) -> int | float | bool:
+    return value
+
+
+def _normalize_list(value: list, opts: dict) -> str:
+    return pformat([normalize_issue_value(subvalue) for subvalue in value])
+
+
+def _normalize_dict(value: dict, opts: dict) -> object:
+    if "self" in value:
+        return _normalize_resource(value, opts)
+    return pformat({k: normalize_issue_value(v) for k, v in value.items()})
+
+
+# Normalized values of raw Jira resources (statuses, users, options, ...) by URL. The
+# same few resources appear on most issues, so each is only normalized once
+_resource_cache: dict[str, str] = {}
+
+
+def _normalize_resource(value: dict, opts: dict) -> object:
+    """
+    Normalize a raw Jira resource, i.e. a dict with a "self" URL.
+    """
+    if "comments" in value:
+        return _normalize_comments(value, opts)
+    url: str = value["self"]
+    normalized: object = _resource_cache.get(url)
+    if normalized is not None:
+        return normalized
+    if "/resolution/" in url:
+        normalized = value["name"]
+    elif "accountId" in value:
+        display_name = value.get("displayName", "")
+        email_address = value.get("emailAddress", "")
+        if display_name and email_address:
+            normalized = f"{display_name} <{email_address}>"
+        elif display_name:
+            normalized = display_name
+        elif email_address:
+            normalized = email_address
+        else:
+            return value
+    elif "name" in value:
+        normalized = value["name"]
+    elif "value" in value:
+        normalized = value["value"]
+    else:
+        # Issue-specific resources such as votes aren't shared, so aren't cached
+        return value
+    _resource_cache[url] = normalized
+    return normalized
+
+
+def _normalize_comments(value: dict, opts: dict) -> str:
+    limit: int | None = opts.get("commentLimit")
+    comments: list[dict] = value["comments"]
+    if limit:
+        comments = comments[:limit]
+    commentlist = []
+    for c in comments:
+        author = c["author"]
+        author = author.get("displayName", author.get("emailAddress", "<unknown>"))
+        commentlist.append(f"{author} on {c['created']}: {c['body']}")
+    return "\n---\n".join(commentlist)
+
+
+def _normalize_property_holder(value: resources.PropertyHolder, opts: dict) -> object:
+    return normalize_issue_value(value.__dict__)
+
+
+def _normalize_unknown_resource(value: resources.UnknownResource, opts: dict) -> object:
+    if hasattr(value, "comments"):
+        return normalize_issue_value(value.comments)
+    return value
+
+
+def _normalize_other(value: object, opts: dict) -> str:
+    return str(value)
+
+
+# How each type of value is normalized, checked in order. Raw issues only contain
+# JSON types; the jira resource types are for jira.Issue objects
+_NORMALIZERS: list[tuple[type, Callable[[object, dict], object]]] = [
+    (str, _normalize_str),
+    ((int, float, bool), _normalize_scalar),
+    (list, _normalize_list),
+    (dict, _normalize_dict),
+    (resources.Watchers, lambda value, opts: value.watchCount),
+    (resources.TimeTracking, lambda value, opts: value.raw),
+    (
+        resources.Comment,
+        lambda value, opts: f"{value.author} ({value.created}): {value.body}",
+    ),
+    (resources.PropertyHolder, _normalize_property_holder),
+    (resources.UnknownResource, _normalize_unknown_resource),
+]
+
+# The normalizer for each type of value seen so far, so the list above is only
+# searched once per type
+_normalizers: dict[type, Callable[[object, dict], object]] = {}
+
+
+def _find_normalizer(value_type: type) -> Callable[[object, dict], object]:
+    for types, normalizer in _NORMALIZERS:
+        if issubclass(value_type, types):
+            return normalizer
+    return _normalize_other
+
+
+# A date at the start of a value, and a value that's only an ISO 8601 date or time
+_DATE_PATTERN: re.Pattern = re.compile(r"\d{4}-\d{2}-\d{2}")
+_ISO_DATE_PATTERN: re.Pattern = re.compile(
+    r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$"
+)
+
+
+def format_date(value: object) -> object:
+    """
+    Format a value that's a date or time as just the date, e.g. "2024-01-31".
+    """
+    if isinstance(value, str) and _DATE_PATTERN.match(value):
+        if _ISO_DATE_PATTERN.match(value):
+            # The date is already in the right format, so there's no need to parse it
+            return value[:10]
+        return dateutil.parser.parse(value).strftime("%Y-%m-%d")
+    return value
+
+
+# The report's columns, as (field id, heading) pairs, and its options, set in each
+# process by init_rows()
+_columns: list[tuple[str, str]] = []
+_row_opts: dict = {}
+
+
+def init_rows(
+    columns: list[tuple[str, str]], comment_limit: int, include_test_issues: bool
+) -> None:
+    """
+    Set the columns and options that `issue_rows()` uses. Run in each worker process.
+    """
+    global _columns, _row_opts
+    _columns = columns
+    _row_opts = {
+        "commentLimit": comment_limit,
+        "includeTestIssues": include_test_issues,
+    }
+
+
+def issue_rows(issues: list[dict]) -> list[list]:
+    """
+    Return the report's rows for a batch of raw issues, skipping test issues unless
+    they're included.
+    """
+    rows: list[list] = []
+    include_test_issues: bool = _row_opts["includeTestIssues"]
+    for issue in issues:
+        fields: dict = issue["fields"]
+        # Determine if this is a test issue and whether we should skip it
+        if not include_test_issues:
+            if "test" in (fields.get("labels") or []) or (
+                fields.get("summary") or ""
+            ).startswith("[test]"):
+                continue
+        row: list = []
+        for field_id, _ in _columns:
+            if field_id == "key":
+                row.append(issue["key"])
+            else:
+                row.append(
+                    format_date(normalize_issue_value(fields.get(field_id), _row_opts))
+                )
+        rows.append(row)
+    return rows
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Yield lists of up to `size` items.
+    """
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def generate_rows(
+    issues: Iterable[dict],
+    columns: list[tuple[str, str]],
+    comment_limit: int = 0,
+    include_test_issues: bool = False,
+    jobs: int = 1,
+    batch_size: int = 500,
+) -> Iterator[list]:
+    """
+    Yield the report's rows for raw issues, in order, as they arrive. With more than
+    one job, batches of issues are normalized in worker processes while later ones
+    are fetched.
+    """
+    opts: tuple = (columns, comment_limit, include_test_issues)
+    if jobs <= 1:
+        init_rows(*opts)
+        for batch in batched(issues, batch_size):
+            yield from issue_rows(batch)
+        return
+    with ProcessPoolExecutor(jobs, initializer=init_rows, initargs=opts) as pool:
+        # Keep a few batches per worker queued, so fetching doesn't race ahead
+        pending: deque[Future] = deque()
+        for batch in batched(issues, batch_size):
+            pending.append(pool.submit(issue_rows, batch))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class ReportWriter(ABC):
+    """
+    Writes a report's rows to a file one at a time, as they're generated.
+    """
+
+    def __init__(self, path: Path, headings: list[str], sheet_name: str) -> None:
+        self.path: Path = path
+        self.headings: list[str] = headings
+        self.sheet_name: str = sheet_name
+
+    @abstractmethod
+    def write(self, row: list) -> None:
+        """
+        Writes a row to the report.
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Finishes writing the report and closes its file.
+        """
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class CSVReportWriter(ReportWriter):
+    def __init__(self, path: Path, headings: list[str], sheet_name: str) -> None:
+        super().__init__(path, headings, sheet_name)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        # Match the line endings pandas used to write
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow(headings)
+
+    def write(self, row: list) -> None:
+        self.writer.writerow(row)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class JSONReportWriter(ReportWriter):
+    def __init__(self, path: Path, headings: list[str], sheet_name: str) -> None:
+        super().__init__(path, headings, sheet_name)
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write("[")
+        self.separator: str = "\n"
+
+    def write(self, row: list) -> None:
+        record: str = json.dumps(dict(zip(self.headings, row)), indent=4, default=str)
+        self.file.write(self.separator + indent(record, "    "))
+        self.separator = ",\n"
+
+    def close(self) -> None:
+        self.file.write("\n]")
+        self.file.close()
+
+
+class ExcelReportWriter(ReportWriter):
+    def __init__(self, path: Path, headings: list[str], sheet_name: str) -> None:
+        import xlsxwriter
+
+        super().__init__(path, headings, sheet_name)
+        # Write rows to a temporary file rather than holding the sheet in memory
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.sheet = self.workbook.add_worksheet(sheet_name)
+        self.sheet.write_row(
+            0, 0, headings, self.workbook.add_format({"bold": True, "border": 1})
+        )
+        self.row_count: int = 1
+        # The widest value in each column, to fit the columns to the data
+        self.widths: list[int] = [len(heading) for heading in headings]
+
+    def write(self, row: list) -> None:
+        for col, value in enumerate(row):
+            if value is not None and not isinstance(value, (str, int, float)):
+                value = str(value)
+            self.sheet.write(self.row_count, col, value)
+            self.widths[col] = max(self.widths[col], len(str(value)))
+        self.row_count += 1
+
+    def close(self) -> None:
+        for col, width in enumerate(self.widths):
+            # Don't go over 100
+            self.sheet.set_column(col, col, min(width, 100) + 2)
+        self.workbook.close()
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from textwrap import dedent
+    import pandas as pd
+    from trinoor.email import SMTPClient
+
+    from argparse import (
+        ArgumentParser,
+        _ArgumentGroup,
+        Namespace,
+        RawDescriptionHelpFormatter,
+    )
+
+    parser = ArgumentParser(
+        description="Download Jira issues and email them to a list of recipients",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="The output file to save the issues to"
+    )
+    parser.add_argument(
+        "--output-type",
+        default="csv",
+        type=OutputFormat,
+        help="The output type to save the issues as",
+    )
+    parser.add_argument("-f", "--filter", type=int, help="The Jira filter to use")
+    parser.add_argument(
+        "-F",
+        "--fields",
+        action="append",
+        default=["key", "summary", "status"],
+        help="The fields to include in the report",
+    )
+    parser.add_argument(
+        "-C",
+        "--capitalize-fields",
+        action="store_true",
+        help="Capitalize the field names in the report (title case)",
+    )
+    parser.add_argument(
+        "--comment-limit",
+        type=int,
+        default=0,
+        help="The maximum number of comments to include in the report",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=min(os.cpu_count() or 1, 4),
+        help="The number of processes to normalize issues in",
+    )
+    parser.add_argument(
+        "-m",
+        "--mirror",
+        type=Path,
+        default=None,
+        help=(
+            "a local SQLite mirror of the issues; only issues updated since the last "
+            "run are downloaded"
+        ),
+    )
+    parser.add_argument(
+        "--include-test-issues",
+        action="store_true",
+        help="Include issues with the 'test' label or '[test]' in the summary",
+    )
+    parser.add_argument(
+        "-e",
+        "--env",
+        type=load_env,
+        default=None,
+        help="The .env file to load environment variables from",
+    )
+    parser.add_argument(
+        "-J",
+        "--jira-email",
+        default=os.environ.get("JIRA_EMAIL"),
+        help="The email address to authenticate JIRA with",
+    )
+    parser.add_argument(
+        "-T",
+        "--jira-token",
+        default=os.environ.get("JIRA_TOKEN"),
+        help="The token to authenticate JIRA with",
+    )
+    parser.add_argument(
+        "-E",
+        "--smtp-email",
+        default=os.environ.get("SMTP_EMAIL"),
+        help="The email address to authenticate SMTP with",
+    )
+    parser.add_argument(
+        "-P",
+        "--smtp-password",
+        default=os.environ.get("SMTP_PASSWORD"),
+        help="The password to authenticate SMTP with",
+    )
+    parser.add_argument(
+        "-s",
+        "--smtp-server",
+        default=os.environ.get("SMTP_HOST", "smtp.office365.com"),
+        help="The SMTP server to use",
+    )
+    parser.add_argument(
+        "-p",
+        "--smtp-port",
+        default=os.environ.get("SMTP_PORT", 587),
+        help="The SMTP port to use",
+    )
+    parser.add_argument(
+        "-S",
+        "--smtp-tls",
+        default=os.environ.get("SMTP_TLS", True),
+        type=bool,
+        help="Whether to use SSL to connect to the SMTP server",
+    )
+    parser.add_argument("-t", "--to", help="An email address to send the report to")
+    parser.add_argument("-c", "--cc", help="An email address to CC on the report")
+    parser.add_argument("-b", "--bcc", help="An email address to BCC on the report")
+    parser.add_argument("-H", "--html", help="The HTML body of the email")
+    parser.add_argument(
+        "--subject", default="{{filter_name}} Report", help="The subject of the email"
+    )
+    parser.add_argument(
+        "--html-template",
+        type=Path,
+        default=Path("jira-report.html"),
+        help="An HTML file to use as a template",
+    )
+    parser.epilog = dedent(
+        """
+        The following environment variables are supported:
+        - JIRA_EMAIL: The email address to authenticate with
+        - JIRA_TOKEN: The token to authenticate with
+
+        The following output types are supported:
+        - csv: Comma-separated values
+        - json: JSON
+        - xlsx: Excel spreadsheet
+        """
+    )
+    args = parser.parse_args()
+
+    # If any fields were specified, then remove the default fields
+    # Get the length of the default fields
+    default_fields_len = len(parser.get_default("fields"))
+    if len(args.fields) > default_fields_len:
+        args.fields = args.fields[default_fields_len:]
+
+    print(
+        "logging in to jira with",
+        args.jira_email,
+        len(args.jira_token) * "*",
+        "... ",
+        flush=True,
+        end="",
+    )
+    try:
+        jira = JIRA(args.jira_email, args.jira_token)
+    except Exception as e:
+        print("error:", e, flush=True, file=sys.stderr)
+        sys.exit(1)
+    print("success", flush=True)
+    print(
+        "authenticating with smtp server", args.smtp_server, "... ", flush=True, end=""
+    )
+    try:
+        smtp_client: SMTPClient = SMTPClient(
+            args.smtp_email,
+            args.smtp_password,
+            args.smtp_server,
+            args.smtp_port,
+            args.smtp_tls,
+        )
+    except Exception as e:
+        print("error:", e, flush=True, file=sys.stderr)
+        sys.exit(1)
+    print("success")
+    print("fetching custom fields ... ", end="")
+    # Get a list of all custom fields, which is cached between runs
+    try:
+        field_metadata: FieldMetadata = jira.field_metadata()
+    except Exception as e:
+        print("error:", e, flush=True, file=sys.stderr)
+        sys.exit(1)
+    print("success", flush=True)
+
+    # Work out each column's field id and heading once, rather than for every issue
+    columns: list[tuple[str, str]] = []
+    for field in args.fields:
+        if field == "key":
+            columns.append(("key", "Key"))
+        elif field in field_metadata.names:
+            columns.append((field, field_metadata.names[field]))
+        elif field in field_metadata.ids:
+            columns.append((field_metadata.ids[field], field))
+        else:
+            print(f"Field {field} not found, skipping")
+    headings: list[str] = [heading for _, heading in columns]
+    # Only download the fields in the report, and those used to skip test issues
+    search_fields: list[str] = [
+        field_id for field_id, _ in columns if field_id != "key"
+    ]
+    if not args.include_test_issues:
+        search_fields += ["labels", "summary"]
+
+    # Get the filter name
+    filter_name = jira.filter(args.filter).name
+    export_date: str = time.strftime("%d%b%Y").upper()
+    export_name: str = f"{filter_name} - {export_date}.{args.output_type.value}"
+    output_dir: TemporaryDirectory | None = None
+    output_path: Path
+    if args.output:
+        output_path = args.output
+    else:
+        output_dir = TemporaryDirectory()
+        output_path = Path(output_dir.name) / export_name
+    writer_class: type[ReportWriter] = {
+        OutputFormat.CSV: CSVReportWriter,
+        OutputFormat.JSON: JSONReportWriter,
+        OutputFormat.EXCEL: ExcelReportWriter,
+    }[args.output_type]
+
+    # Get all issues from the filter, writing each to the report as it's processed
+    print(f"processing filter {args.filter} ... ", flush=True, end="")
+    jql: str = f"filter = {args.filter}"
+    issues: Iterable[dict]
+    if args.mirror:
+        mirror = jira.open_mirror(args.mirror)
+        print(f"{mirror.sync(jql)} issues updated ... ", flush=True, end="")
+        issues = mirror.issues(jql=jql, raw=True)
+    else:
+        issues = jira.search_all_issues(jql, raw=True, fields=search_fields)
+    # Limit the rows shown in the email
+    max_html_rows = 10
+    preview_rows: list[list] = []
+    issue_count: int = 0
+    with writer_class(output_path, headings, export_date) as writer:
+        for row in generate_rows(
+            issues,
+            columns,
+            comment_limit=args.comment_limit,
+            include_test_issues=args.include_test_issues,
+            jobs=args.jobs,
+        ):
+            writer.write(row)
+            if issue_count < max_html_rows:
+                preview_rows.append(row)
+            issue_count += 1
+    print(f"{issue_count} issues found", flush=True)
+    print(f"report saved to {output_path}", flush=True)
+    df = pd.DataFrame(preview_rows, columns=headings)
+    print(df.head())
+
+    print("generating email ... ", flush=True, end="")
+
+    # Format the HTML body
+    html: str
+    if args.html:
+        html = args.html
+    elif args.html_template and args.html_template.exists():
+        html = args.html_template.read_text()
+    else:
+        html = dedent(
+            """
+            <h1>{{filter_name}} Report</h1>
+            <p>Exported on {{export_date}} with {{issue_count}} issue{{issue_count_plural}}.</p>
+            {{issue_table}}
+            """
+        )
+
+    # Replace a few common variables
+    if "{{filter_name}}" in html:
+        html = html.replace("{{filter_name}}", filter_name)
+    if "{{filter_name}}" in args.subject:
+        args.subject = args.subject.replace("{{filter_name}}", filter_name)
+    if "{{export_date}}" in html:
+        html = html.replace("{{export_date}}", export_date)
+    if "{{export_date}}" in args.subject:
+        args.subject = args.subject.replace("{{export_date}}", export_date)
+    if "{{issue_count}}" in html:
+        html = html.replace("{{issue_count}}", str(issue_count))
+    if "{{issue_count}}" in args.subject:
+        args.subject = args.subject.replace("{{issue_count}}", str(issue_count))
+    if "{{issue_count_plural}}" in html:
+        html = html.replace("{{issue_count_plural}}", "s" if issue_count != 1 else "")
+    if "{{issue_count_plural}}" in args.subject:
+        args.subject = args.subject.replace(
+            "{{issue_count_plural}}", "s" if issue_count != 1 else ""
+        )
+    if "{{issue_table}}" in html:
+        import numpy as np
+        from premailer import transform
+
+        # Construct a mask of which columns are numeric
+        numeric_col_mask = df.dtypes.apply(
+            lambda d: issubclass(np.dtype(d).type, np.number)
+        )
+
+        # Dict used to center the table headers
+        table_styles = [
+            {
+                "selector": "th",
+                "props": [
+                    ("border", "none"),
+                    ("text-align", "left"),
+                    ("font-weight", "bold"),
+                    ("padding-left", "1em"),
+                ],
+            },
+            {
+                "selector": "td",
+                "props": [
+                    ("border", "none"),
+                    ("padding", "0.5em 1em"),
+                ],
+            },
+            {
+                "selector": "tr",
+                "props": [
+                    ("border", "none"),
+                    ("border-bottom", "2px solid rgba(122, 122, 122, 0.5)"),
+                ],
+            },
+            {
+                "selector": "",  # the table itself
+                "props": [
+                    ("border-collapse", "collapse"),
+                    ("border-spacing", "0"),
+                    ("width", "100%"),
+                ],
+            },
+        ]
+
+        # Create a Styler
+        df_styled = (
+            df.iloc[:max_html_rows]
+            .style.set_properties(
+                subset=df.columns[
+                    numeric_col_mask
+                ],  # right-align the numeric columns and set their width
+                **{"text-align": "right"},
+            )
+            .set_properties(
+                subset=df.columns[
+                    ~numeric_col_mask
+                ],  # left-align the non-numeric columns and set their width
+                **{"text-align": "left"},
+            )
+            .format(
+                lambda x: "{:,.0f}".format(x)
+                if x > 1e3
+                else "{:,.2f}".format(x),  # format the numeric values
+                subset=pd.IndexSlice[:, df.columns[numeric_col_mask]],
+            )
+            .set_table_styles(table_styles)
+        ).hide(axis="index")
+        # center the header
+        # df_styled = df.style.set_properties(
+        #     **{"text-align": "center", "font-weight": "bold"}
+        # ).hide(axis="index")
+
+        # export html with style
+        table_html = df_styled.to_html()
+        # If there are more than 20 rows, add a message to the bottom of the table
+        if issue_count > max_html_rows:
+            print("Adding overflow message to bottom of table")
+            table_html = table_html.replace(
+                "</tbody>",
+                f"""
+            <tr>
+                <td colspan="{len(df.columns)}" style="
+                    text-align: center;
+                    font-style: italic;
+                ">
+                    {issue_count - max_html_rows} more rows in attached report
+                </td>
+            </tr>
+            </tbody>
+            """,
+            )
+
+        # Make the <style> tag inline
+        table_html = transform(table_html)
+        html = html.replace("{{issue_table}}", table_html)
+
+    print("success", flush=True)
+
+    print("sending email ... ", flush=True, end="")
+    try:
+        smtp_client.send_email(
+            to=args.to,
+            cc=args.cc,
+            bcc=args.bcc,
+            subject=args.subject,
+            sender=args.smtp_email,
+            body_html=html,
+            # body_text=df.to_string(),
+            attachments={export_name: output_path},
+        )
+    except Exception as e:
+        print("error:", e, flush=True, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output_dir is not None:
+            output_dir.cleanup()
+    print("success", flush=True)